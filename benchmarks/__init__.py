@@ -0,0 +1,15 @@
+"""Benchmarks of the roadbook hot paths (open, save, table, exports, editor).
+
+Run from the repository root:
+
+    python -m benchmarks --vignettes 48 --output bench.json
+    python -m benchmarks --save-baseline default
+    python -m benchmarks --compare default --threshold 0.25
+"""
+import os
+import sys
+
+# Les modules de l'application sont à plat dans src/
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
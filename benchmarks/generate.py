@@ -0,0 +1,125 @@
+"""Synthetic roadbook generator.
+
+Diagrams are written the way the editor stores them: drawing_elements for
+re-editing plus an SVG document shaped like QSvgGenerator's output.
+"""
+import argparse
+import json
+import random
+from typing import List
+from benchmarks import SRC_DIR  # noqa: F401  (ajoute src/ au chemin)
+from vignette_model import Vignette
+
+SCENE_WIDTH, SCENE_HEIGHT = 750, 400
+WORDS = ('piste', 'carrefour', 'à droite', 'à gauche', 'tout droit', 'pont', 'gué',
+         'village', 'CP', 'attention', 'virage', 'bifurcation', 'sable', 'caillou')
+
+
+def _random_elements(rng: random.Random, count: int, text_length: int) -> list:
+    elements = []
+    for i in range(count):
+        kind = ('path', 'path', 'ellipse', 'text')[i % 4]
+        if kind == 'path':
+            points = [{'type': 0 if j == 0 else 1,
+                       'x': rng.uniform(0, SCENE_WIDTH), 'y': rng.uniform(0, SCENE_HEIGHT)}
+                      for j in range(rng.randint(2, 6))]
+            elements.append({'type': 'path', 'path_points': points, 'pen_color': '#000000',
+                             'pen_width': rng.choice((3, 5, 7)), 'pen_style': rng.choice((1, 2)),
+                             'pos': [0.0, 0.0]})
+        elif kind == 'ellipse':
+            x, y = rng.uniform(0, SCENE_WIDTH - 74), rng.uniform(0, SCENE_HEIGHT - 74)
+            elements.append({'type': 'ellipse', 'rect': [x, y, 74.0, 74.0], 'pen_color': '#ff0000',
+                             'pen_width': 6, 'pos': [0.0, 0.0]})
+        else:
+            elements.append({'type': 'text', 'text': _random_text(rng, max(1, text_length // 4)),
+                             'font_family': 'Arial', 'font_size': 12, 'font_bold': True,
+                             'color': '#000000',
+                             'pos': [rng.uniform(0, SCENE_WIDTH - 100), rng.uniform(0, SCENE_HEIGHT - 20)]})
+    return elements
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(WORDS))
+    return ' '.join(words)[:length]
+
+
+def elements_to_svg(elements: list) -> str:
+    """SVG document equivalent to what VignetteEditor.sceneToSVG produces"""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg width="264.583mm" height="141.111mm" viewBox="0 0 {SCENE_WIDTH} {SCENE_HEIGHT}"\n'
+        ' xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+        ' version="1.2" baseProfile="tiny">\n<title>Qt SVG Document</title>\n'
+        '<g fill="none" stroke="black" stroke-width="1" fill-rule="evenodd"'
+        ' stroke-linecap="square" stroke-linejoin="bevel" >\n'
+    ]
+    for e in elements:
+        if e['type'] == 'path':
+            d = ' '.join(f"{'M' if p['type'] == 0 else 'L'}{p['x']:.3f},{p['y']:.3f}" for p in e['path_points'])
+            dash = ' stroke-dasharray="12,6"' if e['pen_style'] == 2 else ''
+            parts.append(f'<g fill="none" stroke="{e["pen_color"]}" stroke-width="{e["pen_width"]}"{dash}>\n'
+                         f'<path vector-effect="none" fill-rule="evenodd" d="{d}"/>\n</g>\n')
+        elif e['type'] == 'ellipse':
+            x, y, w, h = e['rect']
+            parts.append(f'<g fill="none" stroke="{e["pen_color"]}" stroke-width="{e["pen_width"]}">\n'
+                         f'<ellipse cx="{x + w / 2:.3f}" cy="{y + h / 2:.3f}" rx="{w / 2:.3f}" ry="{h / 2:.3f}"/>\n</g>\n')
+        else:
+            x, y = e['pos']
+            parts.append(f'<g fill="{e["color"]}" stroke="none" font-family="{e["font_family"]}"'
+                         f' font-size="{e["font_size"]}" font-weight="700">\n'
+                         f'<text x="{x:.3f}" y="{y + 16:.3f}" xml:space="preserve">{e["text"]}</text>\n</g>\n')
+    parts.append('</g>\n</svg>\n')
+    return ''.join(parts)
+
+
+def generate_vignettes(count: int = 48, elements: int = 8, text_length: int = 60,
+                       no_svg_ratio: float = 0.1, seed: int = 0) -> List[Vignette]:
+    """Build count vignettes; no_svg_ratio of them have no diagram"""
+    rng = random.Random(seed)
+    vignettes = []
+    for i in range(count):
+        v = Vignette(num=i + 1, inter_dist=float(rng.randint(0, 5000)),
+                     observations=_random_text(rng, text_length))
+        if rng.random() >= no_svg_ratio:
+            drawing = _random_elements(rng, elements, text_length)
+            v.set_diagram(elements_to_svg(drawing), drawing)
+        vignettes.append(v)
+    return vignettes
+
+
+def write_v1(path: str, vignettes: List[Vignette]):
+    """Write the legacy JSON (.rbk v1) format"""
+    data = {'vignettes': [{
+        'num': v.num,
+        'inter_dist': v.inter_dist,
+        'observations': v.observations,
+        'diagram': v.diagram,
+        'drawing_elements': v.drawing_elements,
+    } for v in vignettes]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None) -> int:
+    from roadbook_io import save_roadbook
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.generate',
+                                     description="Génère un roadbook synthétique")
+    parser.add_argument('output', help="fichier .rbk à créer")
+    parser.add_argument('--vignettes', type=int, default=48)
+    parser.add_argument('--elements', type=int, default=8, help="éléments par schéma")
+    parser.add_argument('--text-length', type=int, default=60, help="longueur des textes")
+    parser.add_argument('--no-svg-ratio', type=float, default=0.1, help="part de vignettes sans schéma")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--v1', action='store_true', help="écrire l'ancien format JSON")
+    args = parser.parse_args(argv)
+    vignettes = generate_vignettes(args.vignettes, args.elements, args.text_length,
+                                   args.no_svg_ratio, args.seed)
+    (write_v1 if args.v1 else save_roadbook)(args.output, vignettes)
+    print(f"{args.output} : {len(vignettes)} vignettes")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
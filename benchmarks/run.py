@@ -0,0 +1,353 @@
+"""Time the roadbook hot paths and compare them with a stored baseline."""
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime
+from benchmarks import SRC_DIR
+from benchmarks.generate import generate_vignettes, write_v1
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+DEFAULT_THRESHOLD = 0.25  # +25 % sur la médiane = régression
+
+CASES = OrderedDict()
+
+
+def case(name, max_repeat=None):
+    """Register a benchmark; the decorated function returns the callable to time"""
+    def register(setup):
+        CASES[name] = (setup, max_repeat)
+        return setup
+    return register
+
+
+class Context:
+    """Shared fixtures: generated roadbooks, Qt application and main window"""
+
+    def __init__(self, params):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication(['benchmarks'])
+        self.params = params
+        self.tmp = tempfile.mkdtemp(prefix='roadbook_bench_')
+        self.vignettes = generate_vignettes(**params)
+        self.v1_path = os.path.join(self.tmp, 'bench_v1.rbk')
+        self.v2_path = os.path.join(self.tmp, 'bench_v2.rbk')
+        write_v1(self.v1_path, self.vignettes)
+        from roadbook_io import save_roadbook
+        save_roadbook(self.v2_path, [copy.copy(v) for v in self.vignettes])
+        self._window = None
+
+    @property
+    def window(self):
+        if self._window is None:
+            from main import RoadBookApp
+            from edit_journal import EditJournal
+            self._window = RoadBookApp()
+            # Le journal de l'application ne doit pas être touché par les mesures
+            self._window.journal = EditJournal(os.path.join(self.tmp, 'session.journal'))
+            self._window.resize(1200, 800)
+            self._window.show()
+        return self._window
+
+    def fresh_vignettes(self):
+        """Copies whose payloads are only in memory, as after editing"""
+        return [copy.copy(v) for v in self.vignettes]
+
+    def close(self):
+        if self._window is not None:
+            self._window.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+# -- Cas mesurés -------------------------------------------------------------
+
+@case('open_v1')
+def bench_open_v1(ctx):
+    from roadbook_io import load_roadbook
+    return lambda: load_roadbook(ctx.v1_path)
+
+
+@case('open_v2')
+def bench_open_v2(ctx):
+    from roadbook_io import load_roadbook
+    return lambda: load_roadbook(ctx.v2_path)
+
+
+@case('save_to_file')
+def bench_save(ctx):
+    window = ctx.window
+    path = os.path.join(ctx.tmp, 'saved.rbk')
+
+    def run():
+        # Schémas uniquement en mémoire à chaque passe : tout est réencodé
+        window.vignettes = ctx.fresh_vignettes()
+        window._saveToFile(path)
+    return run
+
+
+@case('update_table')
+def bench_update_table(ctx):
+    from roadbook_io import load_roadbook
+    from thumbnail_cache import thumbnail_cache
+    window = ctx.window
+    window.vignettes = load_roadbook(ctx.v2_path)
+    thumbnail_cache.clear()
+
+    def run():
+        window.updateTable()
+        # Jusqu'à l'affichage des aperçus de la zone visible
+        ctx.app.processEvents()
+        while window.diagram_delegate.renderer._pending:
+            ctx.app.processEvents()
+            time.sleep(0.001)
+    return run
+
+
+def _pdf_export(ctx, use_svglib):
+    import pdf_exporter
+    from diagram_cache import DiagramCache
+    # Sans éléments d'édition, l'export passe par le SVG
+    svg_only = ctx.fresh_vignettes()
+    for v in svg_only:
+        v.drawing_elements = []
+
+    def run():
+        previous = pdf_exporter.SVGLIB_AVAILABLE
+        pdf_exporter.SVGLIB_AVAILABLE = use_svglib
+        try:
+            # Cache vide : on mesure la conversion, pas sa réutilisation
+            pdf_exporter.PDFExporter(svg_only, cache=DiagramCache()).export('bench.pdf', ctx.tmp)
+        finally:
+            pdf_exporter.SVGLIB_AVAILABLE = previous
+    return run
+
+
+@case('pdf_export_elements', max_repeat=1)
+def bench_pdf_elements(ctx):
+    import pdf_exporter
+    from diagram_cache import DiagramCache
+    return lambda: pdf_exporter.PDFExporter(ctx.vignettes, cache=DiagramCache()).export('bench.pdf', ctx.tmp)
+
+
+@case('pdf_export_canvas', max_repeat=1)
+def bench_pdf_canvas(ctx):
+    import pdf_exporter
+    from diagram_cache import DiagramCache
+    return lambda: pdf_exporter.PDFExporter(ctx.vignettes, cache=DiagramCache(), page_cache=None).export(
+        'bench.pdf', ctx.tmp, backend='canvas')
+
+
+@case('pdf_export_incremental')
+def bench_pdf_incremental(ctx):
+    import pdf_exporter
+    from diagram_cache import DiagramCache
+    # Relecture : une observation corrigée sur la dernière page entre deux exports
+    vignettes = ctx.fresh_vignettes()
+    cache, page_cache = DiagramCache(), DiagramCache()
+    pdf_exporter.PDFExporter(vignettes, cache=cache, page_cache=page_cache).export(
+        'bench.pdf', ctx.tmp, backend='canvas')
+    last = vignettes[-1]
+    original = last.observations
+
+    def run():
+        last.observations = original if last.observations != original else (original or '') + ' (corrigé)'
+        pdf_exporter.PDFExporter(vignettes, cache=cache, page_cache=page_cache).export(
+            'bench.pdf', ctx.tmp, backend='canvas')
+    return run
+
+
+@case('pdf_export_cached')
+def bench_pdf_cached(ctx):
+    import pdf_exporter
+    from diagram_cache import DiagramCache
+    # Réexport sans modification : tous les schémas viennent du cache
+    cache = DiagramCache()
+    pdf_exporter.PDFExporter(ctx.vignettes, cache=cache).export('bench.pdf', ctx.tmp)
+    return lambda: pdf_exporter.PDFExporter(ctx.vignettes, cache=cache).export('bench.pdf', ctx.tmp)
+
+
+@case('pdf_export_svglib', max_repeat=1)
+def bench_pdf_svglib(ctx):
+    import pdf_exporter
+    if not pdf_exporter.SVGLIB_AVAILABLE:
+        return None  # svglib non installé
+    return _pdf_export(ctx, True)
+
+
+@case('pdf_export_qt', max_repeat=1)
+def bench_pdf_qt(ctx):
+    return _pdf_export(ctx, False)
+
+
+@case('jpeg_export', max_repeat=1)
+def bench_jpeg(ctx):
+    from raster_exporter import RasterExporter
+    return lambda: RasterExporter(ctx.vignettes).export('bench.jpg', ctx.tmp)
+
+
+@case('vignette_images', max_repeat=1)
+def bench_vignette_images(ctx):
+    from raster_exporter import RasterExporter
+    return lambda: RasterExporter(ctx.vignettes).export_vignettes('bench', ctx.tmp)
+
+
+@case('tile_export', max_repeat=1)
+def bench_tile_export(ctx):
+    from tile_exporter import TileExporter
+    folder = os.path.join(ctx.tmp, 'bench_tiles')
+
+    def run():
+        # Pyramide complète : aucune tuile d'un passage précédent
+        shutil.rmtree(folder, ignore_errors=True)
+        TileExporter(ctx.vignettes).export_tiles('bench', ctx.tmp)
+    return run
+
+
+@case('tile_export_unchanged')
+def bench_tile_unchanged(ctx):
+    from tile_exporter import TileExporter
+    # Réexport sans modification : toutes les tuiles sont conservées
+    TileExporter(ctx.vignettes).export_tiles('bench_same', ctx.tmp)
+    return lambda: TileExporter(ctx.vignettes).export_tiles('bench_same', ctx.tmp)
+
+
+@case('scene_to_svg')
+def bench_scene_to_svg(ctx):
+    from vignette_editor import VignetteEditor
+    editors = [VignetteEditor(copy.copy(v)) for v in ctx.vignettes if v.drawing_elements][:8]
+
+    def run():
+        for editor in editors:
+            editor.sceneToSVG()
+    return run
+
+
+# -- Exécution et comparaison ----------------------------------------------
+
+def run_benchmarks(params, names=None, repeat=5, log=print) -> dict:
+    ctx = Context(params)
+    results = OrderedDict()
+    try:
+        for name, (setup, max_repeat) in CASES.items():
+            if names and name not in names:
+                continue
+            func = setup(ctx)
+            if func is None:
+                log(f"{name:20s} ignoré")
+                results[name] = {'skipped': True}
+                continue
+            runs = []
+            for _ in range(min(repeat, max_repeat or repeat)):
+                start = time.perf_counter()
+                func()
+                runs.append(time.perf_counter() - start)
+            results[name] = {'median': statistics.median(runs), 'min': min(runs), 'runs': runs}
+            log(f"{name:20s} {results[name]['median'] * 1000:10.1f} ms")
+    finally:
+        ctx.close()
+    return {'meta': _environment(params), 'results': results}
+
+
+def _environment(params) -> dict:
+    from PyQt5.QtCore import QT_VERSION_STR
+    import reportlab
+    import pdf_exporter
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QT_VERSION_STR,
+        'reportlab': reportlab.Version,
+        'svglib': pdf_exporter.SVGLIB_AVAILABLE,
+        'params': params,
+    }
+
+
+def baseline_path(name: str) -> str:
+    if os.sep in name or name.endswith('.json'):
+        return name
+    return os.path.join(BASELINE_DIR, name + '.json')
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD, log=print) -> list:
+    """Return the names of the cases slower than the baseline beyond the threshold.
+
+    The baseline may override the threshold per case with a "thresholds" map.
+    """
+    if baseline.get('meta', {}).get('params') != current['meta']['params']:
+        log("Attention : paramètres différents de ceux de la référence")
+    thresholds = baseline.get('thresholds', {})
+    regressions = []
+    for name, result in current['results'].items():
+        ref = baseline.get('results', {}).get(name)
+        if not ref or ref.get('skipped') or result.get('skipped'):
+            continue
+        limit = thresholds.get(name, threshold)
+        ratio = result['median'] / ref['median'] if ref['median'] else float('inf')
+        status = 'RÉGRESSION' if ratio > 1 + limit else 'ok'
+        log(f"{name:20s} {ratio:6.2f}x  (seuil {1 + limit:.2f}x)  {status}")
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Mesures de performance")
+    parser.add_argument('--vignettes', type=int, default=48)
+    parser.add_argument('--elements', type=int, default=8, help="éléments par schéma")
+    parser.add_argument('--text-length', type=int, default=60)
+    parser.add_argument('--no-svg-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cases', help="cas à exécuter, séparés par des virgules (" + ', '.join(CASES) + ")")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--save-baseline', metavar='NOM', help="enregistrer les résultats comme référence")
+    parser.add_argument('--compare', metavar='NOM', help="comparer à une référence (nom ou chemin)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="ralentissement toléré (0.25 = +25 %%)")
+    args = parser.parse_args(argv)
+
+    params = {'count': args.vignettes, 'elements': args.elements, 'text_length': args.text_length,
+              'no_svg_ratio': args.no_svg_ratio, 'seed': args.seed}
+    names = set(args.cases.split(',')) if args.cases else None
+    report = run_benchmarks(params, names, args.repeat)
+
+    output = args.output or os.path.join(SRC_DIR, '..', 'output', 'benchmarks',
+                                         f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats : {os.path.normpath(output)}")
+
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        baseline = dict(report)
+        if os.path.exists(path):
+            # Conserver les seuils ajustés à la main
+            with open(path, encoding='utf-8') as f:
+                thresholds = json.load(f).get('thresholds')
+            if thresholds:
+                baseline['thresholds'] = thresholds
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Référence enregistrée : {path}")
+
+    if args.compare:
+        with open(baseline_path(args.compare), encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+from roadbook_io import prepare_save, commit_save, discard_save
+
+
+class AutoSaveWriter(QThread):
+    """Write a roadbook snapshot to disk on a background thread.
+
+    The snapshot is taken in the constructor, on the GUI thread: frozen copies
+    of the vignettes (Vignette.frozen) share diagrams and lazy handles.
+    run() only appends the changed vignettes to a v2 file (or writes a
+    temporary file for a full save); the GUI thread then calls commit() to
+    rename the file and rebind the live vignettes to the records written.
+    """
+
+    saved = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, filename, vignettes, full=False, meta=None):
+        super().__init__()
+        self.filename = filename
+        self.full = full
+        self.meta = meta
+        self.originals = list(vignettes)
+        self.snapshot = [v.frozen() for v in self.originals]
+        self.pending = None
+
+    def run(self):
+        try:
+            self.pending = prepare_save(self.filename, self.snapshot, incremental=not self.full,
+                                        meta=self.meta)
+        except Exception as e:
+            logging.error(f"Auto-save failed: {e}")
+            self.failed.emit(str(e))
+            return
+        finally:
+            # Relâcher l'instantané : commit_save n'a pas à garder ses enregistrements en mémoire
+            self.snapshot = None
+        self.saved.emit()
+
+    def commit(self):
+        """Apply the written data to the live vignettes (GUI thread)"""
+        commit_save(self.pending, self.originals)
+        logging.info(f"Auto-save completed: {self.filename} "
+                     f"({'incremental' if self.pending.incremental else 'full'}, {self.pending.size} bytes)")
+        return self.pending
+
+    def discard(self):
+        """Drop a result superseded by a manual save"""
+        if self.pending is not None:
+            discard_save(self.pending)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import reportlab
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # 32 Mo de schémas convertis en mémoire
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024  # 256 Mo par cache dans output/.cache
+# Après un dépassement, les plus anciennes entrées sont supprimées jusqu'à 80 % de la limite
+DISK_TRIM_RATIO = 0.8
+# À incrémenter quand la conversion change : les anciennes entrées sont ignorées
+CACHE_VERSION = 1
+
+_MISSING = object()
+
+
+def default_cache_dir(name: str = 'diagrams') -> str:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return os.path.join(base_dir, 'output', '.cache', name)
+
+
+class DiagramCache:
+    """Content-addressed cache of diagrams converted for the PDF export.
+
+    Entries are keyed by a hash of the diagram content (SVG or drawing
+    elements), the conversion used and the target box size. Values are
+    conversion payloads ('drawing', Drawing) / ('png', bytes, w, h) / None,
+    kept pickled so every lookup returns fresh objects. The in-memory part
+    is an LRU bounded by max_bytes; with a disk_dir, entries also survive
+    between sessions, up to max_disk_bytes (least recently used files are
+    deleted beyond). An entry that cannot be unpickled counts as a miss
+    and is dropped. The cache is thread-safe.
+
+    The same class keeps the page and form contents of the canvas PDF
+    backend (page_cache), keyed by their own fingerprints.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = None  # inconnu jusqu'au premier parcours du dossier
+        self._lock = threading.Lock()
+        self._trim_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, content, box_w: float, box_h: float) -> str:
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha1()
+        # Un Drawing picklé par une autre version de reportlab peut ne plus se relire
+        digest.update(f"{CACHE_VERSION}|{reportlab.Version}|{kind}|{box_w:.2f}x{box_h:.2f}|".encode('utf-8'))
+        digest.update(content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def lookup(self, key: str) -> Tuple[bool, object]:
+        """Return (found, payload); a stored None means "nothing to draw" """
+        with self._lock:
+            data = self._entries.get(key, _MISSING)
+            if data is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if data is _MISSING:
+            data = self._read_disk(key)
+            if data is None:
+                with self._lock:
+                    self.misses += 1
+                return False, None
+            self._remember(key, data)
+            with self._lock:
+                self.disk_hits += 1
+        try:
+            return True, pickle.loads(data)
+        except Exception as e:
+            # Entrée corrompue ou illisible : reconvertir plutôt qu'échouer
+            logging.warning(f"Dropping unreadable cache entry {key}: {e}")
+            self._forget(key)
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+    def contains(self, key: str) -> bool:
+        """Whether key is cached, in memory or on disk, without loading it or counting a lookup"""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.disk_dir) and os.path.exists(self._disk_path(key))
+
+    def put(self, key: str, payload):
+        try:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logging.debug(f"Diagram not cacheable: {e}")
+            return
+        self._remember(key, data)
+        self._write_disk(key, data)
+
+    def get_or_convert(self, key: str, convert):
+        found, payload = self.lookup(key)
+        if not found:
+            payload = convert()
+            self.put(key, payload)
+        return payload
+
+    def _remember(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _forget(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + '.pickle')
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Date d'accès pour l'éviction des moins récemment utilisées
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key: str, data: bytes):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.debug(f"Diagram cache write failed: {e}")
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """Measure the disk tier and delete its least recently used files beyond the limit"""
+        if not self._trim_lock.acquire(blocking=False):
+            return  # Déjà en cours dans un autre thread
+        try:
+            files = []
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if total > self.max_disk_bytes:
+                target = self.max_disk_bytes * DISK_TRIM_RATIO
+                files.sort()
+                removed = 0
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+                logging.info(f"Cache {self.disk_dir}: {removed} old entries removed")
+            with self._lock:
+                self._disk_bytes = total
+        finally:
+            self._trim_lock.release()
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.disk_dir and os.path.isdir(self.disk_dir):
+            import shutil
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+# Caches partagés par les exports, persistants dans output/.cache
+diagram_cache = DiagramCache(disk_dir=default_cache_dir())
+page_cache = DiagramCache(disk_dir=default_cache_dir('pages'))
@@ -0,0 +1,110 @@
+"""Build ReportLab drawings straight from the editor's drawing_elements.
+
+The editor stores every diagram twice: as SVG and as drawing_elements (the
+data used for re-editing). Converting the elements directly avoids writing
+and re-parsing SVG at export time and does not need svglib.
+"""
+import logging
+from typing import List, Optional
+from reportlab.graphics.shapes import Drawing, Ellipse, Group, Path, String
+from reportlab.lib import colors
+
+# Scène de VignetteEditor (SCENE_WIDTH × SCENE_HEIGHT), en pixels
+SCENE_WIDTH = 750
+SCENE_HEIGHT = 400
+
+# Motifs de Qt.PenStyle, en multiples de l'épaisseur du trait
+DASH_PATTERNS = {
+    2: [4, 2],              # Qt.DashLine
+    3: [1, 2],              # Qt.DotLine
+    4: [4, 2, 1, 2],        # Qt.DashDotLine
+    5: [4, 2, 1, 2, 1, 2],  # Qt.DashDotDotLine
+}
+LINE_CAP_SQUARE = 2   # Qt.SquareCap, valeur par défaut de QPen
+LINE_JOIN_BEVEL = 2   # Qt.BevelJoin, valeur par défaut de QPen
+# Le texte est placé avec les métriques écran de Qt (points -> pixels à 96 dpi)
+# mais QSvgGenerator écrit la taille en points : on reproduit ce rendu
+TEXT_MARGIN = 4       # Marge du document d'un QGraphicsTextItem
+PT_TO_PX = 96 / 72
+ASCENT = 0.905        # Hauteur au-dessus de la ligne de base (Arial), en em
+LINE_SPACING = 1.15
+
+FONTS = {
+    'times': ('Times-Roman', 'Times-Bold'),
+    'courier': ('Courier', 'Courier-Bold'),
+}
+DEFAULT_FONTS = ('Helvetica', 'Helvetica-Bold')
+
+
+def _pen(shape, element):
+    width = max(1, element.get('pen_width', 1))  # Épaisseur 0 = trait cosmétique d'1 pixel
+    shape.strokeColor = colors.HexColor(element.get('pen_color', '#000000'))
+    shape.strokeWidth = width
+    shape.strokeLineCap = LINE_CAP_SQUARE
+    shape.strokeLineJoin = LINE_JOIN_BEVEL
+    shape.fillColor = None
+    pattern = DASH_PATTERNS.get(element.get('pen_style'))
+    if pattern:
+        shape.strokeDashArray = [d * width for d in pattern]
+
+
+def _path(element, height):
+    ox, oy = element.get('pos', (0, 0))
+    path = Path()
+    for point in element['path_points']:
+        x, y = point['x'] + ox, height - (point['y'] + oy)
+        if point['type'] == 0:
+            path.moveTo(x, y)
+        elif point['type'] == 1:
+            path.lineTo(x, y)
+    _pen(path, element)
+    return path
+
+
+def _ellipse(element, height):
+    ox, oy = element.get('pos', (0, 0))
+    x, y, w, h = element['rect']
+    ellipse = Ellipse(x + ox + w / 2, height - (y + oy + h / 2), w / 2, h / 2)
+    _pen(ellipse, element)
+    return ellipse
+
+
+def _text(element, height):
+    family = (element.get('font_family') or '').lower()
+    regular, bold = next((fonts for key, fonts in FONTS.items() if key in family), DEFAULT_FONTS)
+    font = bold if element.get('font_bold') else regular
+    size = element.get('font_size', 12)
+    screen_size = size * PT_TO_PX
+    color = colors.HexColor(element.get('color', '#000000'))
+    x, y = element.get('pos', (0, 0))
+    x += TEXT_MARGIN
+    baseline = y + TEXT_MARGIN + ASCENT * screen_size
+
+    group = Group()
+    for i, line in enumerate(element.get('text', '').split('\n')):
+        group.add(String(x, height - (baseline + i * screen_size * LINE_SPACING), line,
+                         fontName=font, fontSize=size, fillColor=color))
+    return group
+
+
+_BUILDERS = {'path': _path, 'ellipse': _ellipse, 'text': _text}
+
+
+def elements_to_drawing(elements: List[dict], width: float = SCENE_WIDTH,
+                        height: float = SCENE_HEIGHT) -> Optional[Drawing]:
+    """Drawing covering the editor scene, or None when nothing can be drawn.
+
+    Scene coordinates (origin top-left, y down) are flipped to PDF
+    coordinates. Elements are stored topmost first, so they are added in
+    reverse order to keep the stacking of the editor.
+    """
+    drawing = Drawing(width, height)
+    for element in reversed(elements or []):
+        builder = _BUILDERS.get(element.get('type'))
+        if builder is None:
+            continue
+        try:
+            drawing.add(builder(element, height))
+        except (KeyError, TypeError, ValueError) as e:
+            logging.debug(f"Skipping invalid drawing element: {e}")
+    return drawing if drawing.contents else None
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import time
+import uuid
+from typing import List, Optional, Tuple
+from PyQt5.QtCore import QLockFile
+from vignette_model import Vignette
+from roadbook_io import load_roadbook, read_meta
+
+SYNC_INTERVAL = 1.0  # Délai maximal entre deux fsync (secondes)
+JOURNAL_SUFFIX = '.journal'
+
+
+def recovery_dir() -> str:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return os.path.join(base_dir, 'recovery')
+
+
+def default_journal_path(session: str) -> str:
+    """One journal per session, so that running instances never share one"""
+    return os.path.join(recovery_dir(), f"session_{session}{JOURNAL_SUFFIX}")
+
+
+def orphan_journals(directory: Optional[str] = None, exclude=()) -> List['EditJournal']:
+    """Journals left by sessions that are no longer running, most recent first.
+
+    Each journal is returned locked, so that another instance starting at the
+    same time cannot offer it too; discard() or recover() it, or release() it
+    to leave it for a later start.
+    """
+    directory = directory or recovery_dir()
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(JOURNAL_SUFFIX)]
+    except OSError:
+        return []
+    excluded = {os.path.abspath(p) for p in exclude}
+    paths = [os.path.join(directory, n) for n in names]
+    paths = [p for p in paths if os.path.abspath(p) not in excluded]
+    paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0, reverse=True)
+    orphans = []
+    for path in paths:
+        journal = EditJournal(path)
+        # Verrou libre : la session propriétaire s'est terminée (ou a planté)
+        if journal.acquire():
+            orphans.append(journal)
+    return orphans
+
+
+class EditJournal:
+    """Write-ahead log of the edits made since the last save.
+
+    The journal is a JSON-lines file. The first line names the snapshot the
+    edits apply to (the last saved file and the change counter it contains);
+    each following line is one operation tagged with its sequence number.
+    Lines are written immediately and fsync'ed at most every SYNC_INTERVAL
+    seconds, or when sync() is called. A journal still holding operations at
+    startup means its session did not shut down cleanly.
+
+    The session owning a journal holds a lock file next to it (path + .lock,
+    with its pid); the lock of a crashed session is stale, which is how
+    orphan_journals tells a journal to recover from one in use.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.session = uuid.uuid4().hex
+        self.path = path or default_journal_path(self.session)
+        self._file = None
+        self._last_sync = 0.0
+        self._unsynced = False
+        self._ops = []  # Opérations non encore couvertes par une sauvegarde
+        self._lock = None
+
+    def acquire(self) -> bool:
+        """Lock the journal for this process; False when a running session owns it"""
+        if self._lock is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            lock = QLockFile(self.path + '.lock')
+            # Périmé seulement si le processus propriétaire n'existe plus, quel que soit son âge
+            lock.setStaleLockTime(0)
+            if not lock.tryLock(0):
+                return False
+            self._lock = lock
+        return True
+
+    def release(self):
+        """Close the journal and unlock it, leaving the file on disk"""
+        self.close()
+        if self._lock is not None:
+            self._lock.unlock()
+            self._lock = None
+
+    # -- Écriture ----------------------------------------------------------
+
+    def reset(self, filename: Optional[str], seq: int = 0):
+        """Start a new journal on top of the given snapshot"""
+        self._ops = []
+        self.rebase(filename, seq)
+
+    def rebase(self, filename: Optional[str], seq: int):
+        """Drop the operations covered by a save of filename at change seq"""
+        self._ops = [op for op in self._ops if op['seq'] > seq]
+        self.close()
+        if not self.acquire():
+            raise OSError(f"Journal utilisé par une autre session : {self.path}")
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self._encode({'op': 'base', 'file': filename, 'seq': seq, 'session': self.session}))
+            for op in self._ops:
+                f.write(self._encode(op))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._unsynced = False
+
+    def save_meta(self, seq: int) -> dict:
+        """Manifest metadata telling recovery which edits a save contains"""
+        return {'session': self.session, 'seq': seq}
+
+    def append(self, op: str, seq: int, **data):
+        if self._file is None:
+            self.reset(None)
+        entry = dict(data, op=op, seq=seq)
+        self._ops.append(entry)
+        self._file.write(self._encode(entry))
+        # Écrit tout de suite (survit à un plantage du programme),
+        # fsync groupé (survit à une coupure de courant)
+        self._file.flush()
+        self._unsynced = True
+        if time.monotonic() - self._last_sync >= SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Remove the journal (clean shutdown)"""
+        self.close()
+        self._ops = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.release()
+
+    @staticmethod
+    def _encode(entry) -> str:
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    # -- Reprise -----------------------------------------------------------
+
+    def read(self) -> Tuple[Optional[dict], List[dict]]:
+        """Return the base line and the operations of an existing journal"""
+        if not os.path.exists(self.path):
+            return None, []
+        base, ops = None, []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Dernière ligne incomplète : écrite pendant le plantage
+                    logging.warning(f"Ignoring truncated journal entry in {self.path}")
+                    break
+                if entry.get('op') == 'base':
+                    base = entry
+                else:
+                    ops.append(entry)
+        return base, ops
+
+    @property
+    def filename(self) -> Optional[str]:
+        """Roadbook the journaled edits apply to (None for a new one)"""
+        return (self.read()[0] or {}).get('file')
+
+    def _pending(self) -> Tuple[dict, int, List[dict]]:
+        """Base line, sequence number already saved and operations after it"""
+        base, ops = self.read()
+        base = base or {}
+        filename = base.get('file')
+        base_seq = base.get('seq', 0)
+        if filename and os.path.exists(filename):
+            # Sauvegarde terminée juste avant le plantage, journal pas encore mis à jour
+            try:
+                meta = read_meta(filename)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Cannot read save metadata of {filename}: {e}")
+                meta = {}
+            if base.get('session') and meta.get('session') == base.get('session'):
+                base_seq = max(base_seq, meta.get('seq', 0))
+        return base, base_seq, [op for op in ops if op['seq'] > base_seq]
+
+    def has_pending(self) -> bool:
+        """True when a previous session left edits that were never saved"""
+        return bool(self._pending()[2])
+
+    def recover(self) -> Tuple[Optional[str], List[Vignette], int]:
+        """Replay the journal on top of its snapshot.
+
+        Returns (filename, vignettes, last sequence number). The journal is
+        kept open so that new edits are appended after the replayed ones.
+        """
+        base, base_seq, ops = self._pending()
+        filename = base.get('file')
+        self.session = base.get('session') or self.session
+        vignettes = []
+        if filename and os.path.exists(filename):
+            vignettes = load_roadbook(filename)
+        for op in ops:
+            apply_operation(vignettes, op)
+        seq = ops[-1]['seq'] if ops else base_seq
+        self._ops = ops
+        self.rebase(filename, base_seq)
+        logging.info(f"Recovered {len(ops)} edits from {self.path}")
+        return filename, vignettes, seq
+
+
+def apply_operation(vignettes: List[Vignette], op: dict):
+    """Apply one journal operation, mirroring the edit made in the interface"""
+    kind = op['op']
+    if kind == 'add':
+        vignettes.append(Vignette(num=len(vignettes) + 1))
+    elif kind == 'set':
+        setattr(vignettes[op['row']], op['field'], op['value'])
+    elif kind == 'diagram':
+        vignettes[op['row']].set_diagram(op['diagram'], op['elements'])
+    elif kind == 'delete':
+        for row in sorted(op['rows'], reverse=True):
+            del vignettes[row]
+        for i, v in enumerate(vignettes, 1):
+            v.num = i
+    else:
+        raise ValueError(f"Opération de journal inconnue : {kind}")
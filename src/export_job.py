@@ -0,0 +1,74 @@
+import logging
+import threading
+import traceback
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Libellés des étapes signalées par PDFExporter.progress
+STAGE_LABELS = {
+    'diagrams': "Conversion des schémas",
+    'vignettes': "Mise en page des vignettes",
+    'pages': "Écriture des pages",
+}
+
+# Moteurs PDF proposés dans l'interface (voir pdf_exporter.BACKENDS). Le dessin
+# direct, au rendu identique, est le seul à réutiliser les pages inchangées
+# d'un export à l'autre : c'est le choix par défaut pour les relectures
+BACKEND_LABELS = {
+    'canvas': "PDF rapide",
+    'platypus': "PDF par tableaux",
+}
+DEFAULT_GUI_BACKEND = 'canvas'
+
+
+class ExportJob(QThread):
+    """Export a roadbook snapshot to PDF on a background thread.
+
+    The job exports a RoadbookSnapshot (VignetteTableModel.snapshot), taken
+    on the GUI thread, so the roadbook can be edited while it runs. Progress
+    is emitted per converted diagram, laid-out vignette and finished page.
+    cancel() is cooperative: the exporter stops at its next progress report
+    and removes its temporary file, leaving no partial PDF behind.
+    """
+
+    progress = pyqtSignal(str, int, int)
+    exported = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, snapshot, filename=None, output_dir=None, backend=None):
+        super().__init__()
+        self.snapshot = snapshot
+        self.filename = filename
+        self.output_dir = output_dir
+        self.backend = backend
+        self.error_trace = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(self):
+        # reportlab (et svglib) ne sont chargés qu'au premier export
+        from pdf_exporter import PDFExporter, ExportCancelled
+        try:
+            exporter = PDFExporter(self.snapshot.vignettes, self.snapshot.cumul_dists,
+                                   progress=self._on_progress)
+            filename = exporter.export(self.filename, self.output_dir, self.backend)
+        except ExportCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.error_trace = traceback.format_exc()
+            logging.error(f"PDF export failed: {e}")
+            self.failed.emit(str(e))
+            return
+        self.exported.emit(filename)
+
+    def _on_progress(self, stage: str, done: int, total: int):
+        if self._cancel.is_set():
+            from pdf_exporter import ExportCancelled
+            raise ExportCancelled()
+        self.progress.emit(stage, done, total)
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 import sys
 import os
-import traceback
 import logging
+import startup_profile
+startup_profile.install()  # Avant les autres imports, pour les mesurer
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-                           QHeaderView, QMessageBox, QSizePolicy, QDialog, QLabel)
-from PyQt5.QtCore import Qt, QPointF, QByteArray, QRectF, QTimer
-from PyQt5.QtGui import QPixmap, QImage, QPainter
-from PyQt5.QtSvg import QSvgWidget, QSvgRenderer
-from vignette_editor import VignetteEditor
+                           QHBoxLayout, QPushButton, QTableView,
+                           QHeaderView, QMessageBox, QDialog, QAbstractItemView,
+                           QProgressDialog, QComboBox)
+from PyQt5.QtCore import Qt, QTimer
 from vignette_model import Vignette
-from pdf_exporter import PDFExporter, PDFExportError
-from widgets import DistanceTableItem
+from vignette_table_model import VignetteTableModel, DiagramRole, DiagramHashRole
+from widgets import DiagramDelegate
+from roadbook_io import load_roadbook, save_roadbook
+from autosave import AutoSaveWriter
+from export_job import ExportJob, STAGE_LABELS, BACKEND_LABELS, DEFAULT_GUI_BACKEND
+from edit_journal import EditJournal, SYNC_INTERVAL, orphan_journals
+
+# Délai entre le premier affichage et la vérification des mises à jour
+UPDATE_CHECK_DELAY_MS = 2000
 
 class RoadBookApp(QMainWindow):
     def __init__(self):
@@ -20,9 +26,24 @@ class RoadBookApp(QMainWindow):
         self.vignettes = []
         self.current_filename = None
         self.has_unsaved_changes = False
-        self.initUI()
-        self._setupAutoSave()
-        self._checkForUpdates()
+        self._change_count = 0
+        self.auto_save_writer = None
+        self.export_job = None
+        self.journal = EditJournal()
+        self._first_paint_done = False
+        with startup_profile.phase('initUI'):
+            self.initUI()
+        with startup_profile.phase('setupAutoSave'):
+            self._setupAutoSave()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_profile.mark('first paint')
+            # Rien de ce qui suit n'est nécessaire pour afficher la fenêtre
+            QTimer.singleShot(0, startup_profile.report)
+            QTimer.singleShot(UPDATE_CHECK_DELAY_MS, self._checkForUpdates)
 
     def initUI(self):
         self.setWindowTitle('📍 Éditeur de Road Book')
@@ -46,7 +67,7 @@ class RoadBookApp(QMainWindow):
             QPushButton:pressed {
                 background-color: #3d8b40;
             }
-            QTableWidget {
+            QTableView {
                 gridline-color: #ddd;
                 background-color: white;
                 border: 1px solid #ccc;
@@ -82,6 +103,13 @@ class RoadBookApp(QMainWindow):
         btn_save = QPushButton('💾 Sauvegarder', self)
         btn_open = QPushButton('📂 Ouvrir', self)
         btn_infos = QPushButton('ℹ️ Infos', self)
+        # Moteur de l'export PDF
+        self.pdf_backend_combo = QComboBox(self)
+        for backend, label in BACKEND_LABELS.items():
+            self.pdf_backend_combo.addItem(label, backend)
+        self.pdf_backend_combo.setCurrentIndex(self.pdf_backend_combo.findData(DEFAULT_GUI_BACKEND))
+        self.pdf_backend_combo.setToolTip("PDF rapide : dessin direct des pages, seules les pages modifiées "
+                                          "sont redessinées d'un export à l'autre")
         
         btn_export.setStyleSheet("""
             QPushButton {
@@ -126,6 +154,7 @@ class RoadBookApp(QMainWindow):
         toolbar.addWidget(btn_delete)
 
         toolbar.addWidget(btn_export)
+        toolbar.addWidget(self.pdf_backend_combo)
         toolbar.addWidget(btn_save)
         toolbar.addWidget(btn_open)
         toolbar.addWidget(btn_infos)
@@ -134,11 +163,19 @@ class RoadBookApp(QMainWindow):
         layout.addLayout(toolbar)
 
         # Create table with single column layout
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)  # Une seule colonne de 5 champs
-        self.table.setHorizontalHeaderLabels([
-            '📍 #', '📏 Dist. Tot. (m)', '📐 Dist. Int. (m)', '🗺️ Schéma', '📝 Observations'
-        ])
+        self.model = VignetteTableModel(self.vignettes, self)
+        self.model.edited.connect(self.onVignetteEdited)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectItems)
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed
+                                   | QAbstractItemView.AnyKeyPressed)
+        # Le schéma est dessiné à la demande, uniquement pour les lignes visibles
+        self.diagram_delegate = DiagramDelegate(DiagramRole, DiagramHashRole, self.table,
+                                                VignetteTableModel.COL_DIAGRAM)
+        self.table.setItemDelegateForColumn(VignetteTableModel.COL_DIAGRAM, self.diagram_delegate)
+        self.table.verticalScrollBar().valueChanged.connect(self.diagram_delegate.viewportChanged)
+        self.model.modelReset.connect(self.diagram_delegate.reset)
         
         # Set column widths - Optimiser pour les schémas
         header = self.table.horizontalHeader()
@@ -158,179 +195,51 @@ class RoadBookApp(QMainWindow):
         # Permettre le redimensionnement vertical des lignes
         self.table.verticalHeader().setSectionResizeMode(QHeaderView.Interactive)
         
-        self.table.cellDoubleClicked.connect(self.onCellDoubleClicked)
-        self.table.itemChanged.connect(self.onItemChanged)
+        self.table.doubleClicked.connect(self.onCellDoubleClicked)
         layout.addWidget(self.table)
 
     def addVignette(self):
         num = len(self.vignettes) + 1
         vignette = Vignette(num=num)
-        self.vignettes.append(vignette)
-        self._renumberVignettes()
-        self._markAsModified()
-        self.updateTable()
+        self.model.appendVignette(vignette)
+        self._recordEdit('add')
 
     def updateTable(self):
-        # Désactiver temporairement les signaux pour éviter la récursion
-        self.table.blockSignals(True)
-        
-        try:
-            # Une vignette par ligne
-            self.table.setRowCount(len(self.vignettes))
-
-            # Fill table
-            cumul_dist = 0
-            for i, vignette in enumerate(self.vignettes):
-                row = i  # Une vignette par ligne
-                # Numéro
-                self.table.setItem(row, 0, QTableWidgetItem(str(vignette.num)))
-                
-                # Distance cumulée
-                cumul_dist += vignette.inter_dist
-                self.table.setItem(row, 1, QTableWidgetItem(f"{int(cumul_dist)} m"))
-                
-                # Distance intermédiaire
-                dist_item = DistanceTableItem(vignette.inter_dist)
-                self.table.setItem(row, 2, dist_item)
-                
-                # Schéma
-                diagram_item = QTableWidgetItem("")  # Item vide
-                diagram_item.setFlags(diagram_item.flags() & ~Qt.ItemIsEditable)
-                self.table.setItem(row, 3, diagram_item)
-                
-                if vignette.diagram:
-                    logging.info(f"Displaying diagram for vignette {vignette.num}, SVG length: {len(vignette.diagram)}")
-                    self.table.removeCellWidget(row, 3)
-                    try:
-                        container = self._create_svg_widget(vignette.diagram)
-                        self.table.setCellWidget(row, 3, container)
-                        self.table.setRowHeight(row, max(150, self.table.rowHeight(row)))
-                        self.table.viewport().update(self.table.visualRect(self.table.model().index(row, 3)))
-                    except Exception as e:
-                        logging.error(f"SVG display failed: {e}", exc_info=True)
-                        self.table.setItem(row, 3, QTableWidgetItem('[Erreur schéma]'))
-                else:
-                    logging.info(f"No diagram for vignette {vignette.num}")
-                
-                # Observations
-                self.table.setItem(row, 4, QTableWidgetItem(vignette.observations))
-            # Forcer le rafraîchissement de l'affichage
-            self.table.viewport().update()
-        finally:
-            # Reactivate signals
-            self.table.blockSignals(False)
-    
-    def _create_svg_widget(self, svg_data):
-        """Create SVG widget for table cell"""
-        class SVGWidget(QWidget):
-            def __init__(self, svg_data):
-                super().__init__()
-                self.renderer = QSvgRenderer(QByteArray(svg_data.encode('utf-8')))
-                layout = QVBoxLayout(self)
-                layout.setContentsMargins(0, 0, 0, 0)
-                layout.setAlignment(Qt.AlignCenter)
-                self.label = QLabel()
-                self.label.setAlignment(Qt.AlignCenter)
-                self.label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                self.label.setContentsMargins(0, 0, 0, 0)
-                layout.addWidget(self.label)
-                self.setMinimumHeight(1)
-                self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                self._render()
-            
-            def resizeEvent(self, event):
-                super().resizeEvent(event)
-                self._render()
-            
-            def _render(self):
-                if not self.renderer.isValid():
-                    self.label.setText('SVG invalide')
-                    logging.warning("Invalid SVG renderer")
-                    return
-                cr = self.contentsRect()
-                aw = max(50, cr.width())  # Taille minimale
-                ah = max(50, cr.height())
-                
-                # Cache image based on size
-                current_size = (aw, ah)
-                if hasattr(self, '_last_size') and self._last_size == current_size and hasattr(self, '_cached_pixmap'):
-                    self.label.setPixmap(self._cached_pixmap)
-                    return
-                
-                img = QImage(aw, ah, QImage.Format_ARGB32)
-                img.fill(0xFFFFFFFF)  # Fond blanc au lieu de transparent
-                painter = QPainter(img)
-                try:
-                    painter.setRenderHint(QPainter.Antialiasing)
-                    self.renderer.render(painter, QRectF(0, 0, aw, ah))
-                finally:
-                    painter.end()
-                
-                self._cached_pixmap = QPixmap.fromImage(img)
-                self._last_size = current_size
-                self.label.setPixmap(self._cached_pixmap)
-                logging.info(f"SVG rendered to {aw}x{ah} pixels")
-        
-        return SVGWidget(svg_data)
+        """Reload the whole table from self.vignettes (after opening a file)"""
+        self.model.setVignettes(self.vignettes)
 
-    def onCellDoubleClicked(self, row, column):
+    def onCellDoubleClicked(self, index):
         # L'index de la vignette correspond directement à la ligne
-        vignette_index = row
+        vignette_index = index.row()
         
         if vignette_index >= len(self.vignettes):
             return
             
-        if column == 3:  # Colonne Schéma (0-based: #=0, Dist.Tot=1, Dist.Int=2, Schéma=3, Obs=4)
+        if index.column() == VignetteTableModel.COL_DIAGRAM:
+            from vignette_editor import VignetteEditor
             editor = VignetteEditor(self.vignettes[vignette_index], self)
             result = editor.exec_()
             if result == QDialog.Accepted:
                 # Le SVG est déjà sauvegardé dans la vignette par l'éditeur
-                self._markAsModified()
-                # Forcer le rafraîchissement de l'affichage
-                self.updateTable()
+                vignette = self.vignettes[vignette_index]
+                self._recordEdit('diagram', row=vignette_index, diagram=vignette.diagram,
+                                 elements=vignette.drawing_elements)
+                # Seule la cellule du schéma est à redessiner
+                self.model.diagramChanged(vignette_index)
 
-    def onItemChanged(self, item):
-        # Si les signaux sont bloqués, ne rien faire
-        if self.table.signalsBlocked():
-            return
-            
-        row = item.row()
-        col = item.column()
-        
-        # L'index de la vignette correspond directement à la ligne
-        vignette_index = row
-        
-        if vignette_index >= len(self.vignettes):
-            return
-            
-        if isinstance(item, DistanceTableItem) and col == 2:  # Distance intermédiaire column (0-based)
-            self.vignettes[vignette_index].inter_dist = item.distance()
-            self._markAsModified()
-            self.updateTable()
-        elif col == 4:  # Observations column (0-based)
-            self.vignettes[vignette_index].observations = item.text()
-            self._markAsModified()
-            # Pas besoin de updateTable() ici car cela effacerait le texte en cours d'édition
+    def onVignetteEdited(self, row, column):
+        # Le modèle a déjà mis à jour la vignette et notifié la vue
+        field = 'inter_dist' if column == VignetteTableModel.COL_INTER else 'observations'
+        self._recordEdit('set', row=row, field=field, value=getattr(self.vignettes[row], field))
 
     def deleteSelected(self):
-        selected_items = self.table.selectedItems()
-        vignette_indices = set()
-        
-        for item in selected_items:
-            row = item.row()
-            vignette_indices.add(row)
+        vignette_indices = {index.row() for index in self.table.selectionModel().selectedIndexes()}
         
         if not vignette_indices:
             return
             
-        # Remove vignettes in reverse order to maintain correct indices
-        for index in sorted(vignette_indices, reverse=True):
-            if index < len(self.vignettes):
-                del self.vignettes[index]
-        
-        self._renumberVignettes()
-        self._markAsModified()
-        self.updateTable()
+        self.model.removeVignettes(vignette_indices)
+        self._recordEdit('delete', rows=sorted(vignette_indices))
 
     def _renumberVignettes(self):
         """Automatically renumber all vignettes sequentially"""
@@ -342,38 +251,133 @@ class RoadBookApp(QMainWindow):
         self.auto_save_timer = QTimer()
         self.auto_save_timer.timeout.connect(self._autoSave)
         self.auto_save_timer.start(300000)  # 5 minutes = 300000 ms
+        # Les éditions sont journalisées entre deux sauvegardes
+        self.journal_sync_timer = QTimer()
+        self.journal_sync_timer.timeout.connect(lambda: self.journal.sync())
+        self.journal_sync_timer.start(int(SYNC_INTERVAL * 1000))
     
-    def _autoSave(self):
-        """Perform automatic save if there are unsaved changes"""
+    def _autoSave(self, full=False):
+        """Start a background save of the changes, if any"""
+        if self.auto_save_writer is not None:
+            return  # Une sauvegarde est déjà en cours
         if self.has_unsaved_changes and self.current_filename and self.vignettes:
-            try:
-                self._saveToFile(self.current_filename)
-                logging.info(f"Auto-save completed: {self.current_filename}")
-            except Exception as e:
-                logging.error(f"Auto-save failed: {e}")
-    
+            writer = AutoSaveWriter(self.current_filename, self.vignettes, full,
+                                    self.journal.save_meta(self._change_count))
+            writer.change_count = self._change_count
+            writer.saved.connect(lambda: self._onAutoSaved(writer))
+            writer.failed.connect(lambda _: self._onAutoSaveFinished(writer))
+            self.auto_save_writer = writer
+            writer.start()
+
+    def _onAutoSaved(self, writer):
+        if writer is not self.auto_save_writer:
+            # Résultat périmé : une sauvegarde manuelle a eu lieu entre-temps
+            writer.discard()
+            return
+        try:
+            pending = writer.commit()
+        except Exception as e:
+            logging.error(f"Auto-save failed: {e}")
+            writer.discard()
+            self._onAutoSaveFinished(writer)
+            return
+        if writer.change_count == self._change_count:
+            self.has_unsaved_changes = False
+        self._rebaseJournal(writer.filename, writer.change_count)
+        self._onAutoSaveFinished(writer)
+        if pending.incremental and pending.needs_compaction:
+            # Le fichier contient surtout des enregistrements périmés : le réécrire
+            self.has_unsaved_changes = True
+            self._autoSave(full=True)
+
+    def _onAutoSaveFinished(self, writer):
+        if writer is self.auto_save_writer:
+            self.auto_save_writer = None
+
+    def _waitForAutoSave(self):
+        """Let a running background save finish and drop its result"""
+        writer = self.auto_save_writer
+        if writer is not None:
+            self.auto_save_writer = None
+            writer.wait()
+            writer.discard()
+
     def _saveToFile(self, filename):
         """Save vignettes to specified file"""
-        import json
-        data = {
-            'vignettes': [
-                {
-                    'num': v.num,
-                    'inter_dist': v.inter_dist,
-                    'observations': v.observations,
-                    'diagram': v.diagram,
-                    'drawing_elements': v.drawing_elements
-                } for v in self.vignettes
-            ]
-        }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._waitForAutoSave()
+        save_roadbook(filename, self.vignettes, self.journal.save_meta(self._change_count))
         self.has_unsaved_changes = False
+        self._rebaseJournal(filename, self._change_count)
     
     def _markAsModified(self):
         """Mark the document as having unsaved changes"""
         self.has_unsaved_changes = True
-    
+        self._change_count += 1
+
+    def _recordEdit(self, op, **data):
+        """Mark the document as modified and log the edit for crash recovery"""
+        self._markAsModified()
+        try:
+            self.journal.append(op, self._change_count, **data)
+        except OSError as e:
+            logging.error(f"Edit journal write failed: {e}")
+
+    def _rebaseJournal(self, filename, seq):
+        try:
+            self.journal.rebase(filename, seq)
+        except OSError as e:
+            logging.error(f"Edit journal update failed: {e}")
+
+    def recoverSession(self):
+        """Offer to restore the edits of sessions that did not shut down cleanly.
+
+        Only the journals of sessions no longer running are considered: the
+        ones of other open windows are locked by their process.
+        """
+        recovered = False
+        for orphan in orphan_journals(exclude=[self.journal.path]):
+            try:
+                if recovered or not orphan.has_pending():
+                    # Rien à récupérer, ou laissé pour un prochain démarrage
+                    if recovered:
+                        orphan.release()
+                    else:
+                        orphan.discard()
+                    continue
+                name = orphan.filename
+                reply = QMessageBox.question(
+                    self, "Récupération",
+                    "L'application ne s'est pas fermée correctement.\n\n"
+                    "Voulez-vous récupérer les modifications non sauvegardées"
+                    f"{' de ' + os.path.basename(name) if name else ''} ?",
+                    QMessageBox.Yes | QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    orphan.discard()
+                    continue
+                filename, self.vignettes, self._change_count = orphan.recover()
+            except Exception as e:
+                logging.error(f"Session recovery failed: {e}", exc_info=True)
+                orphan.release()
+                QMessageBox.critical(self, "Erreur de récupération",
+                                     f"Impossible de récupérer la session :\n{str(e)}")
+                continue
+            # La session reprise continue dans son propre journal
+            self.journal.discard()
+            self.journal = orphan
+            self.current_filename = filename
+            self.has_unsaved_changes = True
+            self.updateTable()
+            recovered = True
+        if not recovered:
+            self._rebaseJournal(None, self._change_count)
+
+    def closeEvent(self, event):
+        self._cancelExport()
+        self._waitForAutoSave()
+        # Fermeture normale : le journal n'a plus d'utilité
+        self.journal.discard()
+        super().closeEvent(event)
+
     def _checkForUpdates(self):
         """Check for application updates"""
         try:
@@ -383,39 +387,74 @@ class RoadBookApp(QMainWindow):
             logging.debug("Update checker not available")
 
     def exportPDF(self):
+        if self.export_job is not None:
+            return  # Un export est déjà en cours
+        if not self.vignettes:
+            QMessageBox.warning(self, "Attention", 
+                              "Aucune vignette à exporter. Ajoutez d'abord des vignettes au road book.")
+            return
+
+        # Export en arrière-plan d'un instantané : l'édition reste possible
+        job = ExportJob(self.model.snapshot(), backend=self.pdf_backend_combo.currentData())
+        dialog = QProgressDialog("Préparation de l'export…", "Annuler", 0, 0, self)
+        dialog.setWindowTitle("Export PDF")
+        dialog.setAutoReset(False)
+        dialog.setAutoClose(False)
+        dialog.setMinimumDuration(500)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.canceled.connect(job.cancel)
+
+        def on_progress(stage, done, total):
+            dialog.setLabelText(f"{STAGE_LABELS.get(stage, stage)} ({done}/{total})")
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+
+        job.progress.connect(on_progress)
+        job.exported.connect(lambda filename: self._onExportFinished(dialog, filename))
+        job.failed.connect(lambda message: self._onExportFailed(dialog, job, message))
+        job.cancelled.connect(dialog.close)
+        job.finished.connect(lambda: self._onExportJobDone(job))
+        self.export_job = job
+        job.start()
+
+    def _onExportFinished(self, dialog, filename):
+        dialog.close()
+        # Vérifier que le fichier a été créé
+        if os.path.exists(filename):
+            QMessageBox.information(self, "Export terminé", 
+                                  f"Road book exporté avec succès vers :\n{filename}")
+        else:
+            QMessageBox.warning(self, "Erreur d'export", 
+                              "Le fichier PDF n'a pas pu être créé.")
+
+    def _onExportFailed(self, dialog, job, message):
+        dialog.close()
+        # Journaliser la trace complète dans un fichier log (toujours à la racine du projet)
         try:
-            if not self.vignettes:
-                QMessageBox.warning(self, "Attention", 
-                                  "Aucune vignette à exporter. Ajoutez d'abord des vignettes au road book.")
-                return
-                
-            exporter = PDFExporter(self.vignettes)
-            filename = exporter.export()
-            
-            # Vérifier que le fichier a été créé
-            if os.path.exists(filename):
-                QMessageBox.information(self, "Export terminé", 
-                                      f"Road book exporté avec succès vers :\n{filename}")
-            else:
-                QMessageBox.warning(self, "Erreur d'export", 
-                                  "Le fichier PDF n'a pas pu être créé.")
-                
-        except Exception as e:
-            # Journaliser la trace complète dans un fichier log (toujours à la racine du projet)
-            try:
-                import traceback
-                base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-                log_dir = os.path.join(base_dir, 'output')
-                os.makedirs(log_dir, exist_ok=True)
-                log_path = os.path.join(log_dir, 'export_error.log')
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write("\n=== Erreur export PDF ===\n")
-                    f.write(traceback.format_exc())
-            except Exception:
-                log_path = '(échec de l’écriture du journal)'
-            
-            QMessageBox.critical(self, "Erreur d'export", 
-                               f"Une erreur s'est produite lors de l'export PDF :\n{str(e)}")
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            log_dir = os.path.join(base_dir, 'output')
+            os.makedirs(log_dir, exist_ok=True)
+            log_path = os.path.join(log_dir, 'export_error.log')
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write("\n=== Erreur export PDF ===\n")
+                f.write(job.error_trace or message)
+        except Exception:
+            log_path = '(échec de l’écriture du journal)'
+
+        QMessageBox.critical(self, "Erreur d'export", 
+                           f"Une erreur s'est produite lors de l'export PDF :\n{message}")
+
+    def _onExportJobDone(self, job):
+        if job is self.export_job:
+            self.export_job = None
+
+    def _cancelExport(self):
+        """Stop a running export; its temporary file is removed"""
+        job = self.export_job
+        if job is not None:
+            self.export_job = None
+            job.cancel()
+            job.wait()
 
 
 
@@ -464,7 +503,6 @@ Usage commercial interdit - Open Source
     def saveRoadbook(self):
         try:
             from PyQt5.QtWidgets import QFileDialog
-            import json
             
             if not self.vignettes:
                 QMessageBox.warning(self, "Attention", "Aucune vignette à sauvegarder.")
@@ -485,30 +523,19 @@ Usage commercial interdit - Open Source
     def openRoadbook(self):
         try:
             from PyQt5.QtWidgets import QFileDialog
-            import json
             
             filename, _ = QFileDialog.getOpenFileName(
                 self, "Ouvrir un roadbook", "", "Fichiers Roadbook (*.rbk)")
             
             if filename:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                self.vignettes = []
-                for v_data in data['vignettes']:
-                    vignette = Vignette(
-                        num=v_data['num'],
-                        inter_dist=v_data['inter_dist'],
-                        observations=v_data['observations']
-                    )
-                    if v_data.get('diagram'):
-                        elements = v_data.get('drawing_elements', [])
-                        vignette.set_diagram(v_data['diagram'], elements)
-                    self.vignettes.append(vignette)
+                self._waitForAutoSave()
+                # Seul l'index est lu : les schémas sont chargés à l'affichage
+                self.vignettes = load_roadbook(filename)
                 
                 self._renumberVignettes()
                 self.current_filename = filename
                 self.has_unsaved_changes = False
+                self.journal.reset(filename, self._change_count)
                 self.updateTable()
                 QMessageBox.information(self, "Ouverture réussie", 
                                       f"Roadbook ouvert avec succès :\n{filename}")
@@ -521,9 +548,13 @@ def main():
         from logging_config import setup_logging
         logger = setup_logging()
         
-        app = QApplication(sys.argv)
-        window = RoadBookApp()
-        window.show()
+        with startup_profile.phase('QApplication'):
+            app = QApplication(sys.argv)
+        with startup_profile.phase('RoadBookApp'):
+            window = RoadBookApp()
+        with startup_profile.phase('show'):
+            window.show()
+        window.recoverSession()
         logger.info("Application started successfully")
         sys.exit(app.exec_())
     except Exception as e:
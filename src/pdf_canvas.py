@@ -0,0 +1,429 @@
+"""Direct-canvas PDF backend: the roadbook grid drawn without Platypus.
+
+The page geometry is fixed (MAX_ROWS_PER_PAGE rows × 1 or 2 columns), so
+every offset inside a cell is computed once per export and the grid, grey
+number blocks, distances, diagrams and observations are drawn straight on a
+reportlab.pdfgen.canvas. Positions, clipping, fonts and line breaks
+reproduce the Platypus layout of PDFExporter, without building three tables
+and four paragraph styles per vignette.
+
+What every cell shares (grey backgrounds, frames, "Observations" title,
+separator) is recorded once per shade as a form XObject, like the diagrams
+that appear in several cells and the raster ones: each cell only adds its
+own texts and diagram.
+
+A page stream only refers to fonts and forms by name, so it is kept in the
+page cache under a fingerprint of what the page shows (vignette numbers,
+distances, cumulative totals, observations and diagram keys), with the
+internal font names (/F1, /F2...) it was drawn with. A re-export replays the
+unchanged pages whose font names still match, recording the forms they use,
+and only draws the pages whose vignettes changed. Replaying reads canvas
+internals, hence the reportlab version range of requirements.txt; a canvas
+without them draws every page.
+"""
+import hashlib
+import io
+import logging
+import math
+from typing import List, Optional, Tuple
+import reportlab
+from reportlab import rl_config
+from reportlab.graphics import renderPDF
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from diagram_drawing import DEFAULT_FONTS, FONTS
+from pdf_exporter import GREY_SHADES, PDFExporter, convert_diagram, define_form, diagram_form_name
+
+# À incrémenter quand le dessin des pages change : les pages en cache sont ignorées
+PAGE_CACHE_VERSION = 2
+
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+# Marge intérieure du cadre de SimpleDocTemplate, qui rogne la grille
+FRAME_PADDING = 6
+# Tolérance de Paragraph : les espaces peuvent rétrécir de 5 % pour tenir
+SPACE_SHRINKAGE = rl_config.spaceShrinkage
+
+PAGE_GRID_WIDTH = 0.5
+BLOCK_BOX_WIDTH = 0.75
+BLOCK_GRID_WIDTH = 0.25
+SEPARATOR_WIDTH = 0.75
+
+
+class _PageCanvas(canvas.Canvas):
+    """Canvas that hands out the content of the current page or form and replays it"""
+
+    def register_fonts(self, fonts):
+        # Noms internes (/F1, /F2...) attribués dans l'ordre d'enregistrement
+        for font in fonts:
+            self._doc.getInternalFontName(font)
+
+    def can_replay(self) -> bool:
+        """Whether this reportlab exposes the internals content() and replay() rely on"""
+        return (hasattr(self, '_code') and hasattr(self, '_formsinuse')
+                and isinstance(getattr(self._doc, 'fontMapping', None), dict))
+
+    def font_names(self) -> tuple:
+        """(font, internal name) pairs of the document, in registration order"""
+        return tuple(self._doc.fontMapping.items())
+
+    def content(self) -> Tuple[str, list]:
+        """(operators, forms used) of the current page so far"""
+        return '\n'.join(self._code), list(self._formsinuse)
+
+    def replay(self, code: str, forms: list):
+        self._code.append(code)
+        self._formsinuse.extend(forms)
+
+
+class _Chunk(str):
+    """Piece of a word too long for its line"""
+
+
+def wrap_words(text: str, font: str, size: float, max_width: float) -> List[Tuple[List[str], float]]:
+    """Break text into (words, width) lines the way a Platypus Paragraph does.
+
+    Greedy filling with the space shrinkage tolerance; a word wider than the
+    line is cut into chunks, the first one completing the current line.
+    """
+    space = stringWidth(' ', font, size)
+    lines = []
+    line, width = [], -space
+    forced = False
+    words = text.split()
+    while words:
+        word = words.pop(0)
+        if not word and isinstance(word, _Chunk):
+            forced = True
+        word_width = stringWidth(word, font, size)
+        new_width = width + space + word_width
+        limit = max_width + SPACE_SHRINKAGE * space * len(line)
+        if (new_width > limit and not forced and not isinstance(word, _Chunk)
+                and word_width > max_width):
+            words[0:0] = _split_word(word, width + space, font, size, max_width)
+            forced = True
+            continue
+        if new_width <= limit or not line or forced:
+            if word:
+                line.append(word)
+            if forced:
+                forced = False
+                lines.append((line, new_width))
+                line, width = [], -space
+            else:
+                width = new_width
+        else:
+            lines.append((line, width))
+            line, width = [word], word_width
+    if line:
+        lines.append((line, width))
+    return lines
+
+
+def _split_word(word: str, line_width: float, font: str, size: float, max_width: float) -> List[str]:
+    chunks = []
+    text = ''
+    for c in word:
+        char_width = stringWidth(c, font, size)
+        new_width = line_width + char_width
+        if new_width > max_width and (text or char_width <= max_width):
+            chunks.append(_Chunk(text))
+            new_width = char_width
+            text = ''
+        text += c
+        line_width = new_width
+    chunks.append(_Chunk(text))
+    return chunks
+
+
+class _TextBlock:
+    """Paragraph metrics: font, size, leading, wrap width and alignment"""
+
+    def __init__(self, font: str, size: float, leading: float, width: float, centered: bool):
+        self.font = font
+        self.size = size
+        self.leading = leading
+        self.width = width
+        self.centered = centered
+
+    def lines(self, text: str) -> list:
+        # Un '\n' joue le rôle du <br/> des paragraphes
+        lines = []
+        for part in text.split('\n'):
+            lines.extend(wrap_words(part, self.font, self.size, self.width))
+        return lines
+
+    def draw(self, tx, lines: list, x: float, top: float):
+        """Draw lines below top (first baseline at top - size)"""
+        tx.setFont(self.font, self.size)
+        y = top - self.size
+        for words, width in lines:
+            text = ' '.join(words)
+            extra = self.width - width
+            spaces = len(words) + text.count('\xa0') - 1
+            if extra > -1e-8 or spaces <= 0:
+                tx.setTextOrigin(x + 0.5 * extra if self.centered else x, y)
+                tx.textOut(text)
+            else:
+                # Ligne un peu trop longue : espaces resserrés
+                tx.setWordSpace(extra / spaces)
+                tx.setTextOrigin(x, y)
+                tx.textOut(text)
+                tx.setWordSpace(0)
+            y -= self.leading
+
+
+class CanvasRenderer:
+    """Draw a PDFExporter's roadbook directly on a canvas"""
+
+    def __init__(self, exporter: PDFExporter, columns: Optional[int] = None):
+        self.exporter = exporter
+        self.page_width, self.page_height = exporter.page_width, exporter.page_height
+        margin = exporter.margin
+        self.columns, self.per_page, self.col_w, self.row_h = exporter._grid(columns)
+        content_width = self.page_width - margin - margin
+        content_height = self.page_height - margin - margin
+        # La grille part du bord de la zone utile, sous la marge du cadre
+        self.table_x = margin
+        self.table_top = margin + content_height - FRAME_PADDING
+        self.clip_x = margin + FRAME_PADDING
+        self.clip_w = content_width - 2 * FRAME_PADDING
+        self.clip_max_h = content_height - 2 * FRAME_PADDING
+
+        usable_w, usable_h, left_w, diagram_w, obs_w = exporter._cell_layout(self.col_w, self.row_h)
+        num_fs, lab_fs, obs_fs = exporter._font_sizes(usable_h)
+        self.usable_h = usable_h
+        self.left_w, self.diagram_w, self.obs_w = left_w, diagram_w, obs_w
+        self.diagram_box = exporter._diagram_box(self.col_w, self.row_h)
+
+        # Bloc gauche : N°, distance intermédiaire, distance totale (du haut vers le bas)
+        heights = [usable_h * 0.30, usable_h * 0.30, usable_h * 0.40]
+        positions = [sum(heights)]
+        for h in heights:
+            positions.append(positions[-1] - h)
+        self.block_rows = list(zip(positions[1:], heights))
+        # Bloc décalé de 2pt dans la case : cadre, puis grille fine par-dessus
+        x0, x1, top = 2, 2 + left_w, positions[0]
+        self.block_box = [(x0, top, x1, top), (x0, 0, x1, 0), (x0, 0, x0, top), (x1, 0, x1, top)]
+        self.block_grid = self.block_box + [(x0, p, x1, p) for p in positions[1:-1]]
+        self.num_text = _TextBlock(FONT_BOLD, num_fs, num_fs + 1, left_w - 4, True)
+        self.lab_text = _TextBlock(FONT, lab_fs, lab_fs, left_w - 4, True)
+
+        # Colonne observations : titre puis texte, alignés en haut
+        self.obs_x = left_w + diagram_w
+        self.obs_hdr_h = exporter._observation_header_height(usable_h)
+        self.title_text = _TextBlock(FONT_BOLD, max(6, obs_fs - 2), max(7, obs_fs - 1), obs_w - 2, True)
+        self.obs_text = _TextBlock(FONT, obs_fs, obs_fs + 1, obs_w - 2, False)
+        self.title_lines = self.title_text.lines('Observations')
+        self.chrome_forms = [f"cell_chrome_{i}" for i in range(len(GREY_SHADES))]
+
+        # Polices enregistrées d'emblée, dans un ordre fixe : les flux en cache
+        # désignent les polices par leur nom interne
+        self.fonts = list(dict.fromkeys([FONT, FONT_BOLD, *DEFAULT_FONTS]
+                                        + [font for pair in FONTS.values() for font in pair]))
+        self.layout_key = repr((PAGE_CACHE_VERSION, reportlab.Version, self.page_width, self.page_height,
+                                margin, self.columns, self.col_w, self.row_h, self.fonts))
+
+    def render(self, filename: str):
+        exporter = self.exporter
+        vignettes = exporter.vignettes
+        cumul_dists = exporter.cumul_dists
+        exporter._prepare_diagrams(*self.diagram_box)
+        exporter.pages_reused = exporter.pages_drawn = 0
+        # Taille des schémas dont le formulaire est déjà dans le document
+        self.form_sizes = {}
+
+        canv = _PageCanvas(filename, pagesize=(self.page_width, self.page_height))
+        self.replay = exporter.page_cache is not None and canv.can_replay()
+        if exporter.page_cache is not None and not self.replay:
+            logging.warning("Page cache disabled: unsupported reportlab canvas internals")
+        canv.register_fonts(self.fonts)
+        for shade, name in zip(GREY_SHADES, self.chrome_forms):
+            define_form(canv, name, lambda form, shade=shade: self._paint_chrome(form, shade))
+        pages = math.ceil(len(vignettes) / self.per_page)
+        for page, start in enumerate(range(0, len(vignettes), self.per_page), 1):
+            batch = range(start, min(start + self.per_page, len(vignettes)))
+            self._emit_page(canv, [(vignettes[i], cumul_dists[i], self._diagram_sources(vignettes[i]))
+                                   for i in batch])
+            canv.showPage()
+            exporter._report('pages', page, pages)
+        canv.save()
+        logging.info(f"PDF pages: {exporter.pages_reused} reused, {exporter.pages_drawn} drawn")
+
+    def _diagram_sources(self, v) -> list:
+        """(kind, content, cache key) conversions of a vignette's diagram, best first"""
+        box = self.diagram_box
+        return [(kind, content, self.exporter.cache.key(kind, content, *box))
+                for kind, content in self.exporter._diagram_sources(v)]
+
+    def _page_key(self, cells: list) -> str:
+        """Fingerprint of everything a page shows"""
+        digest = hashlib.sha1(self.layout_key.encode('utf-8'))
+        for v, cumul, sources in cells:
+            digest.update(repr((int(v.num), int(v.inter_dist), int(cumul), PDFExporter._observation_text(v),
+                                [key for _, _, key in sources])).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _emit_page(self, canv, cells: list):
+        """Draw a page, or replay it from the page cache when none of its cells changed"""
+        exporter = self.exporter
+        cache = exporter.page_cache
+        key = self._page_key(cells) if self.replay else None
+        found, content = cache.lookup(key) if key else (False, None)
+        if found:
+            code, forms, fonts = content
+            # Page rejouée seulement si ses polices ont gardé leur nom interne
+            found = canv.font_names()[:len(fonts)] == fonts
+        if found:
+            # Les formulaires appelés par la page doivent exister dans ce document
+            for _, _, sources in cells:
+                for kind, data, diagram_key in sources:
+                    if diagram_form_name(diagram_key) in forms:
+                        self._diagram_form(canv, kind, data, diagram_key)
+            canv.replay(code, forms)
+            exporter.pages_reused += 1
+            exporter._vignettes_laid_out(len(cells))
+            return
+        fonts = canv.font_names()
+        self._draw_page(canv, cells)
+        # Une police ajoutée en cours de page n'aurait pas le même nom interne au prochain export
+        if key and canv.font_names() == fonts:
+            cache.put(key, (*canv.content(), fonts))
+        exporter.pages_drawn += 1
+
+    def _draw_page(self, canv, cells: list):
+        """Draw one page from its (vignette, cumulative distance, diagram sources) cells"""
+        n_page = len(cells)
+        rows = math.ceil(n_page / self.columns)
+        table_h = rows * self.row_h
+        clip_h = min(self.clip_max_h, table_h)
+
+        canv.saveState()
+        path = canv.beginPath()
+        path.rect(self.clip_x, self.table_top - clip_h, self.clip_w, clip_h)
+        canv.clipPath(path, stroke=0)
+        canv.setLineCap(1)
+        canv.setLineJoin(1)
+        # Même ordre que les tableaux Platypus : cellules ligne par ligne, puis la grille
+        for r in range(rows):
+            y = self.table_top - (r + 1) * self.row_h
+            for c in range(self.columns):
+                slot = c * rows + r
+                if slot < n_page:
+                    self._draw_cell(canv, *cells[slot], self.table_x + c * self.col_w + 2, y + 2)
+                    self.exporter._vignettes_laid_out()
+        self._draw_grid(canv, rows, table_h)
+        canv.restoreState()
+
+    def _draw_grid(self, canv, rows: int, table_h: float):
+        x0, top = self.table_x, self.table_top
+        x1, bottom = x0 + self.columns * self.col_w, top - table_h
+        xs = [x0 + c * self.col_w for c in range(self.columns + 1)]
+        ys = [top - r * self.row_h for r in range(rows + 1)]
+        canv.setStrokeColor(colors.black)
+        canv.setLineWidth(PAGE_GRID_WIDTH)
+        canv.lines([(x0, top, x1, top), (x0, bottom, x1, bottom), (x0, bottom, x0, top), (x1, bottom, x1, top)]
+                   + [(x0, y, x1, y) for y in ys[1:-1]]
+                   + [(x, bottom, x, top) for x in xs[1:-1]])
+
+    def _draw_cell(self, canv, v, cumul, sources: list, x: float, y: float):
+        """Draw one vignette; (x, y) is the bottom-left corner of its usable area"""
+        canv.saveState()
+        # Coordonnées locales à la case : flux identiques d'une case à l'autre
+        canv.translate(x, y)
+        canv.doForm(self.chrome_forms[(int(v.num) - 1) % 2])
+
+        # Les textes restent dans les marges des blocs : les tracer après les
+        # traits du formulaire ne change pas le rendu
+        tx = canv.beginText()
+        texts = (
+            (self.num_text, str(int(v.num))),
+            (self.lab_text, f"Distance int.:\n{int(v.inter_dist)} m"),
+            (self.lab_text, f"Distance totale:\n{int(cumul)} m"),
+        )
+        for (row_y, row_h), (block, text) in zip(self.block_rows, texts):
+            lines = block.lines(text)
+            # Centrage vertical du paragraphe (marges haute et basse identiques)
+            block.draw(tx, lines, 4, row_y + (row_h + len(lines) * block.leading) / 2)
+
+        obs = PDFExporter._observation_text(v)
+        if obs:
+            self.obs_text.draw(tx, self.obs_text.lines(obs), self.obs_x + 3, self.usable_h - self.obs_hdr_h - 1)
+        canv.drawText(tx)
+
+        self._draw_diagram(canv, sources)
+        canv.restoreState()
+
+    def _paint_chrome(self, canv, shades):
+        """Cell template: number block backgrounds and frames, observations title, separator"""
+        for (row_y, row_h), shade in zip(self.block_rows, shades):
+            canv.setFillColor(colors.Color(shade, shade, shade))
+            canv.rect(2, row_y, self.left_w, row_h, stroke=0, fill=1)
+        canv.setFillColor(colors.black)
+        tx = canv.beginText()
+        self.title_text.draw(tx, self.title_lines, self.obs_x + 3, self.usable_h - 1)
+        canv.drawText(tx)
+
+        canv.setStrokeColor(colors.black)
+        canv.setLineWidth(BLOCK_BOX_WIDTH)
+        canv.lines(self.block_box)
+        canv.setLineWidth(BLOCK_GRID_WIDTH)
+        canv.lines(self.block_grid)
+        # Trait de séparation schéma/observations
+        canv.setLineWidth(SEPARATOR_WIDTH)
+        canv.line(self.obs_x, 0, self.obs_x, self.usable_h)
+
+    def _draw_diagram(self, canv, sources: list):
+        """Draw the first diagram conversion that gives something, centred in its column"""
+        for kind, content, key in sources:
+            name = diagram_form_name(key)
+            payload = None
+            if name not in self.form_sizes and self.exporter._diagram_uses[key] <= 1:
+                payload = self._payload(kind, content, key)
+                if not payload:
+                    continue
+                if payload[0] == 'drawing':
+                    # Schéma vectoriel unique : directement dans le flux de la page
+                    self._place(canv, payload[1].width, payload[1].height)
+                    renderPDF.draw(payload[1], canv, 0, 0)
+                    return
+            # Schéma répété ou image : un formulaire, que la page en cache pourra rappeler
+            size = self._diagram_form(canv, kind, content, key, payload)
+            if size:
+                self._place(canv, *size)
+                canv.doForm(name)
+                return
+
+    def _place(self, canv, width: float, height: float):
+        # Centré dans la colonne du schéma ; dernier tracé de la case
+        canv.translate(self.left_w + (self.diagram_w - width) / 2, (self.usable_h - height) / 2)
+
+    def _payload(self, kind: str, content, key: str):
+        return self.exporter.cache.get_or_convert(
+            key, lambda: convert_diagram(kind, content, *self.diagram_box))
+
+    def _diagram_form(self, canv, kind: str, content, key: str, payload=None) -> Optional[Tuple[float, float]]:
+        """Record the form of a diagram if needed; (width, height), or None if there is nothing to draw"""
+        name = diagram_form_name(key)
+        if name not in self.form_sizes:
+            payload = payload or self._payload(kind, content, key)
+            if not payload:
+                return None
+            if payload[0] == 'drawing':
+                size = payload[1].width, payload[1].height
+            else:
+                size = payload[2], payload[3]
+            define_form(canv, name, lambda form: self._paint_diagram(form, payload))
+            self.form_sizes[name] = size
+        return self.form_sizes[name]
+
+    @staticmethod
+    def _paint_diagram(canv, payload):
+        """Draw a conversion payload with its bottom-left corner at the origin"""
+        if payload[0] == 'drawing':
+            renderPDF.draw(payload[1], canv, 0, 0)
+        else:
+            _, png_bytes, width, height = payload
+            canv.drawImage(ImageReader(io.BytesIO(png_bytes)), 0, 0, width, height, mask='auto')
@@ -1,15 +1,21 @@
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Image, PageBreak, KeepInFrame
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Image, PageBreak, KeepInFrame, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import io
 import os
 import math
 import logging
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import List, Optional, Tuple
-from vignette_model import Vignette
+from vignette_model import Vignette, cumulative_distances
+from diagram_drawing import elements_to_drawing
+from diagram_cache import diagram_cache, page_cache
 
 # Import optionnel de svglib pour une conversion vectorielle
 try:
@@ -18,21 +24,182 @@ try:
 except ImportError:
     SVGLIB_AVAILABLE = False
 
+WHITE_BYTE = b'\xff'
+# En dessous de ce nombre de schémas à convertir, le démarrage des
+# processus coûte plus que la conversion elle-même
+MIN_PARALLEL_DIAGRAMS = 8
+
+# Pagination : 12 lignes × 2 colonnes = 24 vignettes/page max
+MAX_ROWS_PER_PAGE = 12
+# Palette bicolonne alternée selon le numéro pour faciliter la lecture
+GREY_SHADES = [
+    (0.82, 0.88, 0.94),  # un peu plus sombre -> plus clair
+    (0.86, 0.92, 0.97),  # un peu plus clair -> très clair
+]
+MAX_OBSERVATION_CHARS = 200
+
+# 'platypus' : mise en page par tableaux ; 'canvas' : dessin direct (pdf_canvas)
+BACKENDS = ('platypus', 'canvas')
+DEFAULT_BACKEND = 'platypus'
+
+_worker_app = None
+
+
+def content_bounds(image) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box (min_x, min_y, max_x, max_y) of the non-white pixels.
+
+    image must be an ARGB32 QImage. Rows are compared as raw bytes (a white
+    pixel is four 0xff bytes), so the scan runs in C instead of one
+    QImage.pixel() call per pixel. Returns None for an all-white image.
+    """
+    width, height = image.width(), image.height()
+    stride = image.bytesPerLine()
+    row_bytes = width * 4
+    data = image.constBits().asstring(image.sizeInBytes())
+    white_row = WHITE_BYTE * row_bytes
+
+    min_x, min_y, max_x, max_y = width, height, -1, -1
+    for y in range(height):
+        start = y * stride
+        row = data[start:start + row_bytes]
+        if row == white_row:
+            continue
+        if min_y == height:
+            min_y = y
+        max_y = y
+        # Octets blancs en tête / en queue -> premier / dernier pixel non blanc
+        min_x = min(min_x, (row_bytes - len(row.lstrip(WHITE_BYTE))) // 4)
+        max_x = max(max_x, (len(row.rstrip(WHITE_BYTE)) - 1) // 4)
+    if max_y < 0:
+        return None
+    return min_x, min_y, max_x, max_y
+
+
+def _init_diagram_worker():
+    """Offscreen Qt application for the raster fallback in worker processes"""
+    global _worker_app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtGui import QGuiApplication
+    _worker_app = QGuiApplication.instance() or QGuiApplication(['roadbook'])
+
+
+def convert_diagram(kind: str, content, max_width: float, max_height: float):
+    """Conversion payload of one diagram (see PDFExporter._flowable).
+
+    kind is 'elements' (drawing_elements), 'svglib' or 'raster' (SVG data).
+    Module-level so that it can run in a worker process.
+    """
+    if kind == 'elements':
+        return PDFExporter._convert_elements(content, max_width, max_height)
+    return PDFExporter._convert_diagram(content, max_width, max_height, use_svglib=(kind == 'svglib'))
+
+
+def define_form(canv, name: str, paint):
+    """Record the form XObject name with paint(canv) unless it already exists"""
+    if not canv.hasForm(name):
+        # Cadre d'une page A4 de part et d'autre de l'origine : un schéma qui
+        # déborde de sa boîte n'est pas plus rogné que sans formulaire
+        width, height = A4
+        canv.beginForm(name, -width, -height, width, height)
+        paint(canv)
+        canv.endForm()
+
+
+def draw_form(canv, name: str, paint):
+    """Draw the form XObject name, recording it with paint(canv) on first use"""
+    define_form(canv, name, paint)
+    canv.doForm(name)
+
+
+def diagram_form_name(key: str) -> str:
+    return f"diagram_{key}"
+
+
+class _LazyPage(Flowable):
+    """Page flowable built by build() when Platypus reaches it and dropped once drawn"""
+
+    def __init__(self, build, on_drawn=None):
+        Flowable.__init__(self)
+        self.build = build
+        self.on_drawn = on_drawn
+        self._content = None
+
+    def _flowable(self):
+        if self._content is None:
+            self._content = self.build()
+        return self._content
+
+    def wrap(self, avail_width, avail_height):
+        self.width, self.height = self._flowable().wrapOn(self.canv, avail_width, avail_height)
+        return self.width, self.height
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._flowable().drawOn(canvas, x, y, _sW)
+        # Tableaux, paragraphes et schémas de la page ne sont plus référencés
+        self._content = None
+        if self.on_drawn:
+            self.on_drawn()
+
+
+class _SharedDiagram(Flowable):
+    """Diagram flowable stored once as a form XObject and reused by every cell"""
+
+    def __init__(self, name: str, flowable):
+        Flowable.__init__(self)
+        self.name = name
+        self.flowable = flowable
+
+    def wrap(self, avail_width, avail_height):
+        self.width, self.height = self.flowable.wrap(avail_width, avail_height)
+        return self.width, self.height
+
+    def draw(self):
+        draw_form(self.canv, self.name, lambda canv: self.flowable.drawOn(canv, 0, 0))
+
+
 class PDFExportError(Exception):
     """Custom exception for PDF export errors"""
     pass
 
+class ExportCancelled(Exception):
+    """Raised by a progress callback to stop the export"""
+    pass
+
 class PDFExporter:
-    def __init__(self, vignettes: List[Vignette]):
+    def __init__(self, vignettes: List[Vignette], cumul_dists: Optional[List[float]] = None,
+                 cache=diagram_cache, workers: Optional[int] = None, backend: str = DEFAULT_BACKEND,
+                 page_cache=page_cache, progress=None):
         self.vignettes = vignettes
+        self.backend = backend
+        self.cache = cache
+        # Pages déjà dessinées par le moteur canvas (None : tout redessiner)
+        self.page_cache = page_cache
+        self.pages_reused = self.pages_drawn = 0
+        # progress(stage, done, total) pour chaque schéma converti, vignette mise
+        # en page et page terminée ; il peut lever ExportCancelled
+        self.progress = progress
+        self._laid_out = 0
+        # Processus de conversion des schémas (défaut : un par cœur)
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_hits = self.cache_misses = 0
+        # Nombre de cases par schéma : ceux qui reviennent sont dessinés une seule fois
+        self._diagram_uses = Counter()
+        # Distances cumulées précalculées par le modèle du tableau si disponibles
+        self.cumul_dists = cumul_dists if cumul_dists is not None else cumulative_distances(vignettes)
         self.page_width, self.page_height = A4
         self.margin = 1.5 * cm
 
-    def export(self, filename: Optional[str] = None) -> str:
+    def export(self, filename: Optional[str] = None, output_dir: Optional[str] = None,
+               backend: Optional[str] = None) -> str:
+        """Write the PDF and return its path; backend overrides self.backend"""
+        backend = backend or self.backend
+        if backend not in BACKENDS:
+            raise PDFExportError(f"Moteur d'export PDF inconnu : {backend}")
         try:
             # Secure path construction to prevent path traversal
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            output_dir = os.path.join(base_dir, 'output')
+            if output_dir is None:
+                base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+                output_dir = os.path.join(base_dir, 'output')
             os.makedirs(output_dir, exist_ok=True)
             
             if filename is None:
@@ -45,100 +212,33 @@ class PDFExporter:
                     safe_filename += '.pdf'
             
             filename = os.path.join(output_dir, safe_filename)
-
-            # Document
-            doc = SimpleDocTemplate(
-                filename,
-                pagesize=A4,
-                rightMargin=self.margin,
-                leftMargin=self.margin,
-                topMargin=self.margin,
-                bottomMargin=self.margin
-            )
-
-            # Zone utile
-            content_width = doc.width
-            content_height = doc.height
-
-            # Styles
-            styles = getSampleStyleSheet()
-            style_header = ParagraphStyle(
-                name='HeaderSmall', parent=styles['Normal'], fontSize=8, leading=9, spaceAfter=2
-            )
-            style_obs = ParagraphStyle(
-                name='ObsSmall', parent=styles['Normal'], fontSize=8, leading=9
-            )
-
-            # Calcul des distances cumulées
-            cumul_dists = []
-            cumul = 0
-            for v in self.vignettes:
-                cumul += v.inter_dist
-                cumul_dists.append(int(cumul))
-
-            n = len(self.vignettes)
-
-            # Pagination : 12 lignes × 2 colonnes = 24 vignettes/page max
-            # row_h ≈ 2.22cm → assez pour 2 lignes de texte dans les slots "Distance int./totale"
-            # -1pt sur hauteur et largeur : évite que la bordure inférieure/droite soit clippée par KeepInFrame
-            MAX_ROWS_PER_PAGE = 12
-            columns = 2 if n > 4 else 1
-            max_per_page = MAX_ROWS_PER_PAGE * columns
-            col_w = content_width / columns
-            row_h = (content_height - 1) / MAX_ROWS_PER_PAGE
-
-            main_style_cmds = [
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ]
-
-            # Découpage en lots en conservant l'index global pour cumul_dists
-            all_indexed = list(enumerate(self.vignettes))
-            page_batches = [
-                all_indexed[i:i + max_per_page]
-                for i in range(0, n, max_per_page)
-            ]
-
-            elements = []
-            for page_idx, indexed_batch in enumerate(page_batches):
-                if page_idx > 0:
-                    elements.append(PageBreak())
-
-                n_page = len(indexed_batch)
-                rows_on_page = math.ceil(n_page / columns)
-
-                main_rows = []
-                for r in range(rows_on_page):
-                    row_cells = []
-                    for c in range(columns):
-                        slot = c * rows_on_page + r
-                        if slot < n_page:
-                            global_idx, v = indexed_batch[slot]
-                            cell = self._build_vignette_cell(
-                                v, cumul_dists[global_idx], col_w, row_h, style_header, style_obs
-                            )
-                            row_cells.append(cell)
-                        else:
-                            row_cells.append("")
-                    main_rows.append(row_cells)
-
-                page_table = Table(
-                    main_rows,
-                    colWidths=[col_w] * columns,
-                    rowHeights=[row_h] * rows_on_page
-                )
-                page_table.setStyle(TableStyle(main_style_cmds))
-                # KeepInFrame empêche Platypus de scinder la table sur la page suivante
-                kif = KeepInFrame(content_width, content_height, [page_table], mode='truncate')
-                elements.append(kif)
-
-            doc.build(elements)
+            # PDF écrit à part puis renommé : ni fichier partiel en cas d'erreur
+            # ou d'annulation, ni ancien export écrasé à moitié
+            tmp_path = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+            self._laid_out = 0
+            try:
+                if backend == 'canvas':
+                    from pdf_canvas import CanvasRenderer
+                    CanvasRenderer(self).render(tmp_path)
+                else:
+                    self._build_platypus(tmp_path)
+                os.replace(tmp_path, filename)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            finally:
+                self._diagram_uses.clear()
+
+            # Seuls les schémas modifiés depuis le dernier export sont reconvertis
+            logging.info(f"Diagram cache: {self.cache_hits} reused, {self.cache_misses} converted")
             return filename
 
+        except ExportCancelled:
+            logging.info("PDF export cancelled")
+            raise
         except (OSError, IOError) as e:
             logging.error(f"File system error during PDF creation: {e}")
             raise PDFExportError(f"Erreur d'accès fichier lors de la création du PDF : {str(e)}")
@@ -146,6 +246,117 @@ class PDFExporter:
             logging.error(f"Unexpected error during PDF creation: {e}")
             raise PDFExportError(f"Erreur lors de la création du PDF : {str(e)}")
 
+    def _report(self, stage: str, done: int, total: int):
+        if self.progress is not None:
+            self.progress(stage, done, total)
+
+    def _vignettes_laid_out(self, count: int = 1):
+        self._laid_out += count
+        self._report('vignettes', self._laid_out, len(self.vignettes))
+
+    def _grid(self, columns: Optional[int] = None):
+        """(columns, vignettes per page, column width, row height) of the page grid
+
+        columns defaults to 1 for short roadbooks and 2 otherwise.
+        """
+        content_width = self.page_width - self.margin - self.margin
+        content_height = self.page_height - self.margin - self.margin
+        if columns is None:
+            columns = 2 if len(self.vignettes) > 4 else 1
+        # row_h ≈ 2.22cm → assez pour 2 lignes de texte dans les slots "Distance int./totale"
+        # -1pt sur hauteur et largeur : évite que la bordure inférieure/droite soit clippée par KeepInFrame
+        row_h = (content_height - 1) / MAX_ROWS_PER_PAGE
+        return columns, MAX_ROWS_PER_PAGE * columns, content_width / columns, row_h
+
+    def _build_platypus(self, filename: str):
+        """Lay the grid out with Platypus tables"""
+        # Document
+        doc = SimpleDocTemplate(
+            filename,
+            pagesize=A4,
+            rightMargin=self.margin,
+            leftMargin=self.margin,
+            topMargin=self.margin,
+            bottomMargin=self.margin
+        )
+
+        # Zone utile
+        content_width = doc.width
+        content_height = doc.height
+
+        # Styles
+        styles = getSampleStyleSheet()
+        style_header = ParagraphStyle(
+            name='HeaderSmall', parent=styles['Normal'], fontSize=8, leading=9, spaceAfter=2
+        )
+        style_obs = ParagraphStyle(
+            name='ObsSmall', parent=styles['Normal'], fontSize=8, leading=9
+        )
+
+        cumul_dists = self.cumul_dists
+        n = len(self.vignettes)
+        columns, max_per_page, col_w, row_h = self._grid()
+
+        # Les schémas manquants sont convertis avant la mise en page
+        self._prepare_diagrams(*self._diagram_box(col_w, row_h))
+
+        main_style_cmds = [
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ]
+
+        # Découpage en lots en conservant l'index global pour cumul_dists
+        all_indexed = list(enumerate(self.vignettes))
+        page_batches = [
+            all_indexed[i:i + max_per_page]
+            for i in range(0, n, max_per_page)
+        ]
+
+        def build_page(indexed_batch):
+            n_page = len(indexed_batch)
+            rows_on_page = math.ceil(n_page / columns)
+
+            main_rows = []
+            for r in range(rows_on_page):
+                row_cells = []
+                for c in range(columns):
+                    slot = c * rows_on_page + r
+                    if slot < n_page:
+                        global_idx, v = indexed_batch[slot]
+                        cell = self._build_vignette_cell(
+                            v, cumul_dists[global_idx], col_w, row_h, style_header, style_obs
+                        )
+                        row_cells.append(cell)
+                        self._vignettes_laid_out()
+                    else:
+                        row_cells.append("")
+                main_rows.append(row_cells)
+
+            page_table = Table(
+                main_rows,
+                colWidths=[col_w] * columns,
+                rowHeights=[row_h] * rows_on_page
+            )
+            page_table.setStyle(TableStyle(main_style_cmds))
+            # KeepInFrame empêche Platypus de scinder la table sur la page suivante
+            return KeepInFrame(content_width, content_height, [page_table], mode='truncate')
+
+        # Une page n'est mise en forme qu'une fois atteinte, et libérée dès
+        # qu'elle est dessinée : la mémoire ne dépend pas de la longueur du roadbook
+        elements = []
+        pages = len(page_batches)
+        for page_idx, indexed_batch in enumerate(page_batches):
+            if page_idx > 0:
+                elements.append(PageBreak())
+            elements.append(_LazyPage(lambda batch=indexed_batch: build_page(batch),
+                                      lambda done=page_idx + 1: self._report('pages', done, pages)))
+
+        doc.build(elements)
+
     def _build_vignette_cell(
         self,
         v: Vignette,
@@ -161,35 +372,16 @@ class PDFExporter:
         - Col droite: observations
         Le tout s'adapte en taille pour tenir en A4.
         """
-        # Marges internes
-        inner_pad = 2
-        usable_w = max(1, cell_w - 2 * inner_pad)
-        usable_h = max(1, cell_h - 2 * inner_pad)
+        usable_w, usable_h, left_w, diagram_w, obs_w = self._cell_layout(cell_w, cell_h)
 
-        # Tailles de police "responsive"
-        def clamp(x, lo, hi):
-            return max(lo, min(hi, x))
-        num_fs = int(clamp(usable_h * 0.26 / cm * 10, 7, 18))  # proportion de la hauteur
-        lab_fs = int(clamp(usable_h * 0.18 / cm * 10, 6, 12))
-        obs_fs = int(clamp(usable_h * 0.18 / cm * 10, 6, 12))
+        num_fs, lab_fs, obs_fs = self._font_sizes(usable_h)
 
         style_num = ParagraphStyle(name='NumBox', parent=style_header, fontSize=num_fs, leading=num_fs+1, alignment=1)
         style_lab = ParagraphStyle(name='LabSmall', parent=style_header, fontSize=lab_fs, leading=lab_fs, alignment=1, spaceAfter=0, spaceBefore=0)
         style_obs_dyn = ParagraphStyle(name='ObsDyn', parent=style_obs, fontSize=obs_fs, leading=obs_fs+1)
 
-        # Largeurs des colonnes: gauche ~18%, schéma ~60%, obs ~22%
-        left_w = clamp(usable_w * 0.18, 1.2*cm, usable_w * 0.25)
-        rem_w = usable_w - left_w
-        obs_w = clamp(rem_w * 0.22, 2.0*cm, rem_w * 0.30)
-        diagram_w = max(1, rem_w - obs_w)
-
         # Colonne gauche: 3 lignes avec nuances de gris
-        # Palette bicolonne alternée selon le numéro pour faciliter la lecture
-        base_sets = [
-            (0.82, 0.88, 0.94),  # un peu plus sombre -> plus clair
-            (0.86, 0.92, 0.97),  # un peu plus clair -> très clair
-        ]
-        b = base_sets[(int(v.num) - 1) % 2]
+        b = GREY_SHADES[(int(v.num) - 1) % 2]
         g1, g2, g3 = (colors.Color(b[0], b[0], b[0]), colors.Color(b[1], b[1], b[1]), colors.Color(b[2], b[2], b[2]))
 
         num_para = Paragraph(f"<b>{int(v.num)}</b>", style_num)
@@ -216,22 +408,18 @@ class PDFExporter:
         ]))
 
         # Colonne milieu: schéma occupant toute la case avec padding minimal
-        diagram_padding = 1  # Padding ultra minimal
-        available_diagram_w = max(1, diagram_w - 2 * diagram_padding)
-        available_diagram_h = max(1, usable_h - 2 * diagram_padding)
-        diag_flow = self._process_diagram(v.diagram, available_diagram_w, available_diagram_h) if v.diagram else ""
+        key, payload = self._diagram_entry(v, *self._diagram_box(cell_w, cell_h))
+        diag_flow = self._flowable(payload)
+        if payload and self._diagram_uses[key] > 1:
+            diag_flow = _SharedDiagram(diagram_form_name(key), diag_flow)
 
         # Colonne droite: Observations (avec titre)
-        obs_text = v.observations or ""
-        max_chars = 200
-        if len(obs_text) > max_chars:
-            obs_text = obs_text[:max_chars - 3] + "..."
+        obs_text = self._observation_text(v)
         # Style spécifique pour le titre observations avec police plus petite
         style_obs_title = ParagraphStyle(name='ObsTitle', parent=style_lab, fontSize=max(6, obs_fs-2), leading=max(7, obs_fs-1))
         obs_title_para = Paragraph("<b>Observations</b>", style_obs_title)
         obs_para = Paragraph(obs_text, style_obs_dyn)
-        # Hauteur du titre d'observation (augmentée pour éviter le retour à la ligne)
-        obs_hdr_h = min(0.8 * cm, usable_h * 0.25)
+        obs_hdr_h = self._observation_header_height(usable_h)
         obs_tbl = Table(
             [[obs_title_para], [obs_para]],
             colWidths=[obs_w],
@@ -271,13 +459,187 @@ class PDFExporter:
 
         return row_tbl
 
-    def _process_diagram(self, svg_data: str, max_width: float, max_height: float):
-        """Convert SVG to maximum size Flowable that fits in available space"""
-        if not svg_data:
+    @staticmethod
+    def _cell_layout(cell_w: float, cell_h: float):
+        """(usable_w, usable_h, left_w, diagram_w, obs_w) of a vignette cell"""
+        # Marges internes
+        inner_pad = 2
+        usable_w = max(1, cell_w - 2 * inner_pad)
+        usable_h = max(1, cell_h - 2 * inner_pad)
+
+        # Largeurs des colonnes: gauche ~18%, schéma ~60%, obs ~22%
+        left_w = max(1.2*cm, min(usable_w * 0.25, usable_w * 0.18))
+        rem_w = usable_w - left_w
+        obs_w = max(2.0*cm, min(rem_w * 0.30, rem_w * 0.22))
+        diagram_w = max(1, rem_w - obs_w)
+        return usable_w, usable_h, left_w, diagram_w, obs_w
+
+    @staticmethod
+    def _font_sizes(usable_h: float) -> Tuple[int, int, int]:
+        """Font sizes (number, labels, observations) for the cell height"""
+        # Tailles de police "responsive"
+        def clamp(x, lo, hi):
+            return max(lo, min(hi, x))
+        num_fs = int(clamp(usable_h * 0.26 / cm * 10, 7, 18))  # proportion de la hauteur
+        lab_fs = int(clamp(usable_h * 0.18 / cm * 10, 6, 12))
+        obs_fs = int(clamp(usable_h * 0.18 / cm * 10, 6, 12))
+        return num_fs, lab_fs, obs_fs
+
+    @staticmethod
+    def _observation_header_height(usable_h: float) -> float:
+        # Hauteur du titre d'observation (augmentée pour éviter le retour à la ligne)
+        return min(0.8 * cm, usable_h * 0.25)
+
+    @staticmethod
+    def _observation_text(v: Vignette) -> str:
+        obs_text = v.observations or ""
+        if len(obs_text) > MAX_OBSERVATION_CHARS:
+            obs_text = obs_text[:MAX_OBSERVATION_CHARS - 3] + "..."
+        return obs_text
+
+    @classmethod
+    def _diagram_box(cls, cell_w: float, cell_h: float) -> Tuple[float, float]:
+        """Space available for the diagram of a cell"""
+        _, usable_h, _, diagram_w, _ = cls._cell_layout(cell_w, cell_h)
+        diagram_padding = 1  # Padding ultra minimal
+        return max(1, diagram_w - 2 * diagram_padding), max(1, usable_h - 2 * diagram_padding)
+
+    @staticmethod
+    def _fit_drawing(drawing, width: float, height: float, max_width: float, max_height: float):
+        # Scale to maintain aspect ratio while maximizing size
+        sx = max_width / width
+        sy = max_height / height
+        s = min(sx, sy)  # Use smaller scale to maintain aspect ratio
+        
+        try:
+            drawing.scale(s, s)
+            drawing.width = width * s
+            drawing.height = height * s
+        except AttributeError:
+            logging.debug("Drawing scale not available")
+        return drawing
+
+    @staticmethod
+    def _convert_elements(elements: list, max_width: float, max_height: float):
+        """Vector drawing built directly from the editor's drawing elements"""
+        drawing = elements_to_drawing(elements)
+        if drawing is None:
+            return None
+        return ('drawing', PDFExporter._fit_drawing(drawing, drawing.width, drawing.height, max_width, max_height))
+
+    @staticmethod
+    def _diagram_sources(v: Vignette):
+        """(kind, content) conversions to try for a vignette, best first"""
+        sources = []
+        if v.drawing_elements:
+            # Éléments de l'éditeur si disponibles : ni SVG à relire, ni svglib
+            sources.append(('elements', v.drawing_elements))
+        if v.diagram:
+            sources.append(('svglib' if SVGLIB_AVAILABLE else 'raster', v.diagram))
+        return sources
+
+    def _prepare_diagrams(self, max_width: float, max_height: float):
+        """Convert the diagrams missing from the cache, in parallel when worthwhile.
+
+        Payloads only go to the cache: each cell fetches its diagram when it
+        is laid out, so memory is bounded by the cache size rather than by the
+        length of the roadbook. Occurrences of each diagram are counted in
+        self._diagram_uses.
+        """
+        jobs = {}
+        self._diagram_uses.clear()
+        for v in self.vignettes:
+            sources = self._diagram_sources(v)
+            if not sources:
+                continue
+            kind, content = sources[0]
+            key = self.cache.key(kind, content, max_width, max_height)
+            self._diagram_uses[key] += 1
+            if self._diagram_uses[key] == 1 and not self.cache.contains(key):
+                jobs[key] = (kind, content, max_width, max_height)
+        self.cache_misses = len(jobs)
+        self.cache_hits = len(self._diagram_uses) - len(jobs)
+        if not jobs:
+            return
+
+        # Les éléments de l'éditeur se convertissent en quelques millisecondes :
+        # seule la lecture des SVG vaut le démarrage des processus
+        svg_jobs = {k: job for k, job in jobs.items() if job[0] != 'elements'}
+        done = set()
+        if self.workers > 1 and len(svg_jobs) >= MIN_PARALLEL_DIAGRAMS:
+            done = self._convert_parallel(svg_jobs, len(jobs))
+        for key, job in jobs.items():
+            if key not in done:
+                self.cache.put(key, convert_diagram(*job))
+                done.add(key)
+                self._report('diagrams', len(done), len(jobs))
+
+    def _convert_parallel(self, jobs: dict, total: int) -> set:
+        """Convert {key: job} in worker processes into the cache; return the keys done.
+
+        Results are stored as they arrive instead of being collected; if the
+        pool fails, the remaining jobs are left to the caller. total is the
+        number of conversions reported to the progress callback.
+        """
+        done = set()
+        workers = min(self.workers, len(jobs))
+        # spawn : pas de fork d'un processus où tourne déjà Qt
+        context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_diagram_worker) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                results = pool.map(convert_diagram, *zip(*jobs.values()), chunksize=chunksize)
+                try:
+                    for key, payload in zip(jobs, results):
+                        self.cache.put(key, payload)
+                        done.add(key)
+                        self._report('diagrams', len(done), total)
+                finally:
+                    # Annulation : les conversions pas encore commencées sont abandonnées
+                    results.close()
+        except (OSError, RuntimeError) as e:
+            # BrokenProcessPool dérive de RuntimeError
+            logging.warning(f"Parallel diagram conversion failed, converting serially: {e}")
+        return done
+
+    def _diagram_entry(self, v: Vignette, max_width: float, max_height: float):
+        """(cache key, payload) of a vignette's diagram, (None, None) if there is none.
+
+        The payload is read from the diagram cache, where _prepare_diagrams
+        left it, and converted again only if it was evicted meanwhile.
+        """
+        for kind, content in self._diagram_sources(v):
+            key = self.cache.key(kind, content, max_width, max_height)
+            payload = self.cache.get_or_convert(
+                key, lambda: convert_diagram(kind, content, max_width, max_height))
+            if payload:
+                return key, payload
+        return None, None
+
+    @staticmethod
+    def _flowable(payload):
+        """Flowable for a conversion payload: ('drawing', Drawing) or ('png', bytes, w, h)"""
+        if not payload:
             return ""
+        if payload[0] == 'drawing':
+            return payload[1]
+        _, png_bytes, width, height = payload
+        return Image(io.BytesIO(png_bytes), width=width, height=height)
+
+    @staticmethod
+    def _convert_diagram(svg_data: str, max_width: float, max_height: float, use_svglib: Optional[bool] = None):
+        """Convert SVG to the largest diagram fitting the available space.
+
+        Returns a picklable payload (see _flowable) or None.
+        """
+        if not svg_data:
+            return None
+        if use_svglib is None:
+            use_svglib = SVGLIB_AVAILABLE
 
         # 1) Vectorial conversion via svglib
-        if SVGLIB_AVAILABLE:
+        if use_svglib:
             try:
                 svg_bytes = io.BytesIO(svg_data.encode('utf-8'))
                 drawing = svg2rlg(svg_bytes)
@@ -298,18 +660,7 @@ class PDFExporter:
                             width = 1.0
                             height = 1.0
                     
-                    # Scale to maintain aspect ratio while maximizing size
-                    sx = max_width / width
-                    sy = max_height / height
-                    s = min(sx, sy)  # Use smaller scale to maintain aspect ratio
-                    
-                    try:
-                        drawing.scale(s, s)
-                        drawing.width = width * s
-                        drawing.height = height * s
-                    except AttributeError:
-                        logging.debug("Drawing scale not available")
-                    return drawing
+                    return ('drawing', PDFExporter._fit_drawing(drawing, width, height, max_width, max_height))
             except (ImportError, ValueError, AttributeError) as e:
                 logging.debug(f"SVG vectorial conversion failed: {e}")
 
@@ -321,7 +672,7 @@ class PDFExporter:
 
             renderer = QSvgRenderer(svg_data.encode('utf-8'))
             if not renderer.isValid():
-                return ""
+                return None
 
             # Render at high resolution to detect content bounds
             temp_size = 1000
@@ -331,21 +682,12 @@ class PDFExporter:
             renderer.render(temp_painter, QRectF(0, 0, temp_size, temp_size))
             temp_painter.end()
             
-            # Find content bounds by scanning for non-white pixels
-            min_x, min_y = temp_size, temp_size
-            max_x, max_y = 0, 0
-            
-            for y in range(temp_size):
-                for x in range(temp_size):
-                    pixel = temp_image.pixel(x, y)
-                    if pixel != 0xFFFFFFFF:  # Not white
-                        min_x = min(min_x, x)
-                        min_y = min(min_y, y)
-                        max_x = max(max_x, x)
-                        max_y = max(max_y, y)
-            
+            bounds = content_bounds(temp_image)
+            if bounds is None:
+                return None
+            min_x, min_y, max_x, max_y = bounds
             if min_x >= max_x or min_y >= max_y:
-                return ""
+                return None
             
             # Minimal margin around content for maximum size
             margin = 2
@@ -392,7 +734,7 @@ class PDFExporter:
             png_bytes = bytes(buf.data())
             buf.close()
             
-            return Image(io.BytesIO(png_bytes), width=target_w, height=target_h)
+            return ('png', png_bytes, target_w, target_h)
         except (ImportError, RuntimeError, OSError) as e:
             logging.debug(f"SVG rasterization failed: {e}")
-            return ""
\ No newline at end of file
+            return None
\ No newline at end of file
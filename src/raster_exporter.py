@@ -0,0 +1,376 @@
+"""Raster export: one image per roadbook page or per vignette, painted directly with Qt.
+
+Pages use the grid of the PDF export (MAX_ROWS_PER_PAGE rows × 1 or 2
+columns, geometry of pdf_canvas.CanvasRenderer) and are painted straight
+into a QImage, without going through a temporary PDF. Pages are independent,
+so they are painted and encoded on a thread pool; QPainter on a QImage is
+safe outside the GUI thread and PyQt releases the GIL while Qt draws.
+
+The vignette mode paints each cell to its own image, at a given pixel
+width, always with the cell geometry of the two-column grid so that the
+image proportions do not depend on the roadbook length, next to an index.json listing the files with their
+distances, for phone and tablet roadbook readers.
+"""
+import json
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QImage, QImageWriter, QPainter, QPen
+from vignette_model import Vignette, cumulative_distances
+from thumbnail_cache import thumbnail_cache
+from pdf_exporter import GREY_SHADES, PDFExporter
+from pdf_canvas import (BLOCK_BOX_WIDTH, BLOCK_GRID_WIDTH, PAGE_GRID_WIDTH, SEPARATOR_WIDTH,
+                        CanvasRenderer)
+
+# Format -> (nom Qt, extension)
+IMAGE_FORMATS = {
+    'jpeg': ('JPEG', '.jpg'),
+    'png': ('PNG', '.png'),
+    'webp': ('WEBP', '.webp'),
+}
+DEFAULT_DPI = 300
+DEFAULT_QUALITY = 95
+DEFAULT_VIGNETTE_WIDTH = 800  # pixels
+INDEX_FILE = 'index.json'
+POINTS_PER_INCH = 72
+# Colonnes de la grille dont les vignettes et tuiles reprennent la case
+CELL_COLUMNS = 2
+FONT_FAMILY = 'Helvetica'
+
+
+class RasterExportError(Exception):
+    """Custom exception for raster export errors"""
+    pass
+
+
+class RasterExporter:
+    """Write a roadbook as JPEG/PNG/WebP images, one per page or one per vignette.
+
+    dpi sets the page resolution (A4 at 300 dpi: 2480 × 3508 pixels),
+    quality the compression (0-100, as QImage.save) and workers the number
+    of images painted at once (default: one per core).
+    """
+
+    def __init__(self, vignettes: List[Vignette], cumul_dists: Optional[List[float]] = None,
+                 image_format: str = 'jpeg', dpi: int = DEFAULT_DPI, quality: int = DEFAULT_QUALITY,
+                 workers: Optional[int] = None):
+        if image_format not in IMAGE_FORMATS:
+            raise RasterExportError(f"Format d'image inconnu : {image_format}")
+        self.vignettes = vignettes
+        self.cumul_dists = cumul_dists if cumul_dists is not None else cumulative_distances(vignettes)
+        self.image_format = image_format
+        self.dpi = dpi
+        self.quality = quality
+        self.workers = workers or os.cpu_count() or 1
+        # Géométrie des pages et des cases du moteur PDF canvas, en points
+        exporter = PDFExporter(vignettes, self.cumul_dists, page_cache=None)
+        self.layout = CanvasRenderer(exporter)
+        # Case des images par vignette et des tuiles : même taille quel que soit le nombre de vignettes
+        self.cell_layout = CanvasRenderer(exporter, columns=CELL_COLUMNS)
+        self.scale = dpi / POINTS_PER_INCH
+
+    def page_count(self) -> int:
+        return math.ceil(len(self.vignettes) / self.layout.per_page)
+
+    def export(self, filename: Optional[str] = None, output_dir: Optional[str] = None) -> List[str]:
+        """Write the pages and return their paths.
+
+        A single page is written to filename; longer roadbooks get one file
+        per page, numbered: roadbook_p01.jpg, roadbook_p02.jpg...
+        """
+        qt_format, extension = self._check_format()
+        output_dir = self._output_dir(output_dir)
+        if filename is None:
+            base_name = f"roadbook_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        else:
+            # Secure path construction
+            base_name = os.path.basename(filename)
+            if base_name.lower().endswith(extension) or (extension == '.jpg' and base_name.lower().endswith('.jpeg')):
+                base_name = os.path.splitext(base_name)[0]
+
+        pages = max(1, self.page_count())
+        if pages == 1:
+            paths = [os.path.join(output_dir, base_name + extension)]
+        else:
+            digits = max(2, len(str(pages)))
+            paths = [os.path.join(output_dir, f"{base_name}_p{i + 1:0{digits}d}{extension}") for i in range(pages)]
+
+        workers = min(self.workers, pages)
+        try:
+            if workers <= 1:
+                for page, path in enumerate(paths):
+                    self._write_page(page, path, qt_format)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # Une image de page par thread en mémoire, pas tout le roadbook
+                    list(pool.map(lambda args: self._write_page(*args, qt_format), enumerate(paths)))
+        except OSError as e:
+            logging.error(f"File system error during raster export: {e}")
+            raise RasterExportError(f"Erreur d'accès fichier lors de l'export en image : {str(e)}")
+        logging.info(f"Raster export: {pages} page(s) at {self.dpi} dpi")
+        return paths
+
+    def export_vignettes(self, name: Optional[str] = None, output_dir: Optional[str] = None,
+                         width: int = DEFAULT_VIGNETTE_WIDTH) -> str:
+        """Write one image per vignette, width pixels wide, and return the path of the index.
+
+        Files go to a folder named after the roadbook, with an index.json
+        giving for each vignette its image, number, distances and
+        observations. Images listed by a previous index and no longer
+        written are removed.
+        """
+        qt_format, extension = self._check_format()
+        output_dir = self._output_dir(output_dir)
+        if name is None:
+            name = f"roadbook_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        folder = os.path.join(output_dir, os.path.splitext(os.path.basename(name))[0])
+        os.makedirs(folder, exist_ok=True)
+
+        layout = self.cell_layout
+        scale = width / layout.col_w
+        size = (max(1, round(width)), max(1, round(layout.row_h * scale)))
+        digits = max(3, len(str(len(self.vignettes))))
+        files = [f"vignette_{i + 1:0{digits}d}{extension}" for i in range(len(self.vignettes))]
+
+        def write(i):
+            self._save(self.paint_vignette(i, size), os.path.join(folder, files[i]), qt_format)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(files)))) as pool:
+                list(pool.map(write, range(len(files))))
+            index_path = os.path.join(folder, INDEX_FILE)
+            self._remove_stale(index_path, set(files))
+            index = {
+                'format': self.image_format,
+                'width': size[0],
+                'height': size[1],
+                'count': len(files),
+                'total_distance': self.cumul_dists[-1] if self.cumul_dists else 0,
+                'vignettes': [{
+                    'file': file,
+                    'num': int(v.num),
+                    'inter_dist': v.inter_dist,
+                    'cumul_dist': cumul,
+                    'observations': v.observations or '',
+                } for file, v, cumul in zip(files, self.vignettes, self.cumul_dists)],
+            }
+            tmp_path = index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            logging.error(f"File system error during vignette export: {e}")
+            raise RasterExportError(f"Erreur d'accès fichier lors de l'export des vignettes : {str(e)}")
+        logging.info(f"Vignette export: {len(files)} image(s) of {size[0]}x{size[1]} px in {folder}")
+        return index_path
+
+    def _check_format(self):
+        """(Qt format name, extension) of the image format, if Qt can write it"""
+        qt_format, extension = IMAGE_FORMATS[self.image_format]
+        if qt_format.lower().encode() not in {bytes(f) for f in QImageWriter.supportedImageFormats()}:
+            raise RasterExportError(f"Format {self.image_format} non pris en charge par cette installation de Qt")
+        return qt_format, extension
+
+    @staticmethod
+    def _output_dir(output_dir: Optional[str]) -> str:
+        if output_dir is None:
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            output_dir = os.path.join(base_dir, 'output')
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
+
+    @staticmethod
+    def _remove_stale(index_path: str, keep: set):
+        """Delete the images of a previous export that the new one does not rewrite"""
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                previous = json.load(f).get('vignettes', [])
+        except (OSError, ValueError, AttributeError):
+            return
+        folder = os.path.dirname(index_path)
+        for entry in previous:
+            file = os.path.basename(str(entry.get('file', '')))
+            if file and file not in keep:
+                try:
+                    os.remove(os.path.join(folder, file))
+                except OSError:
+                    pass
+
+    def _write_page(self, page: int, path: str, qt_format: str):
+        self._save(self.paint_page(page), path, qt_format)
+
+    def _save(self, image: QImage, path: str, qt_format: str):
+        # Écrite à part puis renommée : pas d'image tronquée en cas d'échec
+        tmp_path = f"{path}.tmp"
+        quality = -1 if qt_format == 'PNG' else self.quality
+        if not image.save(tmp_path, qt_format, quality):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise OSError(f"Impossible d'écrire {path}")
+        os.replace(tmp_path, path)
+
+    def paint_vignette(self, index: int, size) -> QImage:
+        """QImage of one vignette cell, framed, scaled to the (width, height) pixel size"""
+        scale = size[0] / self.cell_layout.col_w
+        image = self._blank(size[0], size[1])
+        painter = QPainter(image)
+        try:
+            self._setup(painter, scale)
+            self._paint_framed_cell(painter, index, 0)
+        finally:
+            painter.end()
+        self._set_dpi(image, POINTS_PER_INCH * scale)
+        return image
+
+    def _paint_framed_cell(self, painter, index: int, top: float):
+        """One vignette and its frame, the top-left corner of the cell at (0, top)"""
+        layout = self.cell_layout
+        # Cadre de la case, comme la grille de la page
+        half = PAGE_GRID_WIDTH / 2
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(Qt.black, PAGE_GRID_WIDTH))
+        painter.drawRect(QRectF(half, top + half, layout.col_w - PAGE_GRID_WIDTH, layout.row_h - PAGE_GRID_WIDTH))
+        self._paint_cell(painter, self.vignettes[index], self.cumul_dists[index], 2, top + 2, layout)
+
+    def paint_page(self, page: int) -> QImage:
+        """QImage of one page (0-based)"""
+        layout = self.layout
+        image = self._blank(round(layout.page_width * self.scale), round(layout.page_height * self.scale))
+        start = page * layout.per_page
+        cells = range(start, min(start + layout.per_page, len(self.vignettes)))
+        painter = QPainter(image)
+        try:
+            self._setup(painter, self.scale)
+            self._paint_grid(painter, [(self.vignettes[i], self.cumul_dists[i]) for i in cells])
+        finally:
+            painter.end()
+        self._set_dpi(image, self.dpi)
+        return image
+
+    @staticmethod
+    def _blank(width: int, height: int) -> QImage:
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(Qt.white)
+        # Pendant le dessin, 1 point = 1 unité : tailles de police en points
+        # comme dans le PDF ; la résolution réelle est enregistrée ensuite
+        RasterExporter._set_dpi(image, POINTS_PER_INCH)
+        return image
+
+    @staticmethod
+    def _set_dpi(image: QImage, dpi: float):
+        image.setDotsPerMeterX(round(dpi / 0.0254))
+        image.setDotsPerMeterY(round(dpi / 0.0254))
+
+    @staticmethod
+    def _setup(painter, scale: float):
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.scale(scale, scale)
+
+    def _paint_grid(self, painter, cells: list):
+        """Same placement as CanvasRenderer._draw_page, in Qt coordinates (y down)"""
+        layout = self.layout
+        n_page = len(cells)
+        if not n_page:
+            return
+        rows = math.ceil(n_page / layout.columns)
+        table_h = rows * layout.row_h
+        top = layout.page_height - layout.table_top
+        painter.setClipRect(QRectF(layout.clip_x, top, layout.clip_w, min(layout.clip_max_h, table_h)))
+        for r in range(rows):
+            for c in range(layout.columns):
+                slot = c * rows + r
+                if slot < n_page:
+                    x = layout.table_x + c * layout.col_w + 2
+                    y = top + r * layout.row_h + 2
+                    self._paint_cell(painter, *cells[slot], x, y, layout)
+
+        x0, x1 = layout.table_x, layout.table_x + layout.columns * layout.col_w
+        pen = QPen(Qt.black, PAGE_GRID_WIDTH)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(QRectF(x0, top, x1 - x0, table_h))
+        for r in range(1, rows):
+            painter.drawLine(QPointF(x0, top + r * layout.row_h), QPointF(x1, top + r * layout.row_h))
+        for c in range(1, layout.columns):
+            x = x0 + c * layout.col_w
+            painter.drawLine(QPointF(x, top), QPointF(x, top + table_h))
+
+    def _paint_cell(self, painter, v: Vignette, cumul: float, x: float, y: float, layout: CanvasRenderer):
+        """Draw one vignette with the cell geometry of layout; (x, y) is the top-left corner of its usable area"""
+        painter.save()
+        painter.translate(x, y)
+        usable_h = layout.usable_h
+
+        # Bloc gauche : fonds gris, textes centrés, cadre et grille fine
+        shades = GREY_SHADES[(int(v.num) - 1) % len(GREY_SHADES)]
+        texts = (
+            (layout.num_text, str(int(v.num))),
+            (layout.lab_text, f"Distance int.:\n{int(v.inter_dist)} m"),
+            (layout.lab_text, f"Distance totale:\n{int(cumul)} m"),
+        )
+        block_top = usable_h - layout.block_rows[0][0] - layout.block_rows[0][1]
+        for (row_y, row_h), shade, (block, text) in zip(layout.block_rows, shades, texts):
+            rect = QRectF(2, usable_h - row_y - row_h, layout.left_w, row_h)
+            painter.fillRect(rect, QColor.fromRgbF(shade, shade, shade))
+            painter.setPen(Qt.black)
+            painter.setFont(self._font(block))
+            painter.drawText(rect.adjusted(2, 0, -2, 0), Qt.AlignCenter | Qt.TextWordWrap, text)
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(Qt.black, BLOCK_BOX_WIDTH))
+        painter.drawRect(QRectF(2, block_top, layout.left_w, usable_h - block_top))
+        painter.setPen(QPen(Qt.black, BLOCK_GRID_WIDTH))
+        for row_y, _ in layout.block_rows[:-1]:
+            painter.drawLine(QPointF(2, usable_h - row_y), QPointF(2 + layout.left_w, usable_h - row_y))
+
+        # Colonne observations : titre puis texte, alignés en haut
+        obs_x = layout.obs_x
+        painter.setPen(Qt.black)
+        painter.setFont(self._font(layout.title_text))
+        painter.drawText(QRectF(obs_x + 3, 1, layout.obs_w - 2, layout.obs_hdr_h),
+                         Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap, 'Observations')
+        obs = PDFExporter._observation_text(v)
+        if obs:
+            painter.setFont(self._font(layout.obs_text))
+            painter.drawText(QRectF(obs_x + 3, layout.obs_hdr_h + 1, layout.obs_w - 2,
+                                    usable_h - layout.obs_hdr_h - 1),
+                             Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, obs)
+        painter.setPen(QPen(Qt.black, SEPARATOR_WIDTH))
+        painter.drawLine(QPointF(obs_x, 0), QPointF(obs_x, usable_h))
+
+        self._paint_diagram(painter, v, layout)
+        painter.restore()
+
+    def _paint_diagram(self, painter, v: Vignette, layout: CanvasRenderer):
+        """SVG diagram fitted and centred in its column, rasterized at the page resolution"""
+        svg_data = v.diagram
+        if not svg_data:
+            return
+        max_w, max_h = layout.diagram_box
+        size = thumbnail_cache.svg_size(svg_data)
+        if size.width() <= 0 or size.height() <= 0:
+            return
+        s = min(max_w / size.width(), max_h / size.height())
+        w, h = size.width() * s, size.height() * s
+        # Raster partagé : un schéma répété n'est rendu qu'une fois par taille
+        scale = painter.transform().m11()
+        image = thumbnail_cache.thumbnail(svg_data, max(1, round(w * scale)), max(1, round(h * scale)))
+        if image is None:
+            return
+        x = layout.left_w + (layout.diagram_w - w) / 2
+        y = (layout.usable_h - h) / 2
+        painter.drawImage(QRectF(x, y, w, h), image)
+
+    @staticmethod
+    def _font(block) -> QFont:
+        font = QFont(FONT_FAMILY)
+        font.setStyleHint(QFont.SansSerif)
+        font.setPointSizeF(block.size)
+        font.setBold(block.font.endswith('Bold'))
+        return font
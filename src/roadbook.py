@@ -0,0 +1,203 @@
+"""Command-line entry point: python -m roadbook export fichier.rbk [...]
+
+Exports roadbooks to PDF and/or images (one JPEG, PNG or WebP file per
+page, per vignette or per tile of a zoomable pyramid) without opening the
+main window. Each roadbook is handled by its own worker process (a single
+roadbook has its diagrams converted in parallel instead); Qt runs on the
+offscreen platform so no display is needed.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+FORMATS = ('pdf', 'jpeg', 'png', 'webp')
+# --format all
+ALL_FORMATS = ('pdf', 'jpeg')
+
+_app = None
+
+
+def _init_worker():
+    """Create the offscreen Qt application used by the exporters"""
+    global _app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication(['roadbook'])
+
+
+def export_file(path: str, formats=ALL_FORMATS, output_dir: Optional[str] = None,
+                diagram_workers: Optional[int] = None, pdf_backend: Optional[str] = None,
+                dpi: Optional[int] = None, quality: Optional[int] = None,
+                vignette_width: Optional[int] = None, tile_width: Optional[int] = None,
+                base_name: Optional[str] = None) -> dict:
+    """Export one roadbook; never raises, failures are reported in the result.
+
+    diagram_workers is the number of processes converting the PDF diagrams
+    and of threads painting images (default: one per core); pdf_backend
+    selects the PDF layout engine; dpi and quality apply to the images.
+    With a vignette_width, images are written one per vignette, that many
+    pixels wide, in a folder with an index.json, instead of one per page;
+    with a tile_width, as a tile pyramid of a column that wide (not both).
+    base_name names the outputs (default: the roadbook's file name).
+    """
+    if _app is None:
+        _init_worker()
+    from roadbook_io import load_roadbook
+    from vignette_model import cumulative_distances
+
+    result = {'file': path, 'outputs': [], 'timings': {}, 'error': None}
+    start = time.perf_counter()
+    try:
+        if vignette_width and tile_width:
+            raise ValueError("Export par vignette et en tuiles incompatibles : choisir l'un des deux")
+        vignettes = load_roadbook(path)
+        cumul_dists = cumulative_distances(vignettes)
+        result['timings']['load'] = time.perf_counter() - start
+        base_name = base_name or _base_name(path)
+        out_dir = output_dir or os.path.dirname(os.path.abspath(path))
+        for fmt in formats:
+            t = time.perf_counter()
+            if fmt == 'pdf':
+                from pdf_exporter import PDFExporter
+                out = PDFExporter(vignettes, cumul_dists, workers=diagram_workers).export(
+                    base_name + '.pdf', out_dir, backend=pdf_backend)
+                result['outputs'].append(out)
+            else:
+                from raster_exporter import RasterExporter, DEFAULT_DPI, DEFAULT_QUALITY
+                if tile_width:
+                    from tile_exporter import TileExporter as exporter_class
+                else:
+                    exporter_class = RasterExporter
+                exporter = exporter_class(vignettes, cumul_dists, fmt, dpi or DEFAULT_DPI,
+                                          DEFAULT_QUALITY if quality is None else quality,
+                                          workers=diagram_workers)
+                if tile_width:
+                    result['outputs'].append(exporter.export_tiles(base_name, out_dir, tile_width))
+                elif vignette_width:
+                    result['outputs'].append(exporter.export_vignettes(base_name, out_dir, vignette_width))
+                else:
+                    result['outputs'].extend(exporter.export(base_name, out_dir))
+            result['timings'][fmt] = time.perf_counter() - t
+    except Exception as e:
+        logging.debug(f"Export failed for {path}: {e}", exc_info=True)
+        result['error'] = str(e)
+    result['timings']['total'] = time.perf_counter() - start
+    return result
+
+
+def _base_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _output_names(paths: List[str], output_dir: Optional[str]) -> List[str]:
+    """Output base name of each roadbook, numbered when two would write to the same place"""
+    names = []
+    taken = set()
+    for path in paths:
+        out_dir = os.path.abspath(output_dir or os.path.dirname(os.path.abspath(path)))
+        name = _base_name(path)
+        n = 1
+        while os.path.normcase(os.path.join(out_dir, name)) in taken:
+            n += 1
+            name = f"{_base_name(path)}_{n}"
+        if n > 1:
+            logging.warning(f"{path}: same name as another roadbook, exported as {name}")
+        taken.add(os.path.normcase(os.path.join(out_dir, name)))
+        names.append(name)
+    return names
+
+
+def export_files(paths: List[str], formats=ALL_FORMATS, output_dir: Optional[str] = None,
+                 jobs: Optional[int] = None, on_result=None, pdf_backend: Optional[str] = None,
+                 dpi: Optional[int] = None, quality: Optional[int] = None,
+                 vignette_width: Optional[int] = None, tile_width: Optional[int] = None) -> List[dict]:
+    """Export several roadbooks, one per worker process.
+
+    A worker that dies (BrokenProcessPool) fails the roadbooks it had not
+    finished, each reported in its own result like any other failure.
+    """
+    jobs = jobs or min(len(paths), os.cpu_count() or 1)
+    names = _output_names(paths, output_dir)
+    options = dict(pdf_backend=pdf_backend, dpi=dpi, quality=quality, vignette_width=vignette_width,
+                   tile_width=tile_width)
+    if jobs <= 1:
+        results = []
+        for path, name in zip(paths, names):
+            results.append(export_file(path, formats, output_dir, base_name=name, **options))
+            if on_result:
+                on_result(results[-1])
+        return results
+    results = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        # Les cœurs sont déjà occupés par les fichiers : schémas et pages traités sur place
+        futures = {pool.submit(export_file, path, formats, output_dir, 1, base_name=name, **options): i
+                   for i, (path, name) in enumerate(zip(paths, names))}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.debug(f"Export worker failed for {paths[i]}: {e}", exc_info=True)
+                result = {'file': paths[i], 'outputs': [], 'timings': {},
+                          'error': f"processus d'export interrompu ({type(e).__name__}: {e})"}
+            results[i] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def _print_result(result):
+    timings = ', '.join(f"{k} {v:.2f}s" for k, v in result['timings'].items())
+    if result['error']:
+        print(f"ÉCHEC  {result['file']} : {result['error']} ({timings})")
+    else:
+        print(f"OK     {result['file']} -> {', '.join(result['outputs'])} ({timings})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m roadbook', description="Outils du Road Book")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="exporter des roadbooks en PDF ou en images")
+    export.add_argument('files', nargs='+', help="fichiers .rbk")
+    export.add_argument('--format', choices=FORMATS + ('all',), default='pdf',
+                        help="format de sortie (défaut : pdf ; all : pdf et jpeg) ; "
+                             "les images comptent un fichier par page")
+    export.add_argument('-o', '--output-dir',
+                        help="dossier de sortie (défaut : à côté de chaque fichier)")
+    export.add_argument('-j', '--jobs', type=int,
+                        help="nombre de processus (défaut : un par cœur)")
+    export.add_argument('--pdf-backend', choices=('platypus', 'canvas'),
+                        help="moteur PDF : mise en page par tableaux (défaut) ou dessin direct, plus rapide")
+    export.add_argument('--dpi', type=int, help="résolution des images (défaut : 300)")
+    export.add_argument('--quality', type=int, help="qualité JPEG/WebP, de 0 à 100 (défaut : 95)")
+    layout = export.add_mutually_exclusive_group()
+    layout.add_argument('--per-vignette', metavar='LARGEUR', type=int, nargs='?', const=800,
+                        help="une image par vignette, de LARGEUR pixels (défaut : 800), "
+                             "avec un index.json des distances, au lieu d'une image par page ; "
+                             "formats image seulement (avec --format all, le PDF reste inchangé)")
+    layout.add_argument('--tiles', metavar='LARGEUR', type=int, nargs='?', const=1024,
+                        help="pyramide de tuiles de 256 px pour une visionneuse zoomable, colonne de "
+                             "LARGEUR pixels (défaut : 1024) ; seules les tuiles modifiées sont réécrites ; "
+                             "formats image seulement (avec --format all, le PDF reste inchangé)")
+    args = parser.parse_args(argv)
+    if args.format == 'pdf' and (args.per_vignette is not None or args.tiles is not None):
+        export.error("--per-vignette et --tiles ne s'appliquent qu'aux images, pas à --format pdf")
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    formats = ALL_FORMATS if args.format == 'all' else (args.format,)
+    start = time.perf_counter()
+    results = export_files(args.files, formats, args.output_dir, args.jobs, _print_result,
+                           pdf_backend=args.pdf_backend, dpi=args.dpi, quality=args.quality,
+                           vignette_width=args.per_vignette, tile_width=args.tiles)
+    failed = [r for r in results if r['error']]
+    print(f"{len(results) - len(failed)}/{len(results)} roadbook(s) exporté(s) "
+          f"en {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,662 @@
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+import weakref
+import zlib
+from typing import List, Optional
+from vignette_model import Vignette
+
+# Champs chargés immédiatement : ils forment l'index affiché dans le tableau
+INDEX_FIELDS = ('num', 'inter_dist', 'observations')
+# Champs lourds, laissés sur disque jusqu'au premier accès
+PAYLOAD_FIELDS = ('diagram', 'drawing_elements')
+
+_WS = re.compile(rb'[ \t\n\r]*')
+_STRING_RE = rb'"(?:[^"\\]|\\.)*"'
+_STRING = re.compile(_STRING_RE, re.S)
+_SCALAR = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+# Tout ce qui n'est pas une accolade/un crochet, chaînes comprises. Le motif ne peut
+# pas échouer (répétition vide acceptée), il n'y a donc jamais de retour arrière
+_NON_BRACKET_RUN = re.compile(rb'(?:[^\[\]{}"]+|' + _STRING_RE + rb')*', re.S)
+
+
+def _balanced_pattern(depth: int) -> bytes:
+    # (?=(?P<n>X))(?P=n) émule un groupe atomique : X est essayé une seule fois, sans
+    # retour arrière, et un échec (valeur tronquée) se constate en temps linéaire
+    inner = rb'(?:[^\[\]{}"]|' + _STRING_RE + rb')*'
+    for level in range(1, depth):
+        inner = (rb'(?=(?P<l%d>(?:[^\[\]{}"]+|' % level + _STRING_RE + rb'|[\[{]' + inner
+                 + rb'[\]}])*))(?P=l%d)' % level)
+    return rb'[\[{]' + inner + rb'[\]}]'
+
+
+# Objets/tableaux imbriqués jusqu'à 6 niveaux (drawing_elements en a 4), sautés en C
+_BALANCED = re.compile(_balanced_pattern(6), re.S)
+
+# Format v2 : en-tête puis enregistrements (tag, longueur, crc32) compressés, ajoutés en fin de fichier
+MAGIC = b'RBK2\r\n\x1a\n'
+_RECORD = struct.Struct('<4sII')
+TAG_PAYLOAD = b'VIGN'
+TAG_MANIFEST = b'MANI'
+# Compactage quand plus de la moitié du fichier n'est plus référencée
+COMPACT_RATIO = 0.5
+
+
+class RoadbookFormatError(ValueError):
+    """Raised when a .rbk file cannot be parsed"""
+    pass
+
+
+# Poignées sur disque encore référencées (vignettes, instantanés) : commit_save
+# lit en mémoire celles d'un fichier qu'il va remplacer
+_handles = weakref.WeakSet()
+_handles_lock = threading.Lock()
+
+
+def _track(handle):
+    with _handles_lock:
+        _handles.add(handle)
+    return handle
+
+
+def _pin_handles(path: str, keep=()):
+    """Read into memory the handles on path that outlive its replacement.
+
+    keep holds the ids of the handles on the new content, left as they are.
+    """
+    with _handles_lock:
+        handles = [h for h in _handles if h.data is None and id(h) not in keep and _same_file(h.path, path)]
+    if not handles:
+        return
+    logging.info(f"Keeping {len(handles)} record(s) of {path} in memory for open snapshots")
+    for handle in handles:
+        try:
+            handle.pin()
+        except (OSError, RoadbookFormatError) as e:
+            # Déjà illisible : l'erreur sera signalée au premier accès
+            logging.warning(f"Cannot keep record of {path} at offset {handle.start}: {e}")
+
+
+class JsonSpan:
+    """Lazy handle on a JSON value stored at [start, end) in a file.
+
+    The file signature (size, mtime) is checked on access so that a file
+    replaced behind our back is reported instead of returning garbage.
+    """
+
+    __slots__ = ('path', 'start', 'end', 'signature', 'data', '__weakref__')
+
+    def __init__(self, path: str, start: int, end: int, signature):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.signature = signature
+        self.data = None
+        _track(self)
+
+    def read_raw(self) -> bytes:
+        if self.data is None and _file_signature(self.path) == self.signature:
+            with open(self.path, 'rb') as f:
+                f.seek(self.start)
+                raw = f.read(self.end - self.start)
+            if _file_signature(self.path) == self.signature:
+                return raw
+        # Fichier remplacé entre-temps : la valeur a pu être gardée en mémoire juste avant
+        if self.data is None:
+            raise RoadbookFormatError(f"Le fichier a été modifié depuis son ouverture : {self.path}")
+        return self.data
+
+    def pin(self):
+        """Keep the value in memory; the file may then be replaced"""
+        self.data = self.read_raw()
+
+    def __call__(self):
+        return json.loads(self.read_raw())
+
+
+def _file_signature(path: str):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+# -- Lecture paresseuse du format v1 (JSON) ------------------------------------
+
+def _skip_ws(buf, pos: int) -> int:
+    return _WS.match(buf, pos).end()
+
+
+def _expect(buf, pos: int, char: bytes) -> int:
+    if buf[pos:pos + 1] != char:
+        raise RoadbookFormatError(f"'{char.decode()}' attendu à la position {pos}")
+    return pos + 1
+
+
+def _skip_value(buf, pos: int) -> int:
+    """Return the end offset of the JSON value starting at pos, without decoding it"""
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        m = _STRING.match(buf, pos)
+    elif first in (b'{', b'['):
+        m = _BALANCED.match(buf, pos)
+        if m is None:
+            # Plus profond que _BALANCED, ou mal formé : le décompte situe l'erreur
+            return _skip_nested(buf, pos)
+    else:
+        m = _SCALAR.match(buf, pos)
+    if m is None:
+        raise RoadbookFormatError(f"Valeur JSON invalide à la position {pos}")
+    return m.end()
+
+
+def _skip_nested(buf, pos: int) -> int:
+    """Bracket counting fallback for values nested deeper than _BALANCED allows"""
+    depth = 0
+    while True:
+        char = buf[pos:pos + 1]
+        if char in (b'{', b'['):
+            depth += 1
+        elif char in (b'}', b']'):
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        elif char == b'"':
+            # La regex s'arrête avant une chaîne non terminée
+            raise RoadbookFormatError(f"Chaîne non terminée à la position {pos}")
+        else:
+            raise RoadbookFormatError("Fin de fichier inattendue")
+        # Une itération par accolade/crochet : les chaînes sont sautées par la regex
+        pos = _NON_BRACKET_RUN.match(buf, pos + 1).end()
+
+
+def _parse_object(buf, pos: int, on_member) -> int:
+    """Walk the JSON object starting at pos and return its end offset.
+
+    on_member(key, value_start) may parse the value itself and return its end
+    offset; when it returns None the value is skipped without being decoded.
+    """
+    pos = _skip_ws(buf, _expect(buf, _skip_ws(buf, pos), b'{'))
+    if buf[pos:pos + 1] == b'}':
+        return pos + 1
+    while True:
+        key_end = _skip_value(buf, pos)
+        key = json.loads(buf[pos:key_end])
+        pos = _skip_ws(buf, _expect(buf, _skip_ws(buf, key_end), b':'))
+        value_end = on_member(key, pos)
+        if value_end is None:
+            value_end = _skip_value(buf, pos)
+        pos = _skip_ws(buf, value_end)
+        if buf[pos:pos + 1] == b'}':
+            return pos + 1
+        pos = _skip_ws(buf, _expect(buf, pos, b','))
+
+
+def _parse_array(buf, pos: int, on_item) -> int:
+    """Walk the JSON array starting at pos; on_item(start) returns the item end"""
+    pos = _skip_ws(buf, _expect(buf, pos, b'['))
+    if buf[pos:pos + 1] == b']':
+        return pos + 1
+    while True:
+        pos = _skip_ws(buf, on_item(pos))
+        if buf[pos:pos + 1] == b']':
+            return pos + 1
+        pos = _skip_ws(buf, _expect(buf, pos, b','))
+
+
+def _load_v1(path: str) -> List[Vignette]:
+    signature = _file_signature(path)
+    vignettes = []
+    with open(path, 'rb') as f:
+        if signature[0] == 0:
+            raise RoadbookFormatError("Fichier vide")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+
+            def on_vignette(start):
+                index = {}
+                spans = {}
+
+                def on_field(field, f_start):
+                    if field in INDEX_FIELDS:
+                        f_end = _skip_value(buf, f_start)
+                        index[field] = json.loads(buf[f_start:f_end])
+                        return f_end
+                    if field in PAYLOAD_FIELDS:
+                        f_end = _skip_value(buf, f_start)
+                        spans[field] = (f_start, f_end)
+                        return f_end
+                    return None
+
+                end = _parse_object(buf, start, on_field)
+                vignettes.append(_make_vignette(path, buf, index, spans, signature))
+                return end
+
+            def on_root(key, start):
+                if key == 'vignettes':
+                    return _parse_array(buf, start, on_vignette)
+                return None
+
+            pos = 3 if buf[:3] == b'\xef\xbb\xbf' else 0  # BOM UTF-8 éventuel
+            _parse_object(buf, pos, on_root)
+    return vignettes
+
+
+def _make_vignette(path, buf, index, spans, signature) -> Vignette:
+    vignette = Vignette(
+        num=index['num'],
+        inter_dist=index['inter_dist'],
+        observations=index['observations']
+    )
+    diagram_span = spans.get('diagram')
+    # Un schéma vide ou null est résolu tout de suite, comme avant
+    if diagram_span and buf[diagram_span[0]:diagram_span[0] + 2] not in (b'""', b'nu'):
+        vignette.set_lazy('diagram', JsonSpan(path, *diagram_span, signature))
+        if 'drawing_elements' in spans:
+            vignette.set_lazy('drawing_elements', JsonSpan(path, *spans['drawing_elements'], signature))
+    return vignette
+
+
+# -- Format v2 (conteneur par enregistrements) ---------------------------------
+
+class ChunkRef:
+    """Position of a payload record (diagram + drawing elements) in a v2 file.
+
+    crc is the checksum of the record expected at that position (None for
+    files written before it was stored in the manifest). A record pinned in
+    memory (data) no longer depends on the file, which may be replaced.
+    """
+
+    __slots__ = ('path', 'offset', 'length', 'crc', 'data', '__weakref__')
+
+    def __init__(self, path: str, offset: int, length: int, crc: Optional[int] = None):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.crc = crc
+        self.data = None
+        _track(self)
+
+    @property
+    def start(self) -> int:
+        return self.offset
+
+    def read_raw(self) -> bytes:
+        """Header and compressed payload, checked against the stored crc"""
+        raw = self.data
+        if raw is not None:
+            return raw
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            raw = f.read(self.length)
+        try:
+            _check_record(raw, TAG_PAYLOAD, self.crc)
+        except RoadbookFormatError:
+            # Fichier remplacé pendant la lecture : l'enregistrement vient d'être gardé en mémoire
+            if self.data is None:
+                raise
+            return self.data
+        return raw
+
+    def pin(self, source: Optional[str] = None):
+        """Keep the record in memory, read from source (default: path)"""
+        with open(source or self.path, 'rb') as f:
+            f.seek(self.offset)
+            raw = f.read(self.length)
+        _check_record(raw, TAG_PAYLOAD, self.crc)
+        self.data = raw
+
+    def load(self) -> dict:
+        return json.loads(zlib.decompress(self.read_raw()[_RECORD.size:]))
+
+
+class ChunkField:
+    """Lazy handle on one field of a payload record"""
+
+    __slots__ = ('ref', 'name')
+
+    def __init__(self, ref: ChunkRef, name: str):
+        self.ref = ref
+        self.name = name
+
+    def __call__(self):
+        value = self.ref.load().get(self.name)
+        if value is None and self.name == 'drawing_elements':
+            return []
+        return value
+
+
+def _check_record(raw: bytes, tag: bytes, expected_crc: Optional[int] = None):
+    if len(raw) < _RECORD.size:
+        raise RoadbookFormatError("Enregistrement tronqué")
+    found, length, crc = _RECORD.unpack_from(raw)
+    data = raw[_RECORD.size:]
+    if found != tag or len(data) != length or zlib.crc32(data) != crc:
+        raise RoadbookFormatError("Enregistrement corrompu")
+    # Un enregistrement valide, mais pas celui attendu (position périmée)
+    if expected_crc is not None and crc != expected_crc:
+        raise RoadbookFormatError("Enregistrement inattendu à cette position")
+
+
+def _write_record(f, path: str, tag: bytes, data: bytes) -> ChunkRef:
+    """Append a compressed record; path is the final name of the file being written"""
+    compressed = zlib.compress(data)
+    offset = f.tell()
+    crc = zlib.crc32(compressed)
+    f.write(_RECORD.pack(tag, len(compressed), crc))
+    f.write(compressed)
+    return ChunkRef(path, offset, _RECORD.size + len(compressed), crc)
+
+
+def _scan_records(f):
+    """List (tag, offset, length) of complete records.
+
+    Scanning stops at the first incomplete record, which is what an
+    interrupted append leaves behind.
+    """
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    pos = len(MAGIC)
+    records = []
+    while pos + _RECORD.size <= size:
+        f.seek(pos)
+        tag, length, _ = _RECORD.unpack(f.read(_RECORD.size))
+        end = pos + _RECORD.size + length
+        if tag not in (TAG_PAYLOAD, TAG_MANIFEST) or end > size:
+            break
+        records.append((tag, pos, _RECORD.size + length))
+        pos = end
+    return records
+
+
+def _read_manifest(f, records):
+    """Return (manifest, end offset) of the last valid manifest"""
+    for tag, offset, length in reversed(records):
+        if tag != TAG_MANIFEST:
+            continue
+        f.seek(offset)
+        raw = f.read(length)
+        try:
+            _check_record(raw, TAG_MANIFEST)
+        except RoadbookFormatError:
+            logging.warning(f"Skipping damaged manifest at offset {offset}")
+            continue
+        return json.loads(zlib.decompress(raw[_RECORD.size:])), offset + length
+    raise RoadbookFormatError("Aucun manifeste valide")
+
+
+def is_v2(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _load_v2(path: str) -> List[Vignette]:
+    with open(path, 'rb') as f:
+        manifest, _ = _read_manifest(f, _scan_records(f))
+    vignettes = []
+    for entry in manifest['vignettes']:
+        vignette = Vignette(
+            num=entry['num'],
+            inter_dist=entry['inter_dist'],
+            observations=entry['observations']
+        )
+        if entry.get('payload'):
+            ref = ChunkRef(path, *entry['payload'])
+            for name in PAYLOAD_FIELDS:
+                vignette.set_lazy(name, ChunkField(ref, name))
+            vignette.stored_payload = ref
+        vignettes.append(vignette)
+    return vignettes
+
+
+def read_meta(path: str) -> dict:
+    """Application metadata stored in the manifest of a v2 file ({} otherwise)"""
+    if not os.path.exists(path) or not is_v2(path):
+        return {}
+    with open(path, 'rb') as f:
+        manifest, _ = _read_manifest(f, _scan_records(f))
+    return manifest.get('meta') or {}
+
+
+def _bind_payload(vignette: Vignette, ref: ChunkRef):
+    """Point the vignette at its record; fields not loaded yet stay lazy"""
+    for name in PAYLOAD_FIELDS:
+        if not vignette.is_loaded(name):
+            vignette.set_lazy(name, ChunkField(ref, name))
+    vignette.stored_payload = ref
+
+
+def _has_payload(vignette: Vignette) -> bool:
+    # Un schéma encore sur disque n'est jamais vide : inutile de le charger pour le savoir
+    if vignette.stored_payload is not None or not vignette.is_loaded('diagram'):
+        return True
+    return bool(vignette.diagram)
+
+
+def _same_file(a: str, b: str) -> bool:
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def _write_payloads(f, path: str, vignettes: List[Vignette], reuse_in_place: bool, meta=None):
+    """Write missing payload records and return the manifest and new refs"""
+    entries = []
+    written = []
+    for v in vignettes:
+        ref = v.stored_payload
+        # Un enregistrement gardé en mémoire n'est plus dans le fichier actuel
+        if ref is not None and reuse_in_place and ref.data is None and _same_file(ref.path, path):
+            new_ref = ref
+        elif ref is not None:
+            # Copie brute de l'enregistrement : ni décompression ni recompression
+            offset = f.tell()
+            raw = ref.read_raw()
+            f.write(raw)
+            new_ref = ChunkRef(path, offset, ref.length, _RECORD.unpack_from(raw)[2])
+        elif _has_payload(v):
+            data = json.dumps({name: v.peek(name) for name in PAYLOAD_FIELDS},
+                              ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            new_ref = _write_record(f, path, TAG_PAYLOAD, data)
+        else:
+            new_ref = None
+        entries.append({
+            'num': v.num,
+            'inter_dist': v.inter_dist,
+            'observations': v.observations,
+            'payload': [new_ref.offset, new_ref.length, new_ref.crc] if new_ref else None
+        })
+        written.append(new_ref)
+    manifest = {'format': 'rbk', 'version': 2, 'vignettes': entries}
+    if meta:
+        manifest['meta'] = meta
+    _write_record(f, path, TAG_MANIFEST, json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return manifest, written
+
+
+def _rebind(vignettes: List[Vignette], refs, versions):
+    for v, ref, version in zip(vignettes, refs, versions):
+        # Un schéma modifié depuis l'écriture garde son contenu en mémoire
+        if v.payload_version != version:
+            continue
+        if ref is None:
+            v.stored_payload = None
+        elif ref is not v.stored_payload:
+            _bind_payload(v, ref)
+
+
+class PendingSave:
+    """Result of the write phase of a save, applied with commit_save.
+
+    The write phase only reads the vignettes and may run on any thread; the
+    commit renames the file and rebinds the lazy handles, and must run on the
+    thread that uses the vignettes.
+    """
+
+    def __init__(self, path: str, tmp_path: Optional[str], refs, versions, size: int):
+        self.path = path
+        self.tmp_path = tmp_path
+        self.refs = refs
+        self.versions = versions
+        self.size = size
+
+    @property
+    def incremental(self) -> bool:
+        return self.tmp_path is None
+
+    @property
+    def needs_compaction(self) -> bool:
+        live = sum(ref.length for ref in self.refs if ref is not None)
+        return self.size > len(MAGIC) and (self.size - live) / self.size > COMPACT_RATIO
+
+
+def prepare_save(path: str, vignettes: List[Vignette], incremental: bool = False,
+                 meta: Optional[dict] = None) -> PendingSave:
+    """Write phase of a save.
+
+    Incremental: append the changed payloads and a new manifest to an existing
+    v2 file. Records already referenced stay valid, so lazy handles pointing
+    at the file are not disturbed. Otherwise (or when path is not a v2 file)
+    write a compact copy to a temporary file that commit_save renames over path.
+    meta is stored in the manifest (see read_meta).
+    """
+    versions = [v.payload_version for v in vignettes]
+    if incremental and os.path.exists(path) and is_v2(path):
+        with open(path, 'r+b') as f:
+            records = _scan_records(f)
+            end = records[-1][1] + records[-1][2] if records else len(MAGIC)
+            # Ignorer un éventuel enregistrement incomplet laissé par une interruption
+            f.truncate(end)
+            f.seek(end)
+            _, refs = _write_payloads(f, path, vignettes, reuse_in_place=True, meta=meta)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        return PendingSave(path, None, refs, versions, size)
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            _, refs = _write_payloads(f, path, vignettes, reuse_in_place=False, meta=meta)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return PendingSave(path, tmp_path, refs, versions, size)
+
+
+def commit_save(pending: PendingSave, vignettes: List[Vignette]):
+    """Apply a prepared save; vignettes are the live objects matching the written ones.
+
+    Before a full save replaces the file, the records of the old one still
+    referenced elsewhere (snapshots being exported or auto-saved, payloads
+    not rebound) are read into memory, so they stay readable afterwards.
+    """
+    _rebind(vignettes, pending.refs, pending.versions)
+    if pending.tmp_path is None:
+        return
+    new_refs = [ref for ref in pending.refs if ref is not None]
+    _pin_handles(pending.path, {id(ref) for ref in new_refs})
+    try:
+        os.replace(pending.tmp_path, pending.path)
+    except OSError:
+        # Les vignettes pointent déjà sur le nouveau contenu, resté dans le fichier temporaire
+        for ref in new_refs:
+            ref.pin(pending.tmp_path)
+        raise
+
+
+def discard_save(pending: PendingSave):
+    """Drop a prepared save that will not be committed"""
+    if pending.tmp_path is not None and os.path.exists(pending.tmp_path):
+        os.remove(pending.tmp_path)
+
+
+# -- API publique --------------------------------------------------------------
+
+def load_roadbook(path: str) -> List[Vignette]:
+    """Load a .rbk file (v1 JSON or v2 container).
+
+    Only the vignette index (num, inter_dist, observations) is decoded;
+    diagrams and drawing elements stay on disk as lazy handles resolved on
+    first access.
+    """
+    try:
+        vignettes = _load_v2(path) if is_v2(path) else _load_v1(path)
+    except (RoadbookFormatError, ValueError, KeyError, zlib.error) as e:
+        raise RoadbookFormatError(f"Fichier roadbook invalide : {e}")
+    logging.info(f"Roadbook index loaded: {path} ({len(vignettes)} vignettes)")
+    return vignettes
+
+
+def save_roadbook(path: str, vignettes: List[Vignette], meta: Optional[dict] = None):
+    """Save vignettes to a .rbk file in the v2 format.
+
+    The file is written next to the target and renamed over it, so an
+    interruption never leaves a half-written roadbook. Unchanged payloads are
+    copied as-is from the file they were loaded from.
+    """
+    commit_save(prepare_save(path, vignettes, meta=meta), vignettes)
+
+
+def update_roadbook(path: str, vignettes: List[Vignette]) -> bool:
+    """Append the changed payloads and a new manifest to an existing v2 file.
+
+    Each vignette whose diagram is unchanged keeps its record, so the cost
+    depends on the edit, not on the roadbook size. Falls back to a full save
+    (which also compacts the file) when path is not a v2 file or when most of
+    it is no longer referenced. Returns True when the update was incremental.
+    """
+    pending = prepare_save(path, vignettes, incremental=True)
+    commit_save(pending, vignettes)
+    if pending.incremental and pending.needs_compaction:
+        logging.info(f"Compacting roadbook {path} ({pending.size} bytes)")
+        save_roadbook(path, vignettes)
+    return pending.incremental
+
+
+def upgrade_roadbook(path: str, backup: bool = True) -> bool:
+    """Convert a v1 JSON roadbook to the v2 format in place.
+
+    The original file is kept as <path>.v1.bak unless backup is False.
+    Returns False when the file already uses the v2 format.
+    """
+    if is_v2(path):
+        return False
+    vignettes = load_roadbook(path)
+    if backup:
+        shutil.copy2(path, path + '.v1.bak')
+    save_roadbook(path, vignettes)
+    logging.info(f"Roadbook upgraded to v2: {path}")
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Conversion des fichiers roadbook (.rbk)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    upgrade = sub.add_parser('upgrade', help="convertir des fichiers v1 (JSON) au format v2")
+    upgrade.add_argument('files', nargs='+')
+    upgrade.add_argument('--no-backup', action='store_true', help="ne pas conserver de copie .v1.bak")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.files:
+        try:
+            if upgrade_roadbook(path, backup=not args.no_backup):
+                print(f"{path} : converti au format v2")
+            else:
+                print(f"{path} : déjà au format v2")
+        except (OSError, RoadbookFormatError) as e:
+            print(f"{path} : échec de la conversion ({e})")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""Startup-time report, enabled with the ROADBOOK_STARTUP_PROFILE variable.
+
+ROADBOOK_STARTUP_PROFILE=1 logs the report once the window is painted;
+any other value is used as the path of a JSON file receiving the report.
+The report lists the init phases and the slowest imports (self time, i.e.
+without the modules they import themselves).
+"""
+import builtins
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ENV_VAR = 'ROADBOOK_STARTUP_PROFILE'
+TOP_IMPORTS = 15
+
+_start = time.perf_counter()
+_enabled = False
+_phases = []    # (nom, début, durée) en secondes depuis le lancement
+_imports = {}   # module -> [durée totale, durée propre]
+_stack = []
+_reported = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def install():
+    """Start profiling if the environment variable is set (no-op otherwise)"""
+    global _enabled
+    if _enabled or not os.environ.get(ENV_VAR):
+        return
+    _enabled = True
+    original_import = builtins.__import__
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        # Seuls les modules réellement chargés sont mesurés
+        if level or name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+        _stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += total
+            entry = _imports.setdefault(name, [0.0, 0.0])
+            entry[0] += total
+            entry[1] += total - children
+
+    builtins.__import__ = timed_import
+
+
+@contextmanager
+def phase(name: str):
+    """Time an init phase"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, start - _start, time.perf_counter() - start))
+
+
+def mark(name: str):
+    """Record an instant (e.g. first paint) relative to the launch"""
+    if _enabled:
+        _phases.append((name, time.perf_counter() - _start, 0.0))
+
+
+def report() -> dict:
+    """Log (or write) the report once; returns it"""
+    global _reported
+    if not _enabled or _reported:
+        return {}
+    _reported = True
+    slowest = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)[:TOP_IMPORTS]
+    data = {
+        'total': time.perf_counter() - _start,
+        'phases': [{'name': n, 'at': at, 'duration': d} for n, at, d in _phases],
+        'imports': [{'module': m, 'total': t, 'self': s} for m, (t, s) in slowest],
+    }
+    target = os.environ.get(ENV_VAR)
+    if target not in ('1', 'true', 'yes'):
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    lines = [f"Startup profile ({data['total'] * 1000:.0f} ms)"]
+    for p in data['phases']:
+        lines.append(f"  phase  {p['name']:28s} at {p['at'] * 1000:7.1f} ms  {p['duration'] * 1000:7.1f} ms")
+    for i in data['imports']:
+        lines.append(f"  import {i['module']:28s} self {i['self'] * 1000:7.1f} ms  total {i['total'] * 1000:7.1f} ms")
+    logging.info('\n'.join(lines))
+    return data
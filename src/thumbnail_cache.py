@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from PyQt5.QtCore import QByteArray, QRectF, QSize
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtSvg import QSvgRenderer
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 Mo d'images en mémoire
+
+
+def svg_hash(svg_data: str) -> str:
+    """Content hash used to identify a diagram independently of its vignette"""
+    return hashlib.sha1(svg_data.encode('utf-8')).hexdigest()
+
+
+def render_svg_image(svg_data: str, width: int, height: int, dpr: float = 1.0) -> Optional[QImage]:
+    """Rasterize an SVG string on a white background.
+
+    Uses QImage only, so it is safe to call outside the GUI thread.
+    Returns None when the SVG cannot be parsed.
+    """
+    renderer = QSvgRenderer(QByteArray(svg_data.encode('utf-8')))
+    if not renderer.isValid():
+        return None
+    img = QImage(max(1, round(width * dpr)), max(1, round(height * dpr)), QImage.Format_ARGB32)
+    img.setDevicePixelRatio(dpr)
+    img.fill(0xFFFFFFFF)  # Fond blanc au lieu de transparent
+    painter = QPainter(img)
+    try:
+        painter.setRenderHint(QPainter.Antialiasing)
+        renderer.render(painter, QRectF(0, 0, width, height))
+    finally:
+        painter.end()
+    return img
+
+
+class ThumbnailCache:
+    """Process-wide LRU cache of rasterized diagrams.
+
+    Entries are keyed by (content hash, width, height, devicePixelRatio) and
+    evicted in least-recently-used order once the total image size exceeds
+    max_bytes. The cache is thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(svg_data: str, width: int, height: int, dpr: float = 1.0) -> Tuple:
+        return ThumbnailCache.hash_key(svg_hash(svg_data), width, height, dpr)
+
+    @staticmethod
+    def hash_key(digest: str, width: int, height: int, dpr: float = 1.0) -> Tuple:
+        """Same key as key(), from an svg_hash already computed"""
+        return (digest, int(width), int(height), float(dpr))
+
+    def get(self, key) -> Optional[QImage]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image: QImage):
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._bytes -= old.sizeInBytes()
+            self._images[key] = image
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= evicted.sizeInBytes()
+                self.evictions += 1
+
+    def thumbnail(self, svg_data: str, width: int, height: int, dpr: float = 1.0) -> Optional[QImage]:
+        """Return the cached raster of svg_data, rendering it on a miss"""
+        key = self.key(svg_data, width, height, dpr)
+        image = self.get(key)
+        if image is None:
+            image = render_svg_image(svg_data, width, height, dpr)
+            if image is None:
+                logging.warning("Invalid SVG renderer")
+                return None
+            self.put(key, image)
+        return image
+
+    def svg_size(self, svg_data: str) -> QSize:
+        """Default size of an SVG document, memoized by content hash"""
+        digest = svg_hash(svg_data)
+        with self._lock:
+            size = self._sizes.get(digest)
+        if size is None:
+            size = QSvgRenderer(QByteArray(svg_data.encode('utf-8'))).defaultSize()
+            with self._lock:
+                self._sizes[digest] = size
+        return QSize(size)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._images),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Cache partagé par le tableau et les exports
+thumbnail_cache = ThumbnailCache()
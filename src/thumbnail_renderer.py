@@ -0,0 +1,106 @@
+import logging
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from thumbnail_cache import thumbnail_cache, render_svg_image
+
+# Priorités du pool : les lignes visibles passent avant le préchargement
+PRIORITY_VISIBLE = 10
+PRIORITY_PREFETCH = 0
+
+
+class _JobSignals(QObject):
+    # key, QImage (None si le SVG est invalide)
+    finished = pyqtSignal(object, object)
+
+
+class ThumbnailJob(QRunnable):
+    """Rasterize one diagram into a QImage on a worker thread"""
+
+    def __init__(self, key, row, svg_data, width, height, dpr, signals):
+        super().__init__()
+        # Le renderer garde la référence Python : tryTake() reste sûr
+        self.setAutoDelete(False)
+        self.key = key
+        # Lignes affichant ce schéma ; modifiées seulement depuis le thread de l'interface
+        self.rows = {row}
+        self.svg_data = svg_data
+        self.width = width
+        self.height = height
+        self.dpr = dpr
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            image = render_svg_image(self.svg_data, self.width, self.height, self.dpr)
+        except Exception as e:
+            logging.error(f"Background thumbnail rendering failed: {e}")
+            image = None
+        if not self.cancelled:
+            self.signals.finished.emit(self.key, image)
+
+
+class ThumbnailRenderer(QObject):
+    """Queue diagram rasterization on a QThreadPool.
+
+    Finished images are stored in the shared thumbnail cache from the GUI
+    thread, then thumbnailReady(row) asks the view to swap the placeholder,
+    once for every row that requested the same diagram while it was queued.
+    Jobs still queued for rows that left the viewport can be cancelled.
+    """
+
+    thumbnailReady = pyqtSignal(int)
+    thumbnailFailed = pyqtSignal(object, int)
+
+    def __init__(self, cache=thumbnail_cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        # Laisser un cœur libre pour le thread de l'interface
+        self.pool.setMaxThreadCount(max(1, QThread.idealThreadCount() - 1))
+        self._signals = _JobSignals()
+        self._signals.finished.connect(self._onFinished)
+        self._pending = {}
+
+    def isPending(self, key) -> bool:
+        return key in self._pending
+
+    def request(self, key, row, svg_data, width, height, dpr=1.0, priority=PRIORITY_VISIBLE):
+        """Schedule the rendering of a diagram unless it is already queued"""
+        job = self._pending.get(key)
+        if job is not None:
+            # Même schéma sur une autre ligne : elle sera rafraîchie avec la première
+            job.rows.add(row)
+            return
+        job = ThumbnailJob(key, row, svg_data, width, height, dpr, self._signals)
+        self._pending[key] = job
+        self.pool.start(job, priority)
+
+    def cancelOutside(self, rows):
+        """Cancel queued jobs none of whose rows is in rows"""
+        for key, job in list(self._pending.items()):
+            if job.rows.isdisjoint(rows):
+                self._cancel(key, job)
+
+    def cancelAll(self):
+        for key, job in list(self._pending.items()):
+            self._cancel(key, job)
+
+    def _cancel(self, key, job):
+        job.cancelled = True
+        # Retirer du pool si le job n'a pas encore démarré
+        self.pool.tryTake(job)
+        del self._pending[key]
+
+    def _onFinished(self, key, image):
+        job = self._pending.pop(key, None)
+        if job is None or job.cancelled:
+            return
+        if image is None:
+            for row in sorted(job.rows):
+                self.thumbnailFailed.emit(key, row)
+            return
+        self.cache.put(key, image)
+        for row in sorted(job.rows):
+            self.thumbnailReady.emit(row)
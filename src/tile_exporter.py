@@ -0,0 +1,255 @@
+"""Tile pyramid export for a zoomable roadbook viewer.
+
+The vignettes are stacked in a single column, as one tall image, and cut
+into square tiles at every zoom level, deep-zoom style: level max is the
+full resolution, each level below halves it, down to a 1 × 1 pixel level 0.
+Tiles are stored as <level>/<column>_<row>.<ext> next to a manifest.json
+that gives the sizes of the levels and the position of each vignette.
+
+Only the full-resolution tiles are painted (RasterExporter cell painting);
+each lower tile is its four children scaled down. The pyramid is built
+depth first, so a parent is reduced from the images of its children still
+in memory rather than from their encoded files. Every tile gets a content
+hash, computed from what it shows before anything is drawn: at the top
+level, the vignettes it crosses; below, the hashes of its children. A
+re-export keeps the tiles whose hash did not change, so editing one vignette
+only repaints the tiles above it and their parents.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPainter
+from raster_exporter import RasterExporter, RasterExportError, POINTS_PER_INCH
+from pdf_exporter import PDFExporter
+
+# À incrémenter quand le dessin des tuiles change : toutes sont refaites
+TILE_VERSION = 1
+DEFAULT_TILE_WIDTH = 1024  # largeur de la colonne de vignettes, en pixels
+DEFAULT_TILE_SIZE = 256
+MANIFEST_FILE = 'manifest.json'
+
+
+class TileExporter(RasterExporter):
+    """Write a roadbook as a deep-zoom tile pyramid; see the module docstring"""
+
+    def export_tiles(self, name: Optional[str] = None, output_dir: Optional[str] = None,
+                     width: int = DEFAULT_TILE_WIDTH, tile_size: int = DEFAULT_TILE_SIZE) -> str:
+        """Write or update the pyramid of a roadbook and return the path of its manifest"""
+        qt_format, extension = self._check_format()
+        output_dir = self._output_dir(output_dir)
+        if name is None:
+            name = f"roadbook_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        folder = os.path.join(output_dir, os.path.splitext(os.path.basename(name))[0] + '_tiles')
+        manifest_path = os.path.join(folder, MANIFEST_FILE)
+        previous = self._read_hashes(manifest_path)
+
+        layout = self.cell_layout
+        self.tile_scale = width / layout.col_w
+        self.tile_size = tile_size
+        full_w = max(1, round(layout.col_w * self.tile_scale))
+        full_h = max(1, round(len(self.vignettes) * layout.row_h * self.tile_scale))
+        max_level = math.ceil(math.log2(max(full_w, full_h)))
+        levels = [(math.ceil(full_w / 2 ** (max_level - level)), math.ceil(full_h / 2 ** (max_level - level)))
+                  for level in range(max_level + 1)]
+        settings = repr((TILE_VERSION, self.image_format, self.quality, width, tile_size,
+                         layout.col_w, layout.row_h))
+        cell_keys = [self._cell_key(i) for i in range(len(self.vignettes))]
+
+        # Empreintes du plus détaillé au plus réduit : celle d'un parent reprend celles de ses enfants
+        hashes = {}
+        dirty = set()
+        for level in range(max_level, -1, -1):
+            level_w, level_h = levels[level]
+            for col, row in self._tiles(levels[level]):
+                # Taille de la tuile, réduite en bord d'image
+                tile_key = f"{settings}|{min(tile_size, level_w - col * tile_size)}" \
+                           f"x{min(tile_size, level_h - row * tile_size)}"
+                if level == max_level:
+                    digest = self._top_hash(tile_key, cell_keys, col, row)
+                else:
+                    digest = self._parent_hash(tile_key, hashes, level, col, row, levels[level + 1], extension)
+                path = self._tile_name(level, col, row, extension)
+                hashes[path] = digest
+                if previous.get(path) != digest or not os.path.exists(os.path.join(folder, path)):
+                    dirty.add((level, col, row))
+        painted = len(dirty)
+
+        try:
+            for level in range(max_level + 1):
+                os.makedirs(os.path.join(folder, str(level)), exist_ok=True)
+            # Sous-arbres répartis entre les threads à partir du premier niveau assez large,
+            # puis niveaux inférieurs réduits à partir de leurs images
+            split = next((level for level, size in enumerate(levels)
+                          if len(self._tiles(size)) >= self.workers), max_level)
+
+            def build(level, tile, known=None):
+                return self._build_tile(folder, levels, dirty, level, *tile, qt_format, extension, known)
+
+            tiles = self._tiles(levels[split])
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(tiles)))) as pool:
+                images = dict(zip(tiles, pool.map(lambda tile: build(split, tile), tiles)))
+            for level in range(split - 1, -1, -1):
+                tiles = self._tiles(levels[level])
+                images = dict(zip(tiles, (build(level, tile, images) for tile in tiles)))
+
+            # Tuiles d'un export précédent plus grand
+            for path in previous.keys() - hashes.keys():
+                try:
+                    os.remove(os.path.join(folder, path))
+                except OSError:
+                    pass
+            for level in {path.split('/', 1)[0] for path in previous} - {str(l) for l in range(len(levels))}:
+                try:
+                    os.rmdir(os.path.join(folder, level))
+                except OSError:
+                    pass
+            manifest = {
+                'format': self.image_format,
+                'tile_size': tile_size,
+                'overlap': 0,
+                'width': full_w,
+                'height': full_h,
+                'levels': [{'level': level, 'width': w, 'height': h} for level, (w, h) in enumerate(levels)],
+                'tile_path': '{level}/{column}_{row}' + extension,
+                'vignettes': [{
+                    'num': int(v.num),
+                    'cumul_dist': cumul,
+                    'top': round(i * layout.row_h * self.tile_scale),
+                    'height': round(layout.row_h * self.tile_scale),
+                } for i, (v, cumul) in enumerate(zip(self.vignettes, self.cumul_dists))],
+                'tiles': hashes,
+            }
+            tmp_path = manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, manifest_path)
+        except OSError as e:
+            logging.error(f"File system error during tile export: {e}")
+            raise RasterExportError(f"Erreur d'accès fichier lors de l'export en tuiles : {str(e)}")
+        logging.info(f"Tile export: {painted} tile(s) written, {len(hashes) - painted} unchanged")
+        self.tiles_written, self.tiles_unchanged = painted, len(hashes) - painted
+        return manifest_path
+
+    @staticmethod
+    def _read_hashes(manifest_path: str) -> dict:
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                tiles = json.load(f).get('tiles', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return tiles if isinstance(tiles, dict) else {}
+
+    @staticmethod
+    def _tile_name(level: int, col: int, row: int, extension: str) -> str:
+        return f"{level}/{col}_{row}{extension}"
+
+    def _cell_key(self, i: int) -> str:
+        """Everything the cell of vignette i shows"""
+        v = self.vignettes[i]
+        return repr((int(v.num), int(v.inter_dist), int(self.cumul_dists[i]), PDFExporter._observation_text(v),
+                     v.diagram_hash))
+
+    def _cell_rows(self, row: int) -> range:
+        """Indexes of the vignettes crossed by a row of full-resolution tiles"""
+        cell_h = self.cell_layout.row_h * self.tile_scale
+        top, bottom = row * self.tile_size, (row + 1) * self.tile_size
+        return range(max(0, math.floor(top / cell_h)), min(len(self.vignettes), math.ceil(bottom / cell_h)))
+
+    def _top_hash(self, settings: str, cell_keys: list, col: int, row: int) -> str:
+        digest = hashlib.sha1(f"{settings}|{col}|{row}".encode('utf-8'))
+        for i in self._cell_rows(row):
+            digest.update(f"|{i}:{cell_keys[i]}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _parent_hash(self, settings: str, hashes: dict, level: int, col: int, row: int, child_size,
+                     extension: str) -> str:
+        digest = hashlib.sha1(f"{settings}|{level}|{col}|{row}".encode('utf-8'))
+        for child in self._children(level, col, row, child_size):
+            digest.update(f"|{hashes[self._tile_name(level + 1, *child, extension)]}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _tiles(self, level_size) -> list:
+        """(column, row) of the tiles of a level"""
+        level_w, level_h = level_size
+        return [(col, row) for row in range(math.ceil(level_h / self.tile_size))
+                for col in range(math.ceil(level_w / self.tile_size))]
+
+    def _children(self, level: int, col: int, row: int, child_size) -> list:
+        child_w, child_h = child_size
+        return [(c, r) for r in (2 * row, 2 * row + 1) for c in (2 * col, 2 * col + 1)
+                if c * self.tile_size < child_w and r * self.tile_size < child_h]
+
+    def _build_tile(self, folder: str, levels: list, dirty: set, level: int, col: int, row: int,
+                    qt_format: str, extension: str, known: Optional[dict] = None) -> Optional[QImage]:
+        """Write the changed tiles of the subtree of a tile and return its image if it was written.
+
+        known holds the images of the tiles one level down; without it they
+        are built first.
+        """
+        max_level = len(levels) - 1
+        children = {}
+        if level < max_level:
+            for child in self._children(level, col, row, levels[level + 1]):
+                children[child] = known.get(child) if known is not None else \
+                    self._build_tile(folder, levels, dirty, level + 1, *child, qt_format, extension)
+        if (level, col, row) not in dirty:
+            return None
+        level_w, level_h = levels[level]
+        size = self.tile_size
+        width = min(size, level_w - col * size)
+        height = min(size, level_h - row * size)
+        if level == max_level:
+            image = self._paint_tile(col, row, width, height)
+        else:
+            image = self._reduce_tile(folder, level, col, row, width, height, levels[level + 1], extension,
+                                      children)
+        self._save(image, os.path.join(folder, self._tile_name(level, col, row, extension)), qt_format)
+        return image
+
+    def _paint_tile(self, col: int, row: int, width: int, height: int) -> QImage:
+        layout = self.cell_layout
+        image = self._blank(width, height)
+        painter = QPainter(image)
+        try:
+            painter.translate(-col * self.tile_size, -row * self.tile_size)
+            self._setup(painter, self.tile_scale)
+            for i in self._cell_rows(row):
+                self._paint_framed_cell(painter, i, i * layout.row_h)
+        finally:
+            painter.end()
+        self._set_dpi(image, POINTS_PER_INCH * self.tile_scale)
+        return image
+
+    def _reduce_tile(self, folder: str, level: int, col: int, row: int, width: int, height: int,
+                     child_size, extension: str, children: dict) -> QImage:
+        """Tile made of its (up to) four children, halved.
+
+        Children missing from children are unchanged ones, read back from
+        their file.
+        """
+        size = self.tile_size
+        child_w, child_h = child_size
+        # Zone du niveau inférieur couverte par la tuile
+        span_w = min(2 * size, child_w - 2 * col * size)
+        span_h = min(2 * size, child_h - 2 * row * size)
+        mosaic = QImage(span_w, span_h, QImage.Format_RGB32)
+        mosaic.fill(Qt.white)
+        painter = QPainter(mosaic)
+        try:
+            for c, r in self._children(level, col, row, child_size):
+                child = children.get((c, r))
+                if child is None:
+                    path = os.path.join(folder, self._tile_name(level + 1, c, r, extension))
+                    child = QImage(path)
+                    if child.isNull():
+                        raise RasterExportError(f"Tuile illisible : {path}")
+                painter.drawImage((c - 2 * col) * size, (r - 2 * row) * size, child)
+        finally:
+            painter.end()
+        return mosaic.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
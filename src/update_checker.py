@@ -1,27 +1,121 @@
-import requests
 import json
 import logging
+import os
+import time
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import QThread, pyqtSignal
 
+DEFAULT_UPDATE_URL = "https://raw.githubusercontent.com/username/roadbook-app/main/version.json"
+DEFAULT_INTERVAL = 24 * 3600  # Une vérification par jour au plus
+RETRY_INTERVAL = 3600  # Après un échec réseau : nouvel essai une heure plus tard au plus
+# Variables d'environnement : URL (serveur de test local) et intervalle en heures
+ENV_URL = 'ROADBOOK_UPDATE_URL'
+ENV_INTERVAL = 'ROADBOOK_UPDATE_INTERVAL_HOURS'
+
+
+def default_cache_path() -> str:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return os.path.join(base_dir, 'cache', 'update_check.json')
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path: str, cache: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fetch_version_info(url: str, cache: dict, timeout: float = 5) -> dict:
+    """Conditional GET of version.json; returns the updated cache entry.
+
+    Sends the ETag/Last-Modified of the cached response, so an unchanged
+    file costs a 304 without body. Raises on network errors.
+    """
+    import urllib.error
+    import urllib.request
+
+    headers = {}
+    if cache.get('url') == url:
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = json.loads(response.read().decode('utf-8'))
+            return {
+                'url': url,
+                'checked_at': time.time(),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'data': data,
+            }
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            raise
+        logging.debug("version.json not modified")
+        return dict(cache, checked_at=time.time())
+
+
 class UpdateChecker(QThread):
+    """Check version.json in the background, at most once per interval.
+
+    The last response is cached on disk with its validators; within the
+    interval the cached data is used without any network access. A failed
+    check is recorded too, so offline launches wait RETRY_INTERVAL before
+    trying again, and keep the data of the last response.
+    """
+
     update_available = pyqtSignal(str, str)  # version, download_url
     
-    def __init__(self):
+    def __init__(self, url=None, cache_path=None, interval=None):
         super().__init__()
         self.current_version = "1.0.0"
-        self.update_url = "https://raw.githubusercontent.com/username/roadbook-app/main/version.json"
+        self.update_url = url or os.environ.get(ENV_URL) or DEFAULT_UPDATE_URL
+        self.cache_path = cache_path or default_cache_path()
+        if interval is None:
+            try:
+                interval = float(os.environ[ENV_INTERVAL]) * 3600
+            except (KeyError, ValueError):
+                interval = DEFAULT_INTERVAL
+        self.interval = interval
+        self.used_network = False
     
     def run(self):
         try:
-            response = requests.get(self.update_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                latest_version = data.get("version", "1.0.0")
-                download_url = data.get("download_url", "")
-                
-                if self._is_newer_version(latest_version):
-                    self.update_available.emit(latest_version, download_url)
+            cache = load_cache(self.cache_path)
+            if not isinstance(cache, dict) or cache.get('url') != self.update_url:
+                cache = {}
+            interval = min(self.interval, RETRY_INTERVAL) if cache.get('last_error') else self.interval
+            if time.time() - cache.get('checked_at', 0) >= interval:
+                self.used_network = True
+                try:
+                    cache = fetch_version_info(self.update_url, cache)
+                    cache.pop('last_error', None)
+                except Exception as e:
+                    # Hors ligne : échec noté, dernière réponse conservée
+                    logging.debug(f"Update check failed: {e}")
+                    cache = dict(cache, url=self.update_url, checked_at=time.time(), last_error=str(e))
+                try:
+                    save_cache(self.cache_path, cache)
+                except OSError as e:
+                    logging.debug(f"Update cache not saved: {e}")
+            data = cache.get('data') or {}
+            latest_version = data.get("version", "1.0.0")
+            download_url = data.get("download_url", "")
+            
+            if self._is_newer_version(latest_version):
+                self.update_available.emit(latest_version, download_url)
         except Exception as e:
             logging.debug(f"Update check failed: {e}")
     
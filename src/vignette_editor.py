@@ -390,7 +390,7 @@ class VignetteEditor(QDialog):
             
             if self.selection_mode:
                 item = self.scene.itemAt(pos, self.view.transform())
-                if item and isinstance(item, QGraphicsItem) and not isinstance(item, QGraphicsSvgItem):
+                if item and isinstance(item, QGraphicsItem) and not self._isBackgroundItem(item):
                     self.selected_item = item
                     self.dragging = True
                     self.drag_start_pos = pos
@@ -411,7 +411,7 @@ class VignetteEditor(QDialog):
                 
             if self.eraserButton.isChecked():
                 item = self.scene.itemAt(pos, self.view.transform())
-                if item and isinstance(item, QGraphicsItem) and not isinstance(item, QGraphicsSvgItem):
+                if item and isinstance(item, QGraphicsItem) and not self._isBackgroundItem(item):
                     self.scene.removeItem(item)
                     # More efficient removal from deques
                     try:
@@ -443,7 +443,7 @@ class VignetteEditor(QDialog):
             else:
                 # Cache itemAt result to avoid repeated calls
                 item = self.scene.itemAt(pos, self.view.transform())
-                if item and isinstance(item, QGraphicsItem) and not isinstance(item, QGraphicsSvgItem):
+                if item and isinstance(item, QGraphicsItem) and not self._isBackgroundItem(item):
                     self.view.setCursor(Qt.OpenHandCursor)
                 else:
                     self.view.setCursor(Qt.ArrowCursor)
@@ -451,7 +451,7 @@ class VignetteEditor(QDialog):
             
         if self.eraserButton.isChecked():
             item = self.scene.itemAt(pos, self.view.transform())
-            if item and isinstance(item, QGraphicsItem) and not isinstance(item, QGraphicsSvgItem):
+            if item and isinstance(item, QGraphicsItem) and not self._isBackgroundItem(item):
                 self.view.setCursor(Qt.PointingHandCursor)
             else:
                 self.view.setCursor(Qt.ArrowCursor)
@@ -732,7 +732,7 @@ class VignetteEditor(QDialog):
     def sceneToSVG(self) -> str:
         try:
             # Vérifier s'il y a des éléments dans la scène
-            items = [item for item in self.scene.items() if not isinstance(item, QGraphicsSvgItem)]
+            items = [item for item in self.scene.items() if not self._isBackgroundItem(item)]
             if not items:
                 logging.info("No drawable items in scene")
                 return ""
@@ -771,6 +771,11 @@ class VignetteEditor(QDialog):
             logging.error(f"Erreur génération SVG: {e}", exc_info=True)
             return ""
     
+    def _isBackgroundItem(self, item) -> bool:
+        """The background diagram is neither selectable, erasable nor re-exported"""
+        return isinstance(item, QGraphicsSvgItem) or (
+            item is not None and item is self.background_svg_item)
+
     def loadDiagram(self):
         if not self.vignette.diagram:
             logging.info("No existing diagram to load")
@@ -780,21 +785,31 @@ class VignetteEditor(QDialog):
         try:
             renderer = QSvgRenderer(self.vignette.diagram.encode('utf-8'))
             if renderer.isValid():
+                vb = renderer.viewBoxF()
+                if vb.width() > 0 and vb.height() > 0:
+                    self.scene.setSceneRect(vb)
+                    logging.info(f"SceneRect set: {vb}")
+                else:
+                    logging.warning("Invalid ViewBox, using default size")
+                
+                # Fond vectoriel : reste net quand la vue est agrandie
                 logging.info("Valid SVG, creating item")
                 svg_item = QGraphicsSvgItem()
                 svg_item.setSharedRenderer(renderer)
+                # setSharedRenderer ne prend pas possession du renderer
+                self.background_renderer = renderer
+                # Ajusté à la scène (la taille par défaut du SVG peut différer de son viewBox)
+                rect = self.scene.sceneRect()
+                bounds = svg_item.boundingRect()
+                if bounds.width() > 0 and bounds.height() > 0:
+                    svg_item.setTransform(QTransform.fromScale(rect.width() / bounds.width(),
+                                                               rect.height() / bounds.height()))
+                svg_item.setPos(rect.topLeft())
                 svg_item.setZValue(-1000)
                 svg_item.setFlags(QGraphicsItem.ItemIsMovable | QGraphicsItem.ItemIsSelectable)
                 self.scene.addItem(svg_item)
                 self.background_svg_item = svg_item
                 self.editable_items.append(svg_item)  # Ajouter à la liste éditable
-                
-                vb = renderer.viewBoxF()
-                if vb.width() > 0 and vb.height() > 0:
-                    self.scene.setSceneRect(vb)
-                    logging.info(f"SceneRect set: {vb}")
-                else:
-                    logging.warning("Invalid ViewBox, using default size")
             else:
                 logging.warning("Invalid SVG")
         except Exception as e:
@@ -1,29 +1,226 @@
-from dataclasses import dataclass
-from typing import Optional
-from PyQt5.QtGui import QPixmap
-
-@dataclass
-class Vignette:
-    num: int
-    inter_dist: float = 0.0
-    diagram: Optional[str] = None  # SVG string
-    observations: str = ""
-    drawing_elements: list = None  # Store drawing elements for re-editing
-    
-    def __post_init__(self):
-        if self.drawing_elements is None:
-            self.drawing_elements = []
-    
-    def set_diagram(self, svg_data: str, elements: list = None):
-        """Set the diagram as SVG string and store drawing elements"""
-        self.diagram = svg_data
-        if elements is not None:
-            self.drawing_elements = elements
-    
-    def get_diagram(self) -> Optional[str]:
-        """Get the diagram as SVG string"""
-        return self.diagram
-    
-    def get_drawing_elements(self) -> list:
-        """Get the drawing elements for re-editing"""
-        return self.drawing_elements or []
+import weakref
+from dataclasses import dataclass, field, FrozenInstanceError
+from typing import NamedTuple, Optional
+from PyQt5.QtGui import QPixmap
+from thumbnail_cache import svg_hash
+
+@dataclass
+class Vignette:
+    num: int
+    inter_dist: float = 0.0
+    # Payloads use default factories so that no class attribute shadows
+    # __getattr__ when they are loaded lazily (see set_lazy)
+    diagram: Optional[str] = field(default_factory=lambda: None)  # SVG string
+    observations: str = ""
+    drawing_elements: list = field(default_factory=list)  # Store drawing elements for re-editing
+    
+    def __post_init__(self):
+        if self.drawing_elements is None:
+            self.drawing_elements = []
+    
+    def set_diagram(self, svg_data: str, elements: list = None):
+        """Set the diagram as SVG string and store drawing elements"""
+        self.diagram = svg_data
+        if elements is not None:
+            self.drawing_elements = elements
+        # Le contenu a changé : la copie enregistrée sur disque n'est plus à jour
+        self.stored_payload = None
+        self.__dict__['_payload_version'] = self.payload_version + 1
+    
+    def get_diagram(self) -> Optional[str]:
+        """Get the diagram as SVG string"""
+        return self.diagram
+    
+    def get_drawing_elements(self) -> list:
+        """Get the drawing elements for re-editing"""
+        return self.drawing_elements or []
+
+    @property
+    def stored_payload(self):
+        """Reference to the on-disk record holding the current diagram, if any"""
+        return self.__dict__.get('_stored_payload')
+
+    @stored_payload.setter
+    def stored_payload(self, ref):
+        self.__dict__['_stored_payload'] = ref
+
+    @property
+    def diagram_hash(self) -> Optional[str]:
+        """svg_hash of the diagram, computed once per diagram (None without one)"""
+        digest = self.__dict__.get('_diagram_hash')
+        if digest is None:
+            diagram = self.diagram
+            if not diagram:
+                return None
+            digest = self.__dict__['_diagram_hash'] = svg_hash(diagram)
+        return digest
+
+    @property
+    def payload_version(self) -> int:
+        """Incremented each time the diagram is replaced"""
+        return self.__dict__.get('_payload_version', 0)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # La copie figée ne correspond plus à la vignette (voir frozen)
+        self.__dict__.pop('_frozen', None)
+        if name == 'diagram':
+            self.__dict__.pop('_diagram_hash', None)
+
+    def __copy__(self):
+        # Les poignées paresseuses ne doivent pas être partagées entre copies
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.__dict__.pop('_frozen', None)
+        if '_lazy' in self.__dict__:
+            clone.__dict__['_lazy'] = dict(self.__dict__['_lazy'])
+        return clone
+
+    def frozen(self) -> 'FrozenVignette':
+        """Read-only copy of the vignette, shared by snapshots until it changes.
+
+        Payloads are shared, not copied: they are replaced (set_diagram),
+        never modified in place. Assigning a field or rebinding a lazy
+        payload drops the copy, the next call makes a new one. The vignette
+        only keeps a weak reference to it: payloads the copy loads are freed
+        with the last snapshot holding it.
+        """
+        ref = self.__dict__.get('_frozen')
+        clone = ref() if ref is not None else None
+        if clone is None:
+            clone = object.__new__(FrozenVignette)
+            clone.__dict__.update(self.__dict__)
+            clone.__dict__.pop('_frozen', None)
+            if '_lazy' in self.__dict__:
+                clone.__dict__['_lazy'] = dict(self.__dict__['_lazy'])
+            self.__dict__['_frozen'] = weakref.ref(clone)
+        return clone
+
+    def set_lazy(self, name: str, loader):
+        """Defer a payload field (diagram, drawing_elements) until first access.
+
+        loader is a callable returning the value; it is called at most once
+        per instance, the result then replaces the handle. The value stays
+        the same (a loaded file, or a save rebinding to its new copy), so
+        diagram_hash is kept.
+        """
+        self.__dict__.pop(name, None)
+        self.__dict__.pop('_frozen', None)
+        self.__dict__.setdefault('_lazy', {})[name] = loader
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def peek(self, name: str):
+        """Read a field without keeping a lazy payload in memory afterwards"""
+        if name in self.__dict__:
+            return self.__dict__[name]
+        return self.__dict__['_lazy'][name]()
+
+    def __getattr__(self, name):
+        # Only reached when the attribute is missing, i.e. for lazy payloads
+        lazy = self.__dict__.get('_lazy')
+        if lazy is not None and name in lazy:
+            value = lazy[name]()
+            self.__dict__[name] = value
+            # La poignée ne sert plus : le fichier peut être remplacé sans la garder en mémoire
+            lazy.pop(name, None)
+            return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+
+class FrozenVignette(Vignette):
+    """Vignette taken by Vignette.frozen(); its fields cannot be assigned.
+
+    Lazy payloads still load on first access, so a snapshot costs one
+    object per changed vignette whatever the size of the diagrams.
+    """
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}' of a frozen vignette")
+
+    def set_lazy(self, name: str, loader):
+        raise FrozenInstanceError(f"cannot rebind field '{name}' of a frozen vignette")
+
+    def frozen(self) -> 'FrozenVignette':
+        return self
+
+
+class RoadbookSnapshot(NamedTuple):
+    """Immutable state of a roadbook, safe to read from another thread"""
+    vignettes: tuple
+    cumul_dists: tuple
+
+
+def take_snapshot(vignettes: list, cumul_dists: Optional[list] = None) -> RoadbookSnapshot:
+    """Snapshot of a vignette list; unchanged vignettes reuse their frozen copy"""
+    if cumul_dists is None:
+        cumul_dists = cumulative_distances(vignettes)
+    return RoadbookSnapshot(tuple(v.frozen() for v in vignettes), tuple(cumul_dists))
+
+
+class DistanceIndex:
+    """Cumulative distances of a roadbook, backed by a Fenwick tree.
+
+    Updating one inter distance and reading one cumulative total are both
+    O(log n). totals() materializes the whole list for the exporters and
+    only recomputes it from the first index modified since the last call.
+    """
+
+    def __init__(self, distances=()):
+        self.rebuild(distances)
+
+    def rebuild(self, distances):
+        self._values = [float(d) for d in distances]
+        n = len(self._values)
+        self._tree = list(self._values)
+        for i in range(n):
+            parent = i | (i + 1)
+            if parent < n:
+                self._tree[parent] += self._tree[i]
+        self._totals = []
+        self._dirty_from = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, i: int, distance: float):
+        """Set the inter distance of vignette i"""
+        delta = float(distance) - self._values[i]
+        if not delta:
+            return
+        self._values[i] = float(distance)
+        j = i
+        while j < len(self._tree):
+            self._tree[j] += delta
+            j |= j + 1
+        self._dirty_from = min(self._dirty_from, i)
+
+    def total(self, i: int) -> float:
+        """Cumulative distance up to and including vignette i"""
+        if i >= self._dirty_from or i >= len(self._totals):
+            result = 0.0
+            j = i
+            while j >= 0:
+                result += self._tree[j]
+                j = (j & (j + 1)) - 1
+            return result
+        return self._totals[i]
+
+    def totals(self) -> list:
+        """Cumulative distance of every vignette"""
+        n = len(self._values)
+        if self._dirty_from < n or len(self._totals) != n:
+            start = min(self._dirty_from, len(self._totals))
+            del self._totals[start:]
+            cumul = self._totals[-1] if self._totals else 0.0
+            for d in self._values[start:]:
+                cumul += d
+                self._totals.append(cumul)
+        self._dirty_from = n
+        return list(self._totals)
+
+
+def cumulative_distances(vignettes: list) -> list:
+    """Cumulative distances for a list of vignettes without a table model"""
+    return DistanceIndex(v.inter_dist for v in vignettes).totals()
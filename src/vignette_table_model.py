@@ -0,0 +1,171 @@
+import logging
+from typing import List, Optional
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox
+from vignette_model import Vignette, DistanceIndex, RoadbookSnapshot, take_snapshot
+from widgets import parse_distance
+
+# Rôles personnalisés : contenu SVG du schéma et son empreinte, lus par DiagramDelegate
+DiagramRole = Qt.UserRole + 1
+DiagramHashRole = Qt.UserRole + 2
+
+
+class VignetteTableModel(QAbstractTableModel):
+    """Qt model exposing the roadbook vignettes, one vignette per row.
+
+    The model works directly on the application's vignette list; background
+    work (exports) reads a snapshot() instead, so edits can go on meanwhile.
+    It also owns the cumulative distance index shared by the table and the
+    exporters.
+    """
+
+    COL_NUM, COL_TOTAL, COL_INTER, COL_DIAGRAM, COL_OBS = range(5)
+    HEADERS = ['📍 #', '📏 Dist. Tot. (m)', '📐 Dist. Int. (m)', '🗺️ Schéma', '📝 Observations']
+
+    # Émis après une modification faite par l'utilisateur (ligne, colonne)
+    edited = pyqtSignal(int, int)
+
+    def __init__(self, vignettes: Optional[List[Vignette]] = None, parent=None):
+        super().__init__(parent)
+        self._vignettes = vignettes if vignettes is not None else []
+        self.distances = DistanceIndex(v.inter_dist for v in self._vignettes)
+
+    # -- Accès aux données -------------------------------------------------
+
+    def vignettes(self) -> List[Vignette]:
+        return self._vignettes
+
+    def setVignettes(self, vignettes: List[Vignette]):
+        """Replace the whole vignette list (file opening)"""
+        self.beginResetModel()
+        self._vignettes = vignettes
+        self._rebuildDistances()
+        self.endResetModel()
+
+    def cumulativeDistance(self, row: int) -> float:
+        return self.distances.total(row)
+
+    def cumulativeDistances(self) -> list:
+        """Precomputed cumulative distances, in vignette order"""
+        return self.distances.totals()
+
+    def snapshot(self) -> RoadbookSnapshot:
+        """Frozen copy of the roadbook; only the vignettes changed since the last one are copied"""
+        return take_snapshot(self._vignettes, self.distances.totals())
+
+    def _rebuildDistances(self):
+        self.distances.rebuild(v.inter_dist for v in self._vignettes)
+
+    # -- API QAbstractTableModel -------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._vignettes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in (self.COL_INTER, self.COL_OBS):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._vignettes):
+            return QVariant()
+        v = self._vignettes[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            if col == self.COL_NUM:
+                return str(v.num)
+            if col == self.COL_TOTAL:
+                return f"{int(self.cumulativeDistance(index.row()))} m"
+            if col == self.COL_INTER:
+                return f"{int(v.inter_dist)} m"
+            if col == self.COL_OBS:
+                return v.observations
+        elif role == Qt.EditRole:
+            if col == self.COL_INTER:
+                return f"{int(v.inter_dist)} m"
+            if col == self.COL_OBS:
+                return v.observations
+        elif role == DiagramRole and col == self.COL_DIAGRAM:
+            return v.diagram
+        elif role == DiagramHashRole and col == self.COL_DIAGRAM:
+            return v.diagram_hash
+        return QVariant()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        row, col = index.row(), index.column()
+        v = self._vignettes[row]
+
+        if col == self.COL_INTER:
+            try:
+                new_distance = parse_distance(value)
+            except ValueError as e:
+                QMessageBox.warning(None, "Erreur", str(e))
+                return False
+            if new_distance == v.inter_dist:
+                return True
+            v.inter_dist = new_distance
+            self.distances.update(row, new_distance)
+            # Seules la cellule éditée et les distances cumulées suivantes changent
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            self.dataChanged.emit(self.index(row, self.COL_TOTAL),
+                                  self.index(len(self._vignettes) - 1, self.COL_TOTAL),
+                                  [Qt.DisplayRole])
+        elif col == self.COL_OBS:
+            if value == v.observations:
+                return True
+            v.observations = value
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        else:
+            return False
+
+        self.edited.emit(row, col)
+        return True
+
+    # -- Modifications structurelles ---------------------------------------
+
+    def appendVignette(self, vignette: Vignette):
+        row = len(self._vignettes)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._vignettes.append(vignette)
+        self._rebuildDistances()
+        self.endInsertRows()
+
+    def removeVignettes(self, rows):
+        """Remove the given rows and renumber the following vignettes"""
+        rows = sorted({r for r in rows if 0 <= r < len(self._vignettes)}, reverse=True)
+        if not rows:
+            return
+        # Remove vignettes in reverse order to maintain correct indices
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._vignettes[row]
+            self.endRemoveRows()
+        self._rebuildDistances()
+
+        first = rows[-1]
+        for i in range(first, len(self._vignettes)):
+            self._vignettes[i].num = i + 1
+        if first < len(self._vignettes):
+            self.dataChanged.emit(self.index(first, self.COL_NUM),
+                                  self.index(len(self._vignettes) - 1, self.COL_TOTAL),
+                                  [Qt.DisplayRole])
+
+    def diagramChanged(self, row: int):
+        """Notify the view that the diagram of a vignette was replaced"""
+        index = self.index(row, self.COL_DIAGRAM)
+        self.dataChanged.emit(index, index, [DiagramRole, DiagramHashRole])
+        logging.debug(f"Diagram of vignette {row + 1} changed")
@@ -1,36 +1,125 @@
-from PyQt5.QtWidgets import QTableWidgetItem, QMessageBox
-
-class DistanceTableItem(QTableWidgetItem):
-    def __init__(self, distance=0):
-        super().__init__(f"{int(distance)} m")
-        self._distance = distance
-
-    def setData(self, role, value):
-        try:
-            if isinstance(value, str):
-                # Remove "m" unit if present
-                value = value.replace('m', '').strip()
-            
-            # Convert to integer
-            new_distance = int(float(value))
-            
-            # Check that distance is positive
-            if new_distance < 0:
-                QMessageBox.warning(None, "Erreur", 
-                    "La distance doit être positive")
-                # Restore original value to maintain UI consistency
-                super().setData(role, f"{self._distance} m")
-                return
-                
-            self._distance = new_distance
-            super().setData(role, f"{new_distance} m")
-            
-        except ValueError:
-            QMessageBox.warning(None, "Erreur", 
-                "Veuillez entrer un nombre entier valide")
-            # Restore original value to maintain UI consistency
-            super().setData(role, f"{self._distance} m")
-            return
-
-    def distance(self):
-        return self._distance
+import logging
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QColor
+from thumbnail_cache import thumbnail_cache
+from thumbnail_renderer import ThumbnailRenderer, PRIORITY_VISIBLE, PRIORITY_PREFETCH
+
+
+def parse_distance(value) -> int:
+    """Parse a distance typed in the table ("250", "250 m"...).
+
+    Raises ValueError with a user-facing message when the value is invalid.
+    """
+    try:
+        if isinstance(value, str):
+            # Remove "m" unit if present
+            value = value.replace('m', '').strip()
+
+        # Convert to integer
+        new_distance = int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError("Veuillez entrer un nombre entier valide")
+
+    # Check that distance is positive
+    if new_distance < 0:
+        raise ValueError("La distance doit être positive")
+    return new_distance
+
+
+class DiagramDelegate(QStyledItemDelegate):
+    """Paint the diagram thumbnail of a vignette directly in its cell.
+
+    Only rows visible in the viewport are painted, so the cost no longer
+    depends on the number of vignettes in the roadbook. Rasters come from the
+    shared thumbnail cache; on a miss the cell shows a placeholder while the
+    image is rendered on a worker thread.
+    """
+
+    MIN_SIZE = 50  # Taille minimale
+    PREFETCH_ROWS = 5  # Lignes préchargées sous la zone visible
+
+    def __init__(self, diagram_role, hash_role, view, column):
+        super().__init__(view)
+        self.diagram_role = diagram_role
+        # Empreinte tenue par le modèle : le SVG n'est relu qu'en cas d'absence du cache
+        self.hash_role = hash_role
+        self.view = view
+        self.column = column
+        self._invalid = set()
+        self.renderer = ThumbnailRenderer(parent=self)
+        self.renderer.thumbnailReady.connect(self._updateRow)
+        self.renderer.thumbnailFailed.connect(self._onThumbnailFailed)
+
+    def _thumbnailKey(self, digest, rect, dpr):
+        aw = max(self.MIN_SIZE, rect.width())
+        ah = max(self.MIN_SIZE, rect.height())
+        return thumbnail_cache.hash_key(digest, aw, ah, dpr), aw, ah
+
+    def paint(self, painter, option, index):
+        digest = index.data(self.hash_role)
+        if not digest:
+            super().paint(painter, option, index)
+            return
+
+        rect = option.rect
+        painter.save()
+        try:
+            painter.fillRect(rect, Qt.white)  # Fond blanc au lieu de transparent
+            dpr = painter.device().devicePixelRatioF()
+            key, aw, ah = self._thumbnailKey(digest, rect, dpr)
+            image = thumbnail_cache.get(key)
+            if image is not None:
+                painter.drawImage(QRectF(rect.x(), rect.y(), aw, ah), image)
+            elif key in self._invalid:
+                painter.drawText(rect, Qt.AlignCenter, 'SVG invalide')
+            else:
+                # Aperçu provisoire, remplacé dès que l'image est prête
+                painter.fillRect(rect.adjusted(4, 4, -4, -4), QColor('#f0f0f0'))
+                painter.setPen(QColor('#9e9e9e'))
+                painter.drawText(rect, Qt.AlignCenter, '…')
+                svg_data = index.data(self.diagram_role)
+                self.renderer.request(key, index.row(), svg_data, aw, ah, dpr, PRIORITY_VISIBLE)
+            if option.state & QStyle.State_Selected:
+                highlight = QColor(option.palette.highlight().color())
+                highlight.setAlpha(60)
+                painter.fillRect(rect, highlight)
+        finally:
+            painter.restore()
+
+    def viewportChanged(self):
+        """Cancel jobs of rows scrolled away and prefetch the next rows"""
+        model = self.view.model()
+        rows = model.rowCount()
+        first = self.view.rowAt(0)
+        if first < 0:
+            self.renderer.cancelAll()
+            return
+        last = self.view.rowAt(self.view.viewport().height() - 1)
+        if last < 0:
+            last = rows - 1
+        keep_first = max(0, first - self.PREFETCH_ROWS)
+        keep_last = min(rows - 1, last + self.PREFETCH_ROWS)
+        self.renderer.cancelOutside(range(keep_first, keep_last + 1))
+
+        dpr = self.view.viewport().devicePixelRatioF()
+        for row in range(last + 1, keep_last + 1):
+            index = model.index(row, self.column)
+            digest = index.data(self.hash_role)
+            if not digest:
+                continue
+            key, aw, ah = self._thumbnailKey(digest, self.view.visualRect(index), dpr)
+            if key not in self._invalid and thumbnail_cache.get(key) is None:
+                self.renderer.request(key, row, index.data(self.diagram_role), aw, ah, dpr, PRIORITY_PREFETCH)
+
+    def reset(self):
+        self.renderer.cancelAll()
+        self._invalid.clear()
+
+    def _onThumbnailFailed(self, key, row):
+        logging.warning("Invalid SVG renderer")
+        self._invalid.add(key)
+        self._updateRow(row)
+
+    def _updateRow(self, row):
+        self.view.update(self.view.model().index(row, self.column))
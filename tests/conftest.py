@@ -0,0 +1,17 @@
+"""Shared test setup: application modules on the path, Qt without a display."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(['tests'])
@@ -0,0 +1,121 @@
+"""Edit journal: replay after a crash, locks, edits already covered by a save."""
+import copy
+import os
+import subprocess
+import sys
+import textwrap
+
+from benchmarks.generate import generate_vignettes
+from edit_journal import EditJournal, apply_operation, orphan_journals
+from roadbook_io import load_roadbook, save_roadbook
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Les modifications d'une session : (op, données), numérotées à partir de 1
+EDITS = [
+    ('set', {'row': 2, 'field': 'observations', 'value': 'Piste à gauche'}),
+    ('set', {'row': 0, 'field': 'inter_dist', 'value': 1250}),
+    ('diagram', {'row': 4, 'diagram': '<svg xmlns="http://www.w3.org/2000/svg"/>', 'elements': []}),
+    ('add', {}),
+    ('set', {'row': 8, 'field': 'observations', 'value': 'Arrivée'}),
+    ('delete', {'rows': [1, 3]}),
+]
+
+
+def _fields(vignettes):
+    return [(v.num, v.inter_dist, v.observations, v.diagram, v.drawing_elements) for v in vignettes]
+
+
+def _crashed_session(journal_path, roadbook, edits, save_after=None):
+    """Run a session in another process that journals edits then dies without cleaning up.
+
+    With save_after, the roadbook is saved (with its journal metadata) after
+    that many edits, and the process dies before the journal is rebased.
+    """
+    script = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {SRC_DIR!r})
+        from edit_journal import EditJournal, apply_operation
+        from roadbook_io import load_roadbook, save_roadbook
+        journal = EditJournal({journal_path!r})
+        journal.reset({roadbook!r})
+        vignettes = load_roadbook({roadbook!r})
+        for seq, (op, data) in enumerate({edits!r}, 1):
+            apply_operation(vignettes, dict(data, op=op, seq=seq))
+            journal.append(op, seq, **data)
+            if seq == {save_after!r}:
+                save_roadbook({roadbook!r}, vignettes, journal.save_meta(seq))
+        journal.sync()
+        os._exit(1)
+    """)
+    result = subprocess.run([sys.executable, '-c', script], env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+    assert result.returncode == 1
+
+
+def _expected(roadbook, edits):
+    vignettes = load_roadbook(roadbook)
+    for seq, (op, data) in enumerate(edits, 1):
+        apply_operation(vignettes, dict(data, op=op, seq=seq))
+    return _fields(vignettes)
+
+
+def _roadbook(tmp_path):
+    path = str(tmp_path / 'book.rbk')
+    save_roadbook(path, [copy.copy(v) for v in generate_vignettes(10, elements=4, text_length=40)])
+    return path
+
+
+def test_replay_after_crash_restores_the_edits(tmp_path):
+    roadbook = _roadbook(tmp_path)
+    expected = _expected(roadbook, EDITS)
+    journal_dir = tmp_path / 'recovery'
+    _crashed_session(str(journal_dir / 'session_a.journal'), roadbook, EDITS)
+
+    orphans = orphan_journals(str(journal_dir))
+    assert len(orphans) == 1
+    journal = orphans[0]
+    assert journal.has_pending() and journal.filename == roadbook
+    # Verrou tenu : une autre instance ne propose pas le même journal
+    assert orphan_journals(str(journal_dir)) == []
+
+    filename, vignettes, seq = journal.recover()
+    assert filename == roadbook and seq == len(EDITS)
+    assert _fields(vignettes) == expected
+    journal.discard()
+    assert not os.path.exists(journal.path)
+
+
+def test_edits_covered_by_the_last_save_are_not_pending(tmp_path):
+    roadbook = _roadbook(tmp_path)
+    journal_dir = tmp_path / 'recovery'
+    # Sauvegarde terminée, plantage avant que le journal ne soit rebasé
+    _crashed_session(str(journal_dir / 'session_b.journal'), roadbook, EDITS, save_after=len(EDITS))
+
+    journal, = orphan_journals(str(journal_dir))
+    assert not journal.has_pending()
+    journal.release()
+
+
+def test_only_edits_after_the_save_are_replayed(tmp_path):
+    roadbook = _roadbook(tmp_path)
+    expected = _expected(roadbook, EDITS)
+    journal_dir = tmp_path / 'recovery'
+    _crashed_session(str(journal_dir / 'session_c.journal'), roadbook, EDITS, save_after=3)
+
+    journal, = orphan_journals(str(journal_dir))
+    assert journal.has_pending()
+    _, vignettes, seq = journal.recover()
+    assert seq == len(EDITS)
+    assert _fields(vignettes) == expected
+    journal.discard()
+
+
+def test_live_session_journal_is_not_an_orphan(tmp_path):
+    journal_dir = tmp_path / 'recovery'
+    live = EditJournal(str(journal_dir / 'session_live.journal'))
+    live.reset(None)
+    live.append('add', 1)
+    try:
+        assert orphan_journals(str(journal_dir)) == []
+    finally:
+        live.discard()
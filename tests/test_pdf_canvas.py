@@ -0,0 +1,42 @@
+"""Canvas PDF backend: pages replayed from the page cache."""
+from reportlab import rl_config
+
+from benchmarks.generate import generate_vignettes
+import pdf_canvas
+from diagram_cache import DiagramCache
+from pdf_exporter import PDFExporter
+
+
+def _export(vignettes, folder, name, page_cache):
+    exporter = PDFExporter(vignettes, cache=DiagramCache(), page_cache=page_cache)
+    path = exporter.export(name, str(folder), backend='canvas')
+    with open(path, 'rb') as f:
+        return exporter, f.read()
+
+
+def test_replayed_pages_match_drawn_pages(tmp_path, monkeypatch):
+    # Ni date ni identifiant aléatoire : deux exports identiques donnent les mêmes octets
+    monkeypatch.setattr(rl_config, 'invariant', 1)
+    vignettes = generate_vignettes(30, elements=4, text_length=40)
+    page_cache = DiagramCache()
+
+    first, drawn = _export(vignettes, tmp_path, 'first.pdf', page_cache)
+    second, replayed = _export(vignettes, tmp_path, 'second.pdf', page_cache)
+
+    assert first.pages_drawn > 1 and first.pages_reused == 0
+    assert second.pages_reused == first.pages_drawn and second.pages_drawn == 0
+    assert replayed == drawn
+
+
+def test_pages_drawn_with_other_font_names_are_not_replayed(tmp_path, monkeypatch):
+    vignettes = generate_vignettes(10, elements=4, text_length=40)
+    page_cache = DiagramCache()
+    first, _ = _export(vignettes, tmp_path, 'first.pdf', page_cache)
+
+    # Polices enregistrées dans l'autre ordre : /F1 et /F2 ne désignent plus les mêmes
+    register = pdf_canvas._PageCanvas.register_fonts
+    monkeypatch.setattr(pdf_canvas._PageCanvas, 'register_fonts',
+                        lambda canv, fonts: register(canv, list(reversed(fonts))))
+    second, _ = _export(vignettes, tmp_path, 'second.pdf', page_cache)
+
+    assert second.pages_reused == 0 and second.pages_drawn == first.pages_drawn
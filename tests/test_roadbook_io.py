@@ -0,0 +1,95 @@
+"""v2 roadbook container: conversion, incremental updates, compaction, damage."""
+import copy
+import os
+
+import pytest
+
+from benchmarks.generate import generate_vignettes, write_v1
+from roadbook_io import (MAGIC, RoadbookFormatError, is_v2, load_roadbook, save_roadbook,
+                         update_roadbook, upgrade_roadbook)
+
+
+def _fields(vignettes):
+    return [(v.num, v.inter_dist, v.observations, v.diagram, v.drawing_elements) for v in vignettes]
+
+
+@pytest.fixture
+def vignettes():
+    return generate_vignettes(12, elements=4, text_length=40)
+
+
+@pytest.fixture
+def v2_path(tmp_path, vignettes):
+    path = str(tmp_path / 'book.rbk')
+    save_roadbook(path, [copy.copy(v) for v in vignettes])
+    return path
+
+
+def test_v1_to_v2_round_trip(tmp_path, vignettes):
+    path = str(tmp_path / 'book.rbk')
+    write_v1(path, vignettes)
+    assert _fields(load_roadbook(path)) == _fields(vignettes)
+
+    assert upgrade_roadbook(path)
+    assert is_v2(path) and os.path.exists(path + '.v1.bak')
+    assert _fields(load_roadbook(path)) == _fields(vignettes)
+    assert not upgrade_roadbook(path)
+
+
+def test_incremental_update_then_reload(v2_path):
+    book = load_roadbook(v2_path)
+    size = os.path.getsize(v2_path)
+    book[3].observations = 'Rond-point, 2e sortie'
+    book[5].set_diagram(book[0].diagram, book[0].drawing_elements)
+    expected = _fields(book)
+
+    assert update_roadbook(v2_path, book)
+    # Ajout en fin de fichier : les enregistrements déjà écrits restent en place
+    assert os.path.getsize(v2_path) > size
+    assert _fields(load_roadbook(v2_path)) == expected
+    # Les vignettes en mémoire pointent sur le fichier mis à jour
+    assert _fields(book) == expected
+
+
+def test_compaction_once_most_of_the_file_is_dead(tmp_path, v2_path):
+    book = load_roadbook(v2_path)
+    for i, v in enumerate(book):
+        elements = v.drawing_elements
+        v.set_diagram((v.diagram or '') + f'<!-- {i} -->', elements)
+    expected = _fields(book)
+
+    # Tous les schémas réécrits : plus de la moitié du fichier n'est plus référencée
+    assert update_roadbook(v2_path, book)
+    fresh = str(tmp_path / 'fresh.rbk')
+    save_roadbook(fresh, [copy.copy(v) for v in book])
+    assert os.path.getsize(v2_path) == os.path.getsize(fresh)
+    assert _fields(load_roadbook(v2_path)) == expected
+
+
+def test_truncated_file_raises(v2_path):
+    with open(v2_path, 'r+b') as f:
+        # Le manifeste final est coupé : aucun manifeste valide ne reste
+        f.truncate(os.path.getsize(v2_path) - 5)
+    with pytest.raises(RoadbookFormatError):
+        load_roadbook(v2_path)
+
+
+def test_crc_corrupted_chunk_raises(v2_path):
+    book = load_roadbook(v2_path)
+    ref = next(v.stored_payload for v in book if v.stored_payload is not None)
+    with open(v2_path, 'r+b') as f:
+        f.seek(ref.offset + ref.length - 1)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([last[0] ^ 0xFF]))
+    target = next(v for v in book if v.stored_payload is ref)
+    with pytest.raises(RoadbookFormatError):
+        target.diagram
+
+
+def test_not_a_roadbook_raises(tmp_path):
+    path = str(tmp_path / 'junk.rbk')
+    with open(path, 'wb') as f:
+        f.write(MAGIC + b'\x00' * 3)
+    with pytest.raises(RoadbookFormatError):
+        load_roadbook(path)
@@ -0,0 +1,106 @@
+"""Update check against a local HTTP server: validators, offline backoff, cache."""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from update_checker import UpdateChecker, load_cache
+
+VERSION_INFO = {'version': '9.9.9', 'download_url': 'https://example.org/roadbook'}
+ETAG = '"v9"'
+
+
+class _VersionHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(VERSION_INFO).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), _VersionHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(port: int) -> str:
+    return f"http://127.0.0.1:{port}/version.json"
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _check(url, cache_path, interval=3600):
+    """Run a check synchronously; (checker, versions announced)"""
+    checker = UpdateChecker(url=url, cache_path=str(cache_path), interval=interval)
+    announced = []
+    checker.update_available.connect(lambda version, _: announced.append(version))
+    checker.run()
+    return checker, announced
+
+
+def test_first_check_downloads_and_caches(qapp, server, tmp_path):
+    cache_path = tmp_path / 'update_check.json'
+    checker, announced = _check(_url(server.server_port), cache_path)
+
+    assert checker.used_network and announced == ['9.9.9']
+    cache = load_cache(str(cache_path))
+    assert cache['etag'] == ETAG and cache['data'] == VERSION_INFO
+
+
+def test_expired_cache_revalidates_with_304(qapp, server, tmp_path):
+    cache_path = tmp_path / 'update_check.json'
+    _check(_url(server.server_port), cache_path)
+    checker, announced = _check(_url(server.server_port), cache_path, interval=0)
+
+    assert checker.used_network and announced == ['9.9.9']
+    assert server.requests[-1].get('If-None-Match') == ETAG
+    assert load_cache(str(cache_path))['data'] == VERSION_INFO
+
+
+def test_fresh_cache_skips_network(qapp, server, tmp_path):
+    cache_path = tmp_path / 'update_check.json'
+    _check(_url(server.server_port), cache_path)
+    checker, announced = _check(_url(server.server_port), cache_path)
+
+    assert not checker.used_network and announced == ['9.9.9']
+    assert len(server.requests) == 1
+
+
+def test_connection_refused_keeps_data_and_backs_off(qapp, tmp_path):
+    url = _url(_closed_port())
+    cache_path = tmp_path / 'update_check.json'
+    cache_path.write_text(json.dumps({'url': url, 'checked_at': 0, 'etag': ETAG, 'data': VERSION_INFO}))
+
+    checker, announced = _check(url, cache_path)
+    assert checker.used_network and announced == ['9.9.9']
+    cache = load_cache(str(cache_path))
+    assert cache['last_error'] and cache['data'] == VERSION_INFO
+    assert time.time() - cache['checked_at'] < 60
+
+    # Relance hors ligne : pas de nouvel essai avant l'intervalle de reprise
+    checker, announced = _check(url, cache_path)
+    assert not checker.used_network and announced == ['9.9.9']
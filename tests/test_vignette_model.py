@@ -0,0 +1,24 @@
+"""Vignette diagram hash: computed once, dropped when the diagram changes."""
+from thumbnail_cache import svg_hash
+from vignette_model import Vignette
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"/>'
+OTHER_SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20"/>'
+
+
+def test_diagram_hash_follows_the_diagram():
+    v = Vignette(num=1)
+    assert v.diagram_hash is None
+    v.set_diagram(SVG)
+    assert v.diagram_hash == svg_hash(SVG)
+    v.diagram = OTHER_SVG
+    assert v.diagram_hash == svg_hash(OTHER_SVG)
+    assert v.frozen().diagram_hash == svg_hash(OTHER_SVG)
+
+
+def test_lazy_rebinding_keeps_the_hash():
+    v = Vignette(num=1, diagram=SVG)
+    digest = v.diagram_hash
+    loads = []
+    v.set_lazy('diagram', lambda: loads.append(1) or SVG)
+    assert v.diagram_hash == digest and not loads